@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Per-type render benchmark for graph_generator.
+
+Renders one representative spec per graph type (test_graphs.GRAPH_SPECS,
+the golden-image cases and their variants) and reports the median
+wall time and the tracemalloc peak (Python + NumPy allocations) of a
+render, plus the median time of the canvas draw alone and the number of
+artists the plotter added to the axes (fewer artists, less per-artist
+overhead in the draw). Conic specs are also rendered with the previous implementation
+(800×800 meshgrid + ax.contour) so the analytic curve engine can be
+compared against it.
+
+With --renderer fast every spec carries "renderer": "fast"; specs that
+fast_raster draws have no matplotlib draw, so their draw and artists
+columns show "-".
+
+Usage:
+    python bench_graphs.py
+    python bench_graphs.py --repeat 10 --types conic,circle
+    python bench_graphs.py --renderer fast --types polynomial,trig,number_line
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+import fast_raster
+import graph_generator as gg
+from test_graphs import GRAPH_SPECS
+
+
+# ---------------------------------------------------------------------------
+# Previous conic implementation (for comparison only)
+# ---------------------------------------------------------------------------
+
+def _contour_conic(ax, spec):
+    """Conic plotter as it was before curve_engine: implicit grid + contour."""
+    kind = spec.get("kind", "ellipse")
+    a, b = spec.get("a", 3), spec.get("b", 2)
+    h, k = spec.get("h", 0), spec.get("k", 0)
+    xlim, ylim = spec.get("xlim", (-5, 5)), spec.get("ylim", (-5, 5))
+    gg.setup_exam_axes(ax, xlim=xlim, ylim=ylim)
+    ax.set_aspect("equal")
+    X, Y = np.meshgrid(np.linspace(xlim[0], xlim[1], 800),
+                       np.linspace(ylim[0], ylim[1], 800))
+    if kind == "circle":
+        ax.contour(X, Y, (X - h) ** 2 + (Y - k) ** 2, [a ** 2], colors="k", linewidths=1.5)
+    elif kind == "ellipse":
+        ax.contour(X, Y, (X - h) ** 2 / a ** 2 + (Y - k) ** 2 / b ** 2, [1],
+                   colors="k", linewidths=1.5)
+    elif kind == "hyperbola":
+        ax.contour(X, Y, (X - h) ** 2 / a ** 2 - (Y - k) ** 2 / b ** 2, [1],
+                   colors="k", linewidths=1.5)
+
+
+@contextmanager
+def _registered(name, plotter):
+    """Temporarily register an extra graph type."""
+    gg.GRAPH_TYPES[name] = plotter
+    try:
+        yield
+    finally:
+        del gg.GRAPH_TYPES[name]
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def bench_spec(spec: dict, out: Path, repeat: int) -> tuple[float, float]:
+    """Return (median seconds, peak MiB) for rendering *spec*."""
+    gg.generate_graph(spec, out)  # warm-up: fonts, mathtext, figure pool
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        gg.generate_graph(spec, out)
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    gg.generate_graph(spec, out)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak / (1024 * 1024)
+
+
+def bench_draw(spec: dict, repeat: int) -> tuple[float, int]:
+    """Return (median seconds of fig.canvas.draw, artists on the axes).
+
+    The plotter runs untimed on a fresh pooled figure each round; only the
+    draw is timed, which is where per-artist overhead shows up.
+    """
+    graph_type = spec.get("type", "custom")
+    figsize, dpi = gg.design_figsize(spec), 300
+    times = []
+    with gg._exam_style():
+        for _ in range(repeat + 1):  # first round warms up
+            fig, ax = gg._acquire_fig(figsize, dpi)
+            try:
+                gg.GRAPH_TYPES[graph_type](ax, spec)
+                artists = len(ax.get_children())
+                t0 = time.perf_counter()
+                fig.canvas.draw()
+                times.append(time.perf_counter() - t0)
+            finally:
+                gg._release_fig(fig, figsize, dpi)
+    return statistics.median(times[1:]), artists
+
+
+def run(names: list[str], repeat: int, baseline: bool = True,
+        renderer: str = "matplotlib") -> list[tuple[str, float, float, float | None, int | None]]:
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp, _registered("conic_contour", _contour_conic):
+        out = Path(tmp) / "bench.png"
+        for name in names:
+            spec = dict(GRAPH_SPECS[name], renderer=renderer)
+            try:
+                if gg.graph_renderer(spec) == "fast" and fast_raster.supports(spec):
+                    draw = (None, None)
+                else:
+                    draw = bench_draw(spec, repeat)
+                rows.append((name, *bench_spec(spec, out, repeat), *draw))
+            except ImportError as e:  # an optional dependency missing
+                print(f"  skip {name}: {e}", file=sys.stderr)
+                continue
+            if baseline and spec["type"] == "conic":
+                old = dict(spec, type="conic_contour", renderer="matplotlib")
+                rows.append((f"{name} [contour]", *bench_spec(old, out, repeat),
+                             *bench_draw(old, repeat)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark graph rendering per type")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed renders per spec (default: 5)")
+    parser.add_argument("--types", help="Comma-separated spec names (default: all)")
+    parser.add_argument("--no-baseline", action="store_true",
+                        help="Skip the contour-based conic comparison")
+    parser.add_argument("--renderer", choices=["matplotlib", "fast"], default="matplotlib",
+                        help="Graph renderer to benchmark (default: matplotlib)")
+    args = parser.parse_args()
+
+    names = args.types.split(",") if args.types else list(GRAPH_SPECS)
+    unknown = [n for n in names if n not in GRAPH_SPECS]
+    if unknown:
+        raise SystemExit(f"Unknown spec(s): {', '.join(unknown)}. Available: {list(GRAPH_SPECS)}")
+
+    rows = run(names, args.repeat, baseline=not args.no_baseline, renderer=args.renderer)
+    print(f"{'graph':<28} {'time (ms)':>10} {'peak (MiB)':>11} {'draw (ms)':>10} {'artists':>8}")
+    for name, secs, peak, draw, artists in rows:
+        draw_col = f"{draw * 1000:>10.1f} {artists:>8}" if draw is not None else f"{'-':>10} {'-':>8}"
+        print(f"{name:<28} {secs * 1000:>10.1f} {peak:>11.2f} {draw_col}")
+
+
+if __name__ == "__main__":
+    main()
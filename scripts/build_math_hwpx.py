@@ -27,13 +27,48 @@ Usage:
 
     # Custom header override
     python build_math_hwpx.py --problems p.json --header my_header.xml --output worksheet.hwpx
+
+    # Content-aware page packing (fewer pages for short problems)
+    python build_math_hwpx.py --problems problems.json --layout auto --output exam.hwpx
+
+    # Graphs rendered at their exact display size (one draw pass, no rescaling)
+    python build_math_hwpx.py --problems problems.json --graph-render exact --print-dpi 600 --output exam.hwpx
+
+    # Simple function graphs drawn without matplotlib (falls back per graph)
+    python build_math_hwpx.py --problems problems.json --graph-renderer fast --output exam.hwpx
+
+    # Each graph in a worker process: 10 s and 2 GB per graph, placeholder on failure
+    python build_math_hwpx.py --problems problems.json --graph-timeout 10 --graph-memory-mb 2048 --output exam.hwpx
+
+    # Geometry figures as native HWPX drawing objects instead of PNGs
+    python build_math_hwpx.py --problems problems.json --graph-backend native --output exam.hwpx
+
+    # Equation scripts are linted before the build; skip the check
+    python build_math_hwpx.py --problems problems.json --no-lint --output exam.hwpx
+
+    # Where did the time go? Chrome trace + per-stage table
+    python build_math_hwpx.py --problems problems.json --profile trace.json --output exam.hwpx
+
+    # Per-stage memory peaks; over 800 MB RSS or 64 MB per graph, go low-memory
+    python build_math_hwpx.py --problems problems.json --memory-report \
+        --memory-budget rss=800,graph=64 --memory-budget-action degrade --output exam.hwpx
+
+    # Prometheus metrics (node_exporter textfile collector)
+    python build_math_hwpx.py --problems problems.json --metrics-textfile build.prom --output exam.hwpx
+
+    # Large problem banks as JSON Lines (header line + one problem per line)
+    python build_math_hwpx.py --problems bank.jsonl --output exam.hwpx
+
+    # Problems selected from a SQLite bank (problem_bank.py) by query
+    python build_math_hwpx.py --bank bank.db --query "grade=고2 unit=수열 points>=3 limit=20" \
+        --title "고2 수열 단원평가" --output exam.hwpx
 """
 
 import argparse
-import json
 import shutil
 import sys
 import tempfile
+from contextlib import nullcontext
 from pathlib import Path
 
 from hwpx_utils import (
@@ -43,7 +78,17 @@ from hwpx_utils import (
     validate_hwpx,
     _add_images_to_manifest,
 )
-from section_generators import generate_section_xml
+from eq_lint import format_issue, lint_file, lint_problems
+from graph_sizing import graph_backend
+from graph_worker import GraphFailure, GraphWorker, placeholder_png, render_png_bytes
+from memory_budget import MemoryBudgetExceeded, MemoryMonitor, degraded, parse_budgets
+import metrics
+from problem_bank import load_query
+from problem_io import load_problems
+from profiling import profile, span, traced_iter
+from section_generators import iter_section_xml
+
+_MAX_LINT_ERRORS = 50  # listed before the build stops
 
 # Resolve paths relative to this script
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -56,6 +101,178 @@ BASE_DIR = TEMPLATES_DIR / "base"
 # Build orchestration
 # ---------------------------------------------------------------------------
 
+def _iter_with_graphs(problems, graph_entries: dict, image_ids: dict,
+                      graph_defaults: dict | None = None, worker: GraphWorker | None = None,
+                      counts: dict | None = None):
+    """Yield problems, rendering each "graph" field on the way.
+
+    PNGs are rendered in memory into graph_entries (archive name → bytes)
+    and go straight into the HWPX archive, without BinData files on disk.
+
+    graph_defaults (e.g. render mode, print_dpi) fill in keys a graph spec
+    does not set itself, before both rendering and layout see the spec.
+    Graphs on the native backend are left to the section generator, which
+    writes them as drawing objects. With the "fast" renderer, graphs that
+    fast_raster can draw never import matplotlib at all.
+
+    A ValueError from a graph spec stops the build. Any other failure gets
+    a placeholder image and a warning, and the build goes on: with a
+    worker, graphs render in its subprocess and a timeout, memory limit or
+    crash counts as such a failure; in-process, any other exception does.
+    Once a memory budget switches the build to low-memory mode
+    (memory_budget.degraded()), the remaining graphs go to a worker
+    started for the purpose, so matplotlib's allocations leave this
+    process.
+
+    counts, if given, receives the number of "problems" and "graphs" seen.
+    """
+    counts = counts if counts is not None else {}
+    counts.setdefault("problems", 0)
+    counts.setdefault("graphs", 0)
+    fallback = None  # worker started by low-memory mode
+    try:
+        for prob_num, prob in enumerate(problems, 1):
+            counts["problems"] += 1
+            if "graph" in prob:
+                counts["graphs"] += 1
+                for key, value in (graph_defaults or {}).items():
+                    prob["graph"].setdefault(key, value)
+                try:
+                    backend = graph_backend(prob["graph"])
+                except ValueError as e:
+                    raise SystemExit(f"Graph error in problem {prob_num}: {e}")
+                if backend == "native":
+                    print(f"  Graph: problem {prob_num} → native drawing objects")
+                    yield prob
+                    continue
+                img_name = f"graph_{prob_num}.png"
+                try:
+                    if worker is None and degraded():
+                        if fallback is None:
+                            fallback = GraphWorker()
+                        worker_for_graph = fallback
+                    else:
+                        worker_for_graph = worker
+                    with span("graph", type=prob["graph"].get("type", "custom"), problem=prob_num,
+                              isolated=worker_for_graph is not None):
+                        if worker_for_graph is not None:
+                            png = worker_for_graph.render(prob["graph"])
+                        else:
+                            try:
+                                png = render_png_bytes(prob["graph"])
+                            except ValueError:
+                                raise
+                            except Exception as e:  # as in the worker: fails this graph only
+                                raise GraphFailure(f"{type(e).__name__}: {e}") from e
+                except ValueError as e:  # unknown type, bad custom expression, ...
+                    raise SystemExit(f"Graph error in problem {prob_num}: {e}")
+                except GraphFailure as e:
+                    print(f"WARNING: graph in problem {prob_num} failed ({e}); "
+                          "using a placeholder image", file=sys.stderr)
+                    metrics.GRAPH_FAILURES.inc()
+                    png = placeholder_png(prob["graph"])
+                metrics.GRAPH_BYTES.inc(len(png))
+                graph_entries[f"BinData/{img_name}"] = png
+                image_ids[prob_num] = f"graph{prob_num}"
+                print(f"  Graph: problem {prob_num} → {img_name}")
+            yield prob
+    finally:
+        if fallback is not None:
+            fallback.close()
+
+
+def _lint_equations(source: Path, query: str | None = None) -> None:
+    """Check every equation script of a problem file, or of the problems a
+    bank query selects; SystemExit listing any errors."""
+    with span("lint", file=source.name):
+        if query is None:
+            found = lint_file(source)
+        else:
+            found = lint_problems(load_query(source, query)[1])
+    errors = [(loc, issue) for loc, issue in found if issue.severity == "error"]
+    for location, issue in found:
+        if issue.severity != "error":
+            print(f"WARNING: {location}, col {issue.column}: {issue.message}", file=sys.stderr)
+    if errors:
+        metrics.VALIDATION_FAILURES.inc(len(errors), check="equation")
+        for location, issue in errors[:_MAX_LINT_ERRORS]:
+            print(f"  {format_issue(location, issue)}", file=sys.stderr)
+        if len(errors) > _MAX_LINT_ERRORS:
+            print(f"  ... and {len(errors) - _MAX_LINT_ERRORS} more", file=sys.stderr)
+        raise SystemExit(f"{len(errors)} equation script error(s) in {source}; "
+                         "fix them or build with --no-lint")
+
+
+def _graph_defaults(data: dict) -> dict:
+    """Graph spec defaults (render mode, dpi, backend, renderer) set in data."""
+    return {key: data[src] for key, src in
+            (("render", "graph_render"), ("print_dpi", "print_dpi"),
+             ("backend", "graph_backend"), ("renderer", "graph_renderer"))
+            if src in data}
+
+
+def apply_overrides(data: dict, title: str | None = None, exam_type: str | None = None,
+                    layout: str | None = None, graph_render: str | None = None,
+                    print_dpi: int | None = None, graph_backend: str | None = None,
+                    graph_renderer: str | None = None, graph_timeout: float | None = None,
+                    graph_memory_mb: int | None = None) -> dict:
+    """Copy build options into the problem file header *data* (in place)."""
+    if title and "title" not in data:
+        data["title"] = title
+    # CLI --exam-type overrides JSON exam_type
+    if exam_type:
+        data["exam_type"] = exam_type
+    # CLI --layout overrides JSON layout
+    if layout:
+        data["layout"] = layout
+    # CLI --graph-render / --print-dpi override JSON values
+    if graph_render:
+        data["graph_render"] = graph_render
+    if print_dpi:
+        data["print_dpi"] = print_dpi
+    if graph_backend:
+        data["graph_backend"] = graph_backend
+    if graph_renderer:
+        data["graph_renderer"] = graph_renderer
+    # CLI --graph-timeout / --graph-memory-mb override JSON values
+    if graph_timeout:
+        data["graph_timeout"] = graph_timeout
+    if graph_memory_mb:
+        data["graph_memory_mb"] = graph_memory_mb
+    return data
+
+
+def write_section(data: dict, problems, out, graph_entries: dict,
+                  counts: dict | None = None) -> dict:
+    """Render graphs and write section0.xml for *data* to the text stream *out*.
+
+    problems is the (lazy) problem iterable from load_problems; data holds
+    the header keys with any CLI overrides already applied. Graph PNGs go
+    into graph_entries (archive name → bytes). Returns image_ids (problem
+    number → binary item id) for the content.hpf manifest.
+    """
+    graph_defaults = _graph_defaults(data)
+
+    # Graphs are rendered as each problem arrives; image_ids fills up as
+    # the section generator pulls problems page by page (in a worker
+    # subprocess when a time or memory limit is set)
+    image_ids = {}
+    isolated = data.get("graph_timeout") or data.get("graph_memory_mb")
+    worker = (GraphWorker(data.get("graph_timeout"), data.get("graph_memory_mb"))
+              if isolated else nullcontext())
+    with worker:
+        data["problems"] = _iter_with_graphs(problems, graph_entries, image_ids,
+                                             graph_defaults,
+                                             worker if isolated else None, counts)
+
+        # Pass image_ids into data for section XML generation
+        data["_image_ids"] = image_ids
+        with span("section"):
+            for chunk in iter_section_xml(data):
+                out.write(chunk)
+    return image_ids
+
+
 def build(
     problems_file: Path | None,
     header_override: Path | None,
@@ -64,56 +281,68 @@ def build(
     creator: str | None,
     output: Path,
     exam_type: str | None = None,
+    layout: str | None = None,
+    graph_render: str | None = None,
+    print_dpi: int | None = None,
+    graph_backend: str | None = None,
+    graph_renderer: str | None = None,
+    graph_timeout: float | None = None,
+    graph_memory_mb: int | None = None,
+    lint: bool = True,
+    bank: Path | None = None,
+    query: str | None = None,
 ) -> None:
-    """Main build logic."""
+    """Main build logic.
+
+    With bank (a problem_bank.py database) the problems are the ones query
+    selects, streamed from the database instead of read from problems_file.
+    With lint (the default) every equation script is checked by eq_lint
+    before anything is generated; errors stop the build.
+    """
     if not BASE_DIR.is_dir():
         raise SystemExit(f"Base template not found: {BASE_DIR}")
 
+    graph_entries = {}  # BinData/graph_N.png → PNG bytes, packed from memory
+    counts = {}         # problems / graphs in this document, for metrics
     with tempfile.TemporaryDirectory() as tmpdir:
         work = Path(tmpdir) / "build"
 
         # 1. Copy base template
-        shutil.copytree(BASE_DIR, work)
+        with span("template_copy"):
+            shutil.copytree(BASE_DIR, work)
 
         # 2. Generate section0.xml from problem data
-        if problems_file and not section_override:
-            if not problems_file.is_file():
-                raise SystemExit(f"Problems file not found: {problems_file}")
-            with open(problems_file, encoding="utf-8") as f:
-                data = json.load(f)
-            if title and "title" not in data:
-                data["title"] = title
-            # CLI --exam-type overrides JSON exam_type
-            if exam_type:
-                data["exam_type"] = exam_type
-
-            # 2a. Generate graph images for problems that have "graph" field
-            image_ids = {}
-            bindata_dir = work / "BinData"
-            problems = data.get("problems", [])
-            graph_problems = [(i, p) for i, p in enumerate(problems, 1)
-                              if "graph" in p]
-            if graph_problems:
-                from graph_generator import generate_graph
-                bindata_dir.mkdir(exist_ok=True)
-                for prob_num, prob in graph_problems:
-                    graph_spec = prob["graph"]
-                    img_name = f"graph_{prob_num}.png"
-                    img_path = bindata_dir / img_name
-                    generate_graph(graph_spec, img_path)
-                    item_id = f"graph{prob_num}"
-                    image_ids[prob_num] = item_id
-                    print(f"  Graph: problem {prob_num} → {img_name}")
-
-            # Pass image_ids into data for section XML generation
-            data["_image_ids"] = image_ids
-            section_xml = generate_section_xml(data)
-            (work / "Contents" / "section0.xml").write_text(section_xml, encoding="utf-8")
+        if (problems_file or bank) and not section_override:
+            if bank:
+                if lint:
+                    _lint_equations(bank, query or "")
+                # Rows come off the query cursor as the section asks for them
+                with span("load_problems", file=bank.name):
+                    data, problems = load_query(bank, query or "")
+            else:
+                if not problems_file.is_file():
+                    raise SystemExit(f"Problems file not found: {problems_file}")
+                if lint:
+                    _lint_equations(problems_file)
+                # Problems are read lazily (JSON or JSONL) so that memory scales
+                # with page size rather than with the size of the problem bank.
+                with span("load_problems", file=problems_file.name):
+                    data, problems = load_problems(problems_file)
+            problems = traced_iter("read_problem", problems)
+            apply_overrides(data, title, exam_type, layout, graph_render, print_dpi,
+                            graph_backend, graph_renderer, graph_timeout, graph_memory_mb)
+
+            # 2a. Render graphs for problems that have a "graph" field and
+            # write section0.xml
+            section_path = work / "Contents" / "section0.xml"
+            with open(section_path, "w", encoding="utf-8") as f:
+                image_ids = write_section(data, problems, f, graph_entries, counts)
 
             # 2b. Register images in content.hpf manifest
             if image_ids:
-                _add_images_to_manifest(work / "Contents" / "content.hpf",
-                                         image_ids, problems)
+                with span("manifest", images=len(image_ids)):
+                    _add_images_to_manifest(work / "Contents" / "content.hpf",
+                                             image_ids)
 
         # 3. Apply custom overrides
         if header_override:
@@ -127,19 +356,31 @@ def build(
             shutil.copy2(section_override, work / "Contents" / "section0.xml")
 
         # 4. Update metadata
-        update_metadata(work / "Contents" / "content.hpf", title, creator)
+        with span("metadata"):
+            update_metadata(work / "Contents" / "content.hpf", title, creator)
 
         # 5. Validate all XML files
-        for xml_file in work.rglob("*.xml"):
-            validate_xml(xml_file)
-        for hpf_file in work.rglob("*.hpf"):
-            validate_xml(hpf_file)
+        for xml_file in [*work.rglob("*.xml"), *work.rglob("*.hpf")]:
+            with span("validate_xml", file=xml_file.name):
+                try:
+                    validate_xml(xml_file)
+                except SystemExit:
+                    metrics.VALIDATION_FAILURES.inc(check="xml")
+                    raise
 
         # 6. Pack
-        pack_hwpx(work, output)
+        with span("pack"):
+            pack_hwpx(work, output, graph_entries)
 
     # 7. Final validation
-    errors = validate_hwpx(output)
+    with span("validate_hwpx"):
+        errors = validate_hwpx(output)
+    metrics.VALIDATION_FAILURES.inc(len(errors), check="hwpx")
+    metrics.DOCUMENTS.inc(status="invalid" if errors else "valid")
+    metrics.OUTPUT_BYTES.inc(output.stat().st_size)
+    if counts:
+        metrics.PROBLEMS.observe(counts["problems"])
+        metrics.GRAPHS.observe(counts["graphs"])
     if errors:
         print(f"WARNING: {output} has issues:", file=sys.stderr)
         for e in errors:
@@ -161,7 +402,18 @@ def main() -> None:
     parser.add_argument(
         "--problems", "-p",
         type=Path,
-        help="JSON file containing problem data",
+        help="JSON or JSONL file containing problem data",
+    )
+    parser.add_argument(
+        "--bank",
+        type=Path,
+        metavar="BANK_DB",
+        help="SQLite problem bank (problem_bank.py) to take problems from",
+    )
+    parser.add_argument(
+        "--query",
+        help="Problems to select from --bank, e.g. "
+             "\"grade=고2 unit=수열 points>=3 limit=20 order=random seed=1\"",
     )
     parser.add_argument(
         "--header",
@@ -187,6 +439,85 @@ def main() -> None:
         default="학력평가",
         help="Exam type (default: 학력평가, use 'worksheet' for simple format)",
     )
+    parser.add_argument(
+        "--layout",
+        choices=["fixed", "auto"],
+        help="Exam page layout: fixed problems_per_page (default) or "
+             "auto content-aware packing",
+    )
+    parser.add_argument(
+        "--graph-render",
+        choices=["tight", "exact"],
+        help="Graph rendering: tight 300 dpi bounding box (default) or "
+             "exact pixel size for the display size at --print-dpi",
+    )
+    parser.add_argument(
+        "--print-dpi",
+        type=int,
+        help="Print resolution for --graph-render exact (default: 300)",
+    )
+    parser.add_argument(
+        "--graph-backend",
+        choices=["png", "native"],
+        help="Graph output: png images (default) or native HWPX drawing "
+             "objects for triangle, quadrilateral, coordinate and number_line",
+    )
+    parser.add_argument(
+        "--graph-renderer",
+        choices=["matplotlib", "fast"],
+        help="PNG renderer: matplotlib (default) or fast, which draws simple "
+             "function graphs without matplotlib and falls back per graph",
+    )
+    parser.add_argument(
+        "--graph-timeout",
+        type=float,
+        help="Render each graph in a worker process and give up on it after "
+             "this many seconds (placeholder image, build continues)",
+    )
+    parser.add_argument(
+        "--graph-memory-mb",
+        type=int,
+        help="Address-space limit in MB for the graph worker process "
+             "(implies the worker; allow ~1024 MB for matplotlib itself)",
+    )
+    parser.add_argument(
+        "--no-lint",
+        action="store_true",
+        help="Skip the equation script check that runs before the build",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="TRACE_JSON",
+        help="Record build stages to a Chrome trace (chrome://tracing, Perfetto) "
+             "and print a per-stage timing table",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        type=Path,
+        metavar="PROM_FILE",
+        help="Write Prometheus metrics for this build to a file "
+             "(node_exporter textfile collector format)",
+    )
+    parser.add_argument(
+        "--memory-report",
+        action="store_true",
+        help="Trace allocations (tracemalloc) and sample RSS per build stage, "
+             "then print a per-stage memory table (slows the build)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        metavar="BUDGETS",
+        help="Memory budgets in MB: a process RSS limit (\"800\") or per-stage "
+             "traced limits (\"rss=800,graph=64,section=128\"); implies tracing",
+    )
+    parser.add_argument(
+        "--memory-budget-action",
+        choices=["fail", "degrade"],
+        default="fail",
+        help="Over budget: fail the build (default) or switch to low-memory "
+             "mode (drop caches, render remaining graphs in a worker process)",
+    )
     parser.add_argument(
         "--output", "-o",
         type=Path,
@@ -195,18 +526,55 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    if not args.problems and not args.section:
-        parser.error("Either --problems or --section is required")
+    if not args.problems and not args.section and not args.bank:
+        parser.error("One of --problems, --bank or --section is required")
+    if args.problems and args.bank:
+        parser.error("--problems and --bank cannot be used together")
+    if args.query and not args.bank:
+        parser.error("--query requires --bank")
 
-    build(
-        problems_file=args.problems,
-        header_override=args.header,
-        section_override=args.section,
-        title=args.title,
-        creator=args.creator,
-        output=args.output,
-        exam_type=args.exam_type,
-    )
+    try:
+        budgets = parse_budgets(args.memory_budget) if args.memory_budget else {}
+    except ValueError as e:
+        parser.error(str(e))
+    monitored = args.memory_report or args.memory_budget
+    monitor = (MemoryMonitor(budgets, args.memory_budget_action) if monitored
+               else nullcontext())
+
+    if args.metrics_textfile:
+        metrics.enable()
+    with profile() if args.profile else nullcontext() as prof, monitor as mon:
+        try:
+            build(
+                problems_file=args.problems,
+                header_override=args.header,
+                section_override=args.section,
+                title=args.title,
+                creator=args.creator,
+                output=args.output,
+                exam_type=args.exam_type,
+                layout=args.layout,
+                graph_render=args.graph_render,
+                print_dpi=args.print_dpi,
+                graph_backend=args.graph_backend,
+                graph_renderer=args.graph_renderer,
+                graph_timeout=args.graph_timeout,
+                graph_memory_mb=args.graph_memory_mb,
+                lint=not args.no_lint,
+                bank=args.bank,
+                query=args.query,
+            )
+        except MemoryBudgetExceeded as e:
+            print(mon.report(), file=sys.stderr)
+            raise SystemExit(str(e))
+    if args.metrics_textfile:
+        metrics.write_textfile(args.metrics_textfile)
+    if prof is not None:
+        prof.write_trace(args.profile)
+        print(prof.summary())
+        print(f"Trace: {args.profile}")
+    if mon is not None:
+        print(mon.report())
 
 
 if __name__ == "__main__":
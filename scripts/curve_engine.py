@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Analytic parametric paths for conic sections.
+
+Circles, ellipses and hyperbolas are sampled from their parametric form
+instead of contouring the implicit equation on a dense grid, and are
+clipped to the view window analytically (edge crossings are solved in
+closed form, so no samples are wasted outside the axes). Function graphs
+y = f(x) are sampled adaptively and split at poles, jumps and gaps.
+
+Provides:
+- ellipse_path: (x, y) arrays for an ellipse or elliptic arc
+- ellipse_segments: ellipse/circle clipped to xlim × ylim
+- hyperbola_segments: both branches of (x-h)²/a² − (y-k)²/b² = 1, clipped
+- adaptive_sample: y = f(x) as continuous (x, y) segments
+- join_segments: concatenate segments with NaN breaks for one ax.plot call
+"""
+
+import numpy as np
+
+TWO_PI = 2 * np.pi
+
+_SAMPLES_PER_TURN = 256     # chord error < 0.05 px for a full-width circle at 300 dpi
+_HYPERBOLA_SAMPLES = 200    # per branch over the visible parameter range
+_MIN_SAMPLES = 16
+
+
+def ellipse_path(h, k, a, b, t0=0.0, t1=TWO_PI, n=None):
+    """Sample (h + a·cos t, k + b·sin t) for t in [t0, t1] (radians)."""
+    if n is None:
+        n = max(_MIN_SAMPLES,
+                int(np.ceil(_SAMPLES_PER_TURN * abs(t1 - t0) / TWO_PI)) + 1)
+    t = np.linspace(t0, t1, n)
+    return h + a * np.cos(t), k + b * np.sin(t)
+
+
+# ---------------------------------------------------------------------------
+# Clipping
+# ---------------------------------------------------------------------------
+
+def _inside(x, y, xlim, ylim):
+    return (min(xlim) <= x <= max(xlim)) and (min(ylim) <= y <= max(ylim))
+
+
+def _visible_spans(lo, hi, cuts, point, xlim, ylim):
+    """Split [lo, hi] at the edge crossings *cuts*; keep spans inside the window.
+
+    Between two consecutive crossings the curve is either wholly inside or
+    wholly outside, so testing the midpoint of each span is enough.
+    """
+    ts = sorted({lo, hi, *(c for c in cuts if lo < c < hi)})
+    spans = []
+    for t0, t1 in zip(ts, ts[1:]):
+        if _inside(*point((t0 + t1) / 2), xlim, ylim):
+            if spans and spans[-1][1] == t0:
+                spans[-1] = (spans[-1][0], t1)
+            else:
+                spans.append((t0, t1))
+    return spans
+
+
+def _check_axes(kind, a, b):
+    if not (a > 0 and b > 0):
+        raise ValueError(f"{kind} needs positive semi-axes, got a={a}, b={b}")
+
+
+def ellipse_segments(h, k, a, b, xlim, ylim):
+    """Return the visible pieces of an ellipse as a list of (x, y) arrays.
+
+    Raises ValueError unless both semi-axes are positive.
+    """
+    _check_axes("ellipse", a, b)
+    cuts = []
+    for xe in xlim:
+        c = (xe - h) / a
+        if abs(c) <= 1:
+            t = np.arccos(c)
+            cuts += [t, TWO_PI - t]
+    for ye in ylim:
+        s = (ye - k) / b
+        if abs(s) <= 1:
+            t = np.arcsin(s)
+            cuts += [t % TWO_PI, (np.pi - t) % TWO_PI]
+
+    def point(t):
+        return h + a * np.cos(t), k + b * np.sin(t)
+
+    spans = _visible_spans(0.0, TWO_PI, cuts, point, xlim, ylim)
+    # A span ending at 2π continues the one starting at 0
+    if len(spans) > 1 and spans[0][0] == 0.0 and spans[-1][1] == TWO_PI:
+        spans[0] = (spans[-1][0] - TWO_PI, spans[0][1])
+        spans.pop()
+    return [ellipse_path(h, k, a, b, t0, t1) for t0, t1 in spans]
+
+
+def hyperbola_segments(h, k, a, b, xlim, ylim):
+    """Return the visible pieces of both branches of a horizontal hyperbola.
+
+    Branches are parametrised as (h ± a·cosh u, k + b·sinh u); the u range
+    is bounded by the window before sampling. Raises ValueError unless both
+    semi-axes are positive.
+    """
+    _check_axes("hyperbola", a, b)
+    segments = []
+    y_reach = max(abs(ylim[0] - k), abs(ylim[1] - k)) / b
+    for sign in (1, -1):
+        x_reach = max(sign * (xe - h) for xe in xlim) / a
+        if x_reach < 1:
+            continue  # branch lies entirely outside the window
+        u_max = min(np.arccosh(x_reach), np.arcsinh(y_reach))
+
+        cuts = []
+        for xe in xlim:
+            c = sign * (xe - h) / a
+            if c >= 1:
+                u = np.arccosh(c)
+                cuts += [u, -u]
+        for ye in ylim:
+            cuts.append(np.arcsinh((ye - k) / b))
+
+        def point(u, sign=sign):
+            return h + sign * a * np.cosh(u), k + b * np.sinh(u)
+
+        for u0, u1 in _visible_spans(-u_max, u_max, cuts, point, xlim, ylim):
+            n = max(_MIN_SAMPLES,
+                    int(np.ceil(_HYPERBOLA_SAMPLES * (u1 - u0) / (2 * u_max))) + 1)
+            u = np.linspace(u0, u1, n)
+            segments.append(point(u))
+    return segments
+
+
+# ---------------------------------------------------------------------------
+# Adaptive function sampling
+# ---------------------------------------------------------------------------
+
+_SEED_SAMPLES = 129   # initial uniform grid (catches features ≥ ~1/60 of the range)
+_MAX_DEPTH = 14       # bisection levels below the seed grid
+_TOLERANCE = 3e-4     # max midpoint deviation from the chord, as a fraction of
+                      # the window height (≈ 0.25 px on a 2.8 in / 300 dpi graph)
+_JUMP_RATIO = 0.9     # half-interval share of the step that marks a discontinuity
+_Y_CLAMP = 100        # off-window values are clamped to ±100 window heights
+
+
+def adaptive_sample(f, x0, x1, ylim=None, tol=_TOLERANCE):
+    """Sample y = f(x) on [x0, x1] and return its continuous pieces.
+
+    *f* must accept and return NumPy arrays. Starting from a coarse uniform
+    grid, every interval whose midpoint deviates from the straight chord by
+    more than *tol* (relative to the window height) is bisected, so samples
+    concentrate where the curvature is high and flat stretches stay coarse.
+    Intervals lying entirely above or below *ylim* are not refined.
+
+    An interval that still fails the chord test at the finest level is a
+    pole or a jump; the curve is split there, and at non-finite values
+    (outside the domain), so no line is drawn across a discontinuity.
+
+    Returns a list of (x, y) arrays, one per continuous piece.
+    """
+    with np.errstate(all="ignore"):
+        x = np.linspace(x0, x1, _SEED_SAMPLES)
+        y = np.asarray(f(x), dtype=float) * np.ones_like(x)
+
+        if ylim is not None:
+            y_lo, y_hi = min(ylim), max(ylim)
+        else:
+            finite = y[np.isfinite(y)]
+            y_lo, y_hi = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+        y_span = (y_hi - y_lo) or 1.0
+
+        active = np.arange(len(x) - 1)  # intervals still to be tested
+        for depth in range(_MAX_DEPTH + 1):
+            if not active.size:
+                break
+            xm = (x[active] + x[active + 1]) / 2
+            ym = np.asarray(f(xm), dtype=float) * np.ones_like(xm)
+            ya, yb = y[active], y[active + 1]
+
+            err = np.abs(ym - (ya + yb) / 2) / y_span
+            n_finite = np.isfinite(ya).astype(int) + np.isfinite(yb) + np.isfinite(ym)
+            # Refine curved stretches and domain edges; skip gaps entirely
+            # outside the domain
+            bad = (err > tol) | ((n_finite > 0) & (n_finite < 3))
+            if ylim is not None:
+                above = (ya > y_hi) & (yb > y_hi) & (ym > y_hi)
+                below = (ya < y_lo) & (yb < y_lo) & (ym < y_lo)
+                bad &= ~(above | below)
+            if depth == _MAX_DEPTH:
+                # Still failing at the finest level: a pole or a jump keeps
+                # (nearly) its whole step inside one half of the interval,
+                # while a steep continuous curve (cbrt at 0) splits it
+                half = np.maximum(np.abs(ym - ya), np.abs(yb - ym))
+                active = active[bad & ~(half < _JUMP_RATIO * np.abs(yb - ya))]
+                break
+            active, xm, ym = active[bad], xm[bad], ym[bad]
+
+            x = np.insert(x, active + 1, xm)
+            y = np.insert(y, active + 1, ym)
+            # Both halves of each split interval are tested next round
+            shift = np.arange(len(active))
+            active = np.concatenate([active + shift, active + shift + 1])
+            active.sort()
+
+    finite = np.isfinite(y)
+    breaks = ~finite
+    breaks[active + 1] = True  # start a new piece after each discontinuity
+    y = np.clip(y, y_lo - _Y_CLAMP * y_span, y_hi + _Y_CLAMP * y_span)
+
+    segments = []
+    start = 0
+    for stop in [*np.flatnonzero(breaks), len(x)]:
+        if stop - start >= 2:
+            segments.append((x[start:stop], y[start:stop]))
+        # a non-finite sample is dropped; a jump keeps its right-hand point
+        start = stop + 1 if stop < len(x) and not finite[stop] else stop
+    return segments
+
+
+def join_segments(segments):
+    """Concatenate (x, y) segments with NaN separators into two arrays."""
+    xs, ys = [], []
+    for x, y in segments:
+        if xs:
+            xs.append([np.nan])
+            ys.append([np.nan])
+        xs.append(x)
+        ys.append(y)
+    if not xs:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(xs), np.concatenate(ys)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Vectorized probability distributions for the statistics graphs.
+
+graph_generator's normal, binomial, standardization and normal_table
+plots only need a handful of densities and probabilities, evaluated on
+whole NumPy arrays at once. They are written out here so that drawing a
+bell curve does not import scipy.
+
+Provides:
+- normal_pdf: density of N(mu, sigma²)
+- normal_cdf: P(X ≤ x) for X ~ N(mu, sigma²)
+- binomial_pmf: P(X = k) for X ~ B(n, p), k an array of counts
+- binomial_moments: (mean, standard deviation) of B(n, p)
+"""
+
+import numpy as np
+
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+# Abramowitz & Stegun 7.1.26: |error| < 1.5e-7, plenty for 4-decimal tables
+_ERF_P = 0.3275911
+_ERF_A = (0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429)
+
+
+def _erf(x):
+    x = np.asarray(x, dtype=float)
+    t = 1.0 / (1.0 + _ERF_P * np.abs(x))
+    poly = t * (_ERF_A[0] + t * (_ERF_A[1] + t * (_ERF_A[2] + t * (_ERF_A[3] + t * _ERF_A[4]))))
+    return np.sign(x) * (1.0 - poly * np.exp(-x * x))
+
+
+def normal_pdf(x, mu=0.0, sigma=1.0):
+    """Density of N(mu, sigma²) at every element of *x*."""
+    z = (np.asarray(x, dtype=float) - mu) / sigma
+    return np.exp(-0.5 * z * z) / (sigma * _SQRT_2PI)
+
+
+def normal_cdf(x, mu=0.0, sigma=1.0):
+    """P(X ≤ x) for X ~ N(mu, sigma²) at every element of *x*."""
+    z = (np.asarray(x, dtype=float) - mu) / sigma
+    return 0.5 * (1.0 + _erf(z / np.sqrt(2.0)))
+
+
+def binomial_pmf(k, n: int, p: float):
+    """P(X = k) for X ~ B(n, p); counts outside 0..n have probability 0.
+
+    Computed in log space from a table of log k!, so large n does not
+    overflow the binomial coefficient.
+    """
+    k = np.asarray(k)
+    inside = (k >= 0) & (k <= n)
+    kc = np.clip(k, 0, n).astype(int)
+    log_fact = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, n + 1)))])
+    log_coef = log_fact[n] - log_fact[kc] - log_fact[n - kc]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 0·log 0 = 0, so p = 0 or 1 puts all the mass on k = 0 or k = n
+        log_p = np.where(kc > 0, kc * np.log(p), 0.0)
+        log_q = np.where(n - kc > 0, (n - kc) * np.log1p(-p), 0.0)
+    return np.where(inside, np.exp(log_coef + log_p + log_q), 0.0)
+
+
+def binomial_moments(n: int, p: float) -> tuple[float, float]:
+    """Mean np and standard deviation √(np(1−p)) of B(n, p)."""
+    return n * p, float(np.sqrt(n * p * (1 - p)))
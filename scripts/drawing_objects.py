@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Native HWPX drawing objects (hp:line, hp:polygon, hp:ellipse, hp:rect).
+
+Figures built from these are vector shapes inside the section XML: no
+image, no BinData entry, and they stay sharp at any zoom. Shapes are
+grouped in one hp:container that sits inline (treatAsChar) like a
+picture.
+
+All coordinates are HWPUNIT in the container's own space: origin at the
+top-left corner, y growing downwards.
+
+Provides:
+- make_line: straight segment, optionally with an arrow head at the end
+- make_polygon: closed polygon or open polyline, optionally filled
+- make_ellipse: ellipse or circle given its center and radii
+- make_textbox: borderless text box (hp:rect + hp:drawText)
+- make_drawing_para: paragraph holding the grouped shapes
+- text_extent: estimated size of a one-line label
+"""
+
+from xml.sax.saxutils import escape
+
+from xml_primitives import IDGen, STYLE
+
+# Line widths in HWPUNIT (the steps offered in Hangul's line dialog)
+LINE_THIN = 28      # 0.1 mm
+LINE_NORMAL = 34    # 0.12 mm
+LINE_THICK = 57     # 0.2 mm
+LINE_HEAVY = 113    # 0.4 mm
+
+_IDENTITY = 'e1="1" e2="0" e3="0" e4="0" e5="1" e6="0"'
+
+
+# ---------------------------------------------------------------------------
+# Shared shape parts
+# ---------------------------------------------------------------------------
+
+def _line_shape(width: int, style: str, color: str = "#000000",
+                arrow: bool = False) -> str:
+    tail = "ARROW" if arrow else "NORMAL"
+    return (
+        f'<hp:lineShape color="{color}" width="{width}" style="{style}" '
+        f'endCap="FLAT" headStyle="NORMAL" tailStyle="{tail}" headfill="1" '
+        f'tailfill="1" headSz="SMALL_SMALL" tailSz="SMALL_SMALL" '
+        f'outlineStyle="NORMAL" alpha="0"/>'
+    )
+
+
+def _fill_brush(fill: str | None) -> str:
+    if fill is None:
+        return ""
+    return (
+        f'<hc:fillBrush>'
+        f'<hc:winBrush faceColor="{fill}" hatchColor="#FFFFFF" alpha="0"/>'
+        f'</hc:fillBrush>'
+    )
+
+
+_SHADOW = '<hp:shadow type="NONE" color="#B2B2B2" offsetX="0" offsetY="0" alpha="0"/>'
+
+
+def _member(idgen: IDGen, tag: str, attrs: str, x: int, y: int,
+            width: int, height: int, body: str) -> str:
+    """Wrap shape-specific XML in the envelope shared by group members.
+
+    A group member is placed by its offset (mirrored in transMatrix) and
+    carries no sz/pos/outMargin of its own — the container does.
+    """
+    inst_id = idgen.next()
+    width, height = max(width, 1), max(height, 1)
+    return (
+        f'<hp:{tag} id="0" zOrder="0" numberingType="NONE" '
+        f'textWrap="TOP_AND_BOTTOM" textFlow="BOTH_SIDES" lock="0" '
+        f'dropcapstyle="None" href="" groupLevel="1" instid="{inst_id}"{attrs}>'
+        f'<hp:offset x="{x}" y="{y}"/>'
+        f'<hp:orgSz width="{width}" height="{height}"/>'
+        f'<hp:curSz width="{width}" height="{height}"/>'
+        f'<hp:flip horizontal="0" vertical="0"/>'
+        f'<hp:rotationInfo angle="0" centerX="{width // 2}" '
+        f'centerY="{height // 2}" rotateimage="1"/>'
+        f'<hp:renderingInfo>'
+        f'<hc:transMatrix e1="1" e2="0" e3="{x}" e4="0" e5="1" e6="{y}"/>'
+        f'<hc:scaMatrix {_IDENTITY}/>'
+        f'<hc:rotMatrix {_IDENTITY}/>'
+        f'</hp:renderingInfo>'
+        f'{body}'
+        f'</hp:{tag}>'
+    )
+
+
+def _bbox(points) -> tuple[int, int, int, int]:
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+# ---------------------------------------------------------------------------
+# Shapes
+# ---------------------------------------------------------------------------
+
+def make_line(idgen: IDGen, p1: tuple[int, int], p2: tuple[int, int],
+              width: int = LINE_NORMAL, style: str = "SOLID",
+              color: str = "#000000", arrow: bool = False) -> str:
+    """Segment from *p1* to *p2*; *arrow* puts an arrow head at *p2*.
+
+    *style* is an OWPML line type: SOLID, DASH, DOT, ...
+    """
+    x0, y0, x1, y1 = _bbox((p1, p2))
+    body = (
+        _line_shape(width, style, color, arrow) + _SHADOW +
+        f'<hc:startPt x="{p1[0] - x0}" y="{p1[1] - y0}"/>'
+        f'<hc:endPt x="{p2[0] - x0}" y="{p2[1] - y0}"/>'
+    )
+    return _member(idgen, "line", ' isReverseHV="0"', x0, y0, x1 - x0, y1 - y0, body)
+
+
+def make_polygon(idgen: IDGen, points: list[tuple[int, int]],
+                 width: int = LINE_NORMAL, style: str = "SOLID",
+                 color: str = "#000000", fill: str | None = None,
+                 closed: bool = True) -> str:
+    """Polygon through *points*; with closed=False an open polyline.
+
+    Hangul closes a polygon only when the last point repeats the first.
+    """
+    points = list(points)
+    if closed and points[0] != points[-1]:
+        points.append(points[0])
+    x0, y0, x1, y1 = _bbox(points)
+    body = (
+        _line_shape(width, style, color) + _fill_brush(fill) + _SHADOW +
+        "".join(f'<hc:pt x="{x - x0}" y="{y - y0}"/>' for x, y in points)
+    )
+    return _member(idgen, "polygon", "", x0, y0, x1 - x0, y1 - y0, body)
+
+
+def make_ellipse(idgen: IDGen, center: tuple[int, int], rx: int, ry: int,
+                 width: int = LINE_NORMAL, style: str = "SOLID",
+                 color: str = "#000000", fill: str | None = None) -> str:
+    """Ellipse with semi-axes *rx*, *ry* around *center*."""
+    w, h = max(2 * rx, 1), max(2 * ry, 1)
+    cx, cy = w // 2, h // 2
+    body = (
+        _line_shape(width, style, color) + _fill_brush(fill) + _SHADOW +
+        f'<hc:center x="{cx}" y="{cy}"/>'
+        f'<hc:ax1 x="{w}" y="{cy}"/>'
+        f'<hc:ax2 x="{cx}" y="{h}"/>'
+        f'<hc:start1 x="{w}" y="{cy}"/>'
+        f'<hc:end1 x="{w}" y="{cy}"/>'
+        f'<hc:start2 x="{w}" y="{cy}"/>'
+        f'<hc:end2 x="{w}" y="{cy}"/>'
+    )
+    attrs = ' intervalDirty="0" hasArcPr="0" arcType="NORMAL"'
+    return _member(idgen, "ellipse", attrs, center[0] - rx, center[1] - ry, w, h, body)
+
+
+def make_textbox(idgen: IDGen, x: int, y: int, width: int, height: int,
+                 text: str, char_pr: int = STYLE["CHAR_FIG_LABEL"],
+                 para_pr: int = STYLE["PARA_FIG_LABEL"]) -> str:
+    """Borderless, unfilled box at (x, y) with one centred line of *text*."""
+    pid = idgen.next()
+    body = (
+        _line_shape(0, "NONE") + _SHADOW +
+        f'<hp:drawText lastWidth="{width}" name="" editable="0">'
+        f'<hp:subList id="" textDirection="HORIZONTAL" lineWrap="BREAK" '
+        f'vertAlign="CENTER" linkListIDRef="0" linkListNextIDRef="0" '
+        f'textWidth="0" textHeight="0" hasTextRef="0" hasNumRef="0">'
+        f'<hp:p id="{pid}" paraPrIDRef="{para_pr}" styleIDRef="0" '
+        f'pageBreak="0" columnBreak="0" merged="0">'
+        f'<hp:run charPrIDRef="{char_pr}"><hp:t>{escape(text)}</hp:t></hp:run>'
+        f'</hp:p>'
+        f'</hp:subList>'
+        f'<hp:textMargin left="0" right="0" top="0" bottom="0"/>'
+        f'</hp:drawText>'
+        f'<hc:pt0 x="0" y="0"/>'
+        f'<hc:pt1 x="{width}" y="0"/>'
+        f'<hc:pt2 x="{width}" y="{height}"/>'
+        f'<hc:pt3 x="0" y="{height}"/>'
+    )
+    return _member(idgen, "rect", ' ratio="0"', x, y, width, height, body)
+
+
+def text_extent(text: str, char_height: int) -> tuple[int, int]:
+    """Approximate (width, height) in HWPUNIT of *text* set at *char_height*.
+
+    Hangul and other wide characters take a full em, Latin letters and
+    digits about 0.6 of one.
+    """
+    ems = sum(1.0 if ord(ch) > 0x2E7F else 0.6 for ch in text)
+    return int(ems * char_height) + char_height // 4, int(char_height * 1.3)
+
+
+# ---------------------------------------------------------------------------
+# Group paragraph
+# ---------------------------------------------------------------------------
+
+def make_drawing_para(idgen: IDGen, members: list[str],
+                      width_hu: int, height_hu: int,
+                      para_pr: int = STYLE["PARA_EQ"], char_pr: int = 0) -> str:
+    """Paragraph with *members* grouped in one inline width × height container."""
+    pid = idgen.next()
+    grp_id = idgen.next()
+    inst_id = idgen.next()
+    return (
+        f'<hp:p id="{pid}" paraPrIDRef="{para_pr}" styleIDRef="0" '
+        f'pageBreak="0" columnBreak="0" merged="0">'
+        f'<hp:run charPrIDRef="{char_pr}">'
+        f'<hp:container id="{grp_id}" zOrder="0" numberingType="PICTURE" '
+        f'textWrap="TOP_AND_BOTTOM" textFlow="BOTH_SIDES" lock="0" '
+        f'dropcapstyle="None" href="" groupLevel="0" instid="{inst_id}">'
+        f'<hp:offset x="0" y="0"/>'
+        f'<hp:orgSz width="{width_hu}" height="{height_hu}"/>'
+        f'<hp:curSz width="{width_hu}" height="{height_hu}"/>'
+        f'<hp:flip horizontal="0" vertical="0"/>'
+        f'<hp:rotationInfo angle="0" centerX="{width_hu // 2}" '
+        f'centerY="{height_hu // 2}" rotateimage="1"/>'
+        f'<hp:renderingInfo>'
+        f'<hc:transMatrix {_IDENTITY}/>'
+        f'<hc:scaMatrix {_IDENTITY}/>'
+        f'<hc:rotMatrix {_IDENTITY}/>'
+        f'</hp:renderingInfo>'
+        + "".join(members) +
+        f'<hp:sz width="{width_hu}" widthRelTo="ABSOLUTE" '
+        f'height="{height_hu}" heightRelTo="ABSOLUTE" protect="0"/>'
+        f'<hp:pos treatAsChar="1" affectLSpacing="0" flowWithText="1" '
+        f'allowOverlap="0" holdAnchorAndSO="0" '
+        f'vertRelTo="PARA" horzRelTo="COLUMN" '
+        f'vertAlign="TOP" horzAlign="LEFT" vertOffset="0" horzOffset="0"/>'
+        f'<hp:outMargin left="0" right="0" top="0" bottom="0"/>'
+        f'</hp:container>'
+        f'<hp:t/>'
+        f'</hp:run>'
+        f'</hp:p>'
+    )
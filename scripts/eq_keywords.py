@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Keywords and tokenizer of the Hancom equation script language.
+
+page_layout sizes equation scripts, eq_lint checks them and near_dup
+normalizes them; all three split a script with TOKEN_RE and look words
+up in the same keyword sets, so the sets live here. They follow the
+command list of Hangul's equation editor: each set groups keywords by
+how they lay out (structure only, scripts, big operators, stacks, single
+glyphs, accents), and KEYWORDS is every word Hangul treats as a command
+rather than as italic letters. Capital Greek letters are the upper-case
+names (GAMMA is Γ, gamma is γ); KEYWORDS_LOWER is the set to test a
+lowercased word against.
+
+Provides:
+- TOKEN_RE: splits a script into quoted text, words, numbers and symbols
+- SILENT, SCRIPTS, BIG_OPS, STACKS, SYMBOLS, ACCENTS, FUNCTIONS,
+  DELIMITERS: keyword groups by layout
+- KEYWORDS, KEYWORDS_LOWER: every keyword (as written / lowercased)
+"""
+
+import re
+
+TOKEN_RE = re.compile(r'"[^"]*"|[A-Za-z]+|\d+(?:\.\d+)?|\+-|-+>|<->|<=|>=|\S')
+
+# Keywords that only structure the equation and draw nothing themselves
+SILENT = {"rm", "it", "bold", "rmbold", "left", "right", "of", "from", "to"}
+SCRIPTS = {"^", "_", "SUP", "SUB", "sup", "sub"}
+BIG_OPS = {"int", "dint", "tint", "oint", "odint", "otint", "sum", "prod", "coprod",
+           "lim", "Lim", "bigcup", "bigcap", "bigsqcup", "biguplus", "bigoplus",
+           "bigominus", "bigotimes", "bigodot", "bigoslash", "bigvee", "bigwedge"}
+STACKS = {"matrix", "pmatrix", "bmatrix", "dmatrix", "cases", "pile",
+          "eqalign"}
+# Keywords drawn as one glyph
+SYMBOLS = {
+    # operators
+    "times", "div", "pm", "mp", "cdot", "circ", "bullet", "star", "ast",
+    "oplus", "ominus", "otimes", "oslash", "odot", "cup", "cap", "sqcup",
+    "sqcap", "uplus", "vee", "wedge", "lnot", "dagger", "ddagger",
+    # relations
+    "le", "leq", "ge", "geq", "ne", "approx", "equiv", "sim", "simeq", "cong",
+    "propto", "asymp", "doteq", "ll", "gg", "prec", "succ", "subset", "supset",
+    "subseteq", "supseteq", "sqsubset", "sqsupset", "sqsubseteq", "sqsupseteq",
+    "in", "ni", "owns", "notin", "perp", "vdash", "dashv", "models", "top",
+    "bot",
+    # arrows
+    "rarrow", "larrow", "lrarrow", "uparrow", "downarrow", "udarrow", "RARROW",
+    "LARROW", "LRARROW", "UPARROW", "DOWNARROW", "UDARROW", "nearrow",
+    "nwarrow", "searrow", "swarrow", "mapsto", "hookleft", "hookright",
+    # other symbols
+    "cdots", "ldots", "vdots", "ddots", "inf", "partial", "nabla", "therefore",
+    "because", "forall", "exist", "emptyset", "deg", "prime", "smallint",
+    "angle", "triangle", "diamond", "aleph", "hbar", "imath", "jmath", "ell",
+    "wp",
+    # Greek
+    "alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta",
+    "iota", "kappa", "lambda", "mu", "nu", "xi", "omicron", "pi", "rho",
+    "sigma", "tau", "upsilon", "phi", "chi", "psi", "omega", "vartheta",
+    "varphi", "varepsilon", "varpi", "varsigma",
+    "ALPHA", "BETA", "GAMMA", "DELTA", "EPSILON", "ZETA", "ETA", "THETA",
+    "IOTA", "KAPPA", "LAMBDA", "MU", "NU", "XI", "OMICRON", "PI", "RHO",
+    "SIGMA", "TAU", "UPSILON", "PHI", "CHI", "PSI", "OMEGA",
+}
+ACCENTS = {"hat", "tilde", "vec", "bar", "under", "dot", "ddot", "acute",
+           "grave", "check", "dyad", "arch"}
+FUNCTIONS = {"sin", "cos", "tan", "cot", "sec", "csc", "arcsin", "arccos", "arctan",
+             "sinh", "cosh", "tanh", "coth", "log", "ln", "lg", "exp", "det", "mod",
+             "gcd", "lcm", "max", "min", "arg", "dim", "ker", "hom"}
+# What may follow left/right
+DELIMITERS = {"(", ")", "[", "]", "|", "||", ".", "<", ">", "/", "lbrace", "rbrace",
+              "lbrack", "rbrack", "langle", "rangle", "lceil", "rceil", "lfloor",
+              "rfloor"}
+
+KEYWORDS = ({"sqrt", "root", "over", "atop", "REL", "BUILDREL", "LADDER", "dxdy",
+             "dxdydz"}
+            | {d for d in DELIMITERS if d.isalpha()}
+            | SILENT | SCRIPTS | BIG_OPS | STACKS | SYMBOLS | ACCENTS | FUNCTIONS)
+KEYWORDS_LOWER = {k.lower() for k in KEYWORDS}
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Lint Hancom equation scripts before a build.
+
+A broken script (an unclosed brace, "root 3 {x}" without "of", a LaTeX
+"\\frac") is written into the HWPX unchanged and only shows up when the
+paper is opened in Hangul. lint_file() checks every equation of a problem
+file in one streaming pass before anything is rendered: the "equation"
+of each problem, each sub-problem equation and each "$...$" choice.
+
+Scripts are tokenized like page_layout.equation_size does, with the
+keyword sets of eq_keywords, grouped at braces, and each group is checked:
+
+- errors (the build stops): unbalanced braces or left/right, unterminated
+  "quoted text", a structure keyword without its operand (over, sqrt,
+  root ... of, ^/_, accents, matrix/cases {...}), LaTeX commands and "$"
+- warnings: words that are not keywords but look like a misspelled one
+  ("sqr", "thetta"), which Hangul would set as italic letters
+
+Results are memoized per unique script, so a bank that repeats the same
+choices or sub-problems lints each of them once.
+
+Provides:
+- Issue: (severity, column, message) of one finding in a script
+- lint_script: issues of one script (cached)
+- lint_problem: (location, issue) pairs of one problem
+- lint_problems: (location, issue) pairs of any problem iterable
+- lint_file: (location, issue) pairs of a whole .json/.jsonl problem file
+
+Usage:
+    python eq_lint.py problems.json bank.jsonl
+"""
+
+import argparse
+import difflib
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+from eq_keywords import ACCENTS, DELIMITERS, KEYWORDS_LOWER, SCRIPTS, STACKS
+
+# eq_keywords.TOKEN_RE, plus a lone '"' (unterminated text) and "\name"
+_TOKEN_RE = re.compile(r'"[^"]*"|\\[A-Za-z]*|[A-Za-z]+|\d+(?:\.\d+)?|\+-|-+>|<->|<=|>=|\S')
+
+_OPERAND_KEYWORDS = {"sqrt"} | ACCENTS | {"from", "to"}
+_BINARY = {"over", "atop"}
+# Keywords _check_group has a rule for (all others are skipped at once)
+_CHECKED = ({"root", "left", "right"} | _BINARY | {s.lower() for s in SCRIPTS}
+            | _OPERAND_KEYWORDS | STACKS)
+_LATEX = {"frac": "a over b", "dfrac": "a over b", "sqrt": "sqrt {x}", "infty": "inf",
+          "neq": "!= or ne", "cdot": "cdot", "left": "left (", "right": "right )",
+          "text": '"quoted text"', "mathrm": "rm", "le": "le", "ge": "ge"}
+
+
+class Issue(NamedTuple):
+    severity: str  # "error" or "warning"
+    column: int    # 1-based position in the script
+    message: str
+
+
+class _Group(list):
+    """Token indices (and nested groups) between a pair of braces; at is the "{"."""
+
+    def __init__(self, at: int):
+        super().__init__()
+        self.at = at
+
+
+def _nest(tokens: list[str]) -> tuple[_Group, list[tuple]]:
+    """Group token indices at braces; returns (root, brace errors as (index, severity, message))."""
+    errors = []
+    root = _Group(0)
+    stack = [root]
+    for i, tok in enumerate(tokens):
+        if tok == "{":
+            group = _Group(i)
+            stack[-1].append(group)
+            stack.append(group)
+        elif tok == "}":
+            if len(stack) == 1:
+                errors.append((i, "error", "unmatched '}'"))
+            else:
+                stack.pop()
+        else:
+            stack[-1].append(i)
+    for group in stack[1:]:
+        errors.append((group.at, "error", "'{' is never closed"))
+    return root, errors
+
+
+def _check_group(items: list, tokens: list[str], found: list[tuple]) -> None:
+    """Append (token index, severity, message) for problems in one brace group."""
+    n = len(items)
+    open_left = []  # token indices of "left" waiting for "right"
+
+    def word(j: int) -> str | None:
+        return tokens[items[j]] if j < n and not isinstance(items[j], _Group) else None
+
+    def operand(j: int, what: str, at: int) -> None:
+        nxt = word(j)
+        if j >= n or nxt in _BINARY or nxt in ("#", "&"):
+            found.append((at, "error", f"'{what}' expects an operand after it"))
+
+    for i, item in enumerate(items):
+        if isinstance(item, _Group):
+            _check_group(item, tokens, found)
+            continue
+        tok = tokens[item]
+        low = tok.lower()
+        if low not in _CHECKED and tok[0] not in '\\$"' and (
+                len(tok) < 3 or not tok[0].isalpha() or low in KEYWORDS_LOWER):
+            continue  # the common case: a name, number, operator or plain keyword
+        if tok.startswith("\\"):
+            name = tok[1:]
+            hint = f" (Hancom script: {_LATEX[name]})" if name in _LATEX else ""
+            found.append((item, "error", f"LaTeX command '{tok}' in equation script{hint}"))
+        elif tok == "$":
+            found.append((item, "error", "'$' inside an equation (only a choice is "
+                                         "wrapped in $...$)"))
+        elif tok == '"':
+            found.append((item, "error", "unterminated quoted text"))
+        elif low in _BINARY:
+            if i == 0 or word(i - 1) in _BINARY:
+                found.append((item, "error", f"'{tok}' has nothing on its left"))
+            operand(i + 1, tok, item)
+        elif tok in SCRIPTS:
+            operand(i + 1, tok, item)
+        elif low in _OPERAND_KEYWORDS:
+            operand(i + 1, tok, item)
+        elif low == "root":
+            if (word(i + 2) or "").lower() != "of":
+                found.append((item, "error", "'root' expects 'root n of {x}'"))
+            else:
+                operand(i + 3, "root ... of", item)
+        elif low in STACKS:
+            if i + 1 >= n or not isinstance(items[i + 1], _Group):
+                found.append((item, "error", f"'{tok}' expects {{...}} after it"))
+        elif low in ("left", "right"):
+            nxt = word(i + 1)
+            if nxt is None or (nxt not in DELIMITERS and nxt.lower() not in DELIMITERS):
+                found.append((item, "error", f"'{tok}' expects a delimiter such as "
+                                             "( [ | lbrace after it"))
+            if low == "left":
+                open_left.append(item)
+            elif open_left:
+                open_left.pop()
+            else:
+                found.append((item, "error", "'right' without a matching 'left' "
+                                             "in the same group"))
+        elif tok[0].isalpha() and len(tok) >= 3 and low not in KEYWORDS_LOWER:
+            close = difflib.get_close_matches(low, KEYWORDS_LOWER, n=1, cutoff=0.8)
+            if close:
+                found.append((item, "warning", f"unknown word '{tok}' (did you mean "
+                                               f"'{close[0]}'?)"))
+    for item in open_left:
+        found.append((item, "error", "'left' without a matching 'right' in the same group"))
+
+
+@lru_cache(maxsize=65536)
+def lint_script(script: str) -> tuple[Issue, ...]:
+    """Issues of one Hancom equation script, ordered by column."""
+    tokens = _TOKEN_RE.findall(script)
+    root, found = _nest(tokens)
+    _check_group(root, tokens, found)
+    if not found:
+        return ()
+    # Columns are only worked out for scripts that have something to report
+    columns = [m.start() + 1 for m in _TOKEN_RE.finditer(script)]
+    return tuple(sorted(Issue(severity, columns[at], message)
+                        for at, severity, message in found))
+
+
+def _problem_scripts(prob: dict):
+    """(field, script) of every equation in a problem."""
+    if prob.get("equation"):
+        yield "equation", prob["equation"]
+    for j, sub in enumerate(prob.get("sub_problems", []), 1):
+        if sub.get("equation"):
+            yield f"sub-problem {j} equation", sub["equation"]
+    for k, choice in enumerate(prob.get("choices", []), 1):
+        if choice.startswith("$") and choice.endswith("$"):
+            yield f"choice {k}", choice[1:-1]
+
+
+def lint_problem(prob: dict, prob_num: int) -> list[tuple[str, Issue]]:
+    """(location, issue) pairs for every equation of problem *prob_num*."""
+    return [(f"problem {prob_num}, {field}", issue)
+            for field, script in _problem_scripts(prob)
+            for issue in lint_script(script)]
+
+
+def lint_problems(problems) -> list[tuple[str, Issue]]:
+    """Lint problems in order (numbered from 1) as they are iterated."""
+    found = []
+    for prob_num, prob in enumerate(problems, 1):
+        found += lint_problem(prob, prob_num)
+    return found
+
+
+def lint_file(path: Path) -> list[tuple[str, Issue]]:
+    """Lint every problem of a .json/.jsonl file, reading it incrementally."""
+    from problem_io import load_problems
+
+    _, problems = load_problems(path)
+    return lint_problems(problems)
+
+
+def format_issue(location: str, issue: Issue) -> str:
+    return f"{location}, col {issue.column}: {issue.severity}: {issue.message}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Lint Hancom equation scripts in problem files")
+    parser.add_argument("files", nargs="+", type=Path, help="JSON or JSONL problem files")
+    parser.add_argument("--errors-only", action="store_true", help="Do not print warnings")
+    args = parser.parse_args()
+
+    errors = warnings = 0
+    for path in args.files:
+        if not path.is_file():
+            raise SystemExit(f"Problems file not found: {path}")
+        for location, issue in lint_file(path):
+            if issue.severity == "error":
+                errors += 1
+            else:
+                warnings += 1
+                if args.errors_only:
+                    continue
+            print(f"{path}: {format_issue(location, issue)}")
+    info = lint_script.cache_info()
+    print(f"{errors} error(s), {warnings} warning(s); {info.misses} unique scripts "
+          f"of {info.hits + info.misses}", file=sys.stderr)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
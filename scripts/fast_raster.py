@@ -0,0 +1,758 @@
+#!/usr/bin/env python3
+"""Fast PNG renderer for simple function graphs, without matplotlib.
+
+For FAST_TYPES (polynomial, quadratic, trig, exp_log, rational,
+number_line) the picture is exam-style axes, a few black curves, dots
+and tick labels, yet a matplotlib render pays for the import, a figure
+and a full draw. This module lays out the same picture the way
+graph_generator's matplotlib code does (default subplot box, AutoLocator
+ticks, ScalarFormatter labels, marker and tick sizes, tight bounding
+box) and draws it with Pillow:
+
+- lines and markers on a SUPERSAMPLE× grayscale canvas, box-filtered
+  down for anti-aliasing
+- text from glyph bitmaps rendered once per (font, size, string) and
+  cached; $...$ labels use matplotlib's Computer Modern fonts for the
+  small subset of mathtext exam graphs use: digits, letters, + − = , .
+  / ( ), \\pi, \\frac and spacing commands
+
+A spec that needs anything else (a label with superscripts, "exact"
+render mode, a custom figsize, ...) is not drawn here: render_png
+returns None and the caller renders with matplotlib.
+
+Provides:
+- supports: whether every feature of a spec can be drawn here
+- render_png: PNG bytes of a spec, or None to fall back to matplotlib
+"""
+
+import math
+import re
+import struct
+import zlib
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from curve_engine import adaptive_sample
+from font_cache import cached_fonts, matplotlib_font_dir
+from graph_sizing import DEFAULT_FIGSIZE, DEFAULT_FIGSIZES, FAST_TYPES, render_mode
+
+DPI = 300
+SUPERSAMPLE = 3
+PAD_PX = 0.05 * DPI            # bbox_inches="tight", pad_inches=0.05
+TEXT_MARGIN_PX = 200           # room for labels outside the figure box
+SUBPLOT = (0.125, 0.11, 0.9, 0.88)  # matplotlib's default left, bottom, right, top
+
+# matplotlib rc defaults the exam style relies on, in points
+_DASH_PATTERNS = {"-": None, "--": (3.7, 1.6), ":": (1.0, 1.65)}  # × line width
+_MARKER_EDGE = 1.0
+_TICK_PAD = 3.5
+_FRAC_SHRINK = 0.7             # mathtext SHRINK_FACTOR for \frac in text style
+
+
+class _Unsupported(Exception):
+    """The spec uses something only matplotlib draws."""
+
+
+def _px(points: float) -> float:
+    return points * DPI / 72
+
+
+# ---------------------------------------------------------------------------
+# Fonts and glyph cache
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _font_files() -> dict:
+    """Font file per role, matching what exam_rc() makes matplotlib use."""
+    fonts = cached_fonts()
+    mpl_dir = matplotlib_font_dir()
+    return {
+        "text": fonts["korean_path"] or str(mpl_dir / "DejaVuSans.ttf"),
+        "italic": str(mpl_dir / "DejaVuSans-Oblique.ttf"),
+        # Computer Modern (BaKoMa) fonts; None unless mathtext uses "cm"
+        **({"rm": str(mpl_dir / "cmr10.ttf"), "mi": str(mpl_dir / "cmmi10.ttf"),
+            "sy": str(mpl_dir / "cmsy10.ttf")} if fonts["math_fontset"] == "cm" else {}),
+    }
+
+
+@lru_cache(maxsize=None)
+def _typo_metrics(path: str) -> tuple[float, float]:
+    """(ascender, descender) per em from the OS/2 table, as matplotlib uses."""
+    with open(path, "rb") as f:
+        data = f.read()
+    base = struct.unpack(">I", data[12:16])[0] if data[:4] == b"ttcf" else 0
+    num_tables = struct.unpack(">H", data[base + 4:base + 6])[0]
+    tables = {}
+    for i in range(num_tables):
+        rec = base + 12 + 16 * i
+        tag, _, offset, _ = struct.unpack(">4sIII", data[rec:rec + 16])
+        tables[tag] = offset
+    units = struct.unpack(">H", data[tables[b"head"] + 18:tables[b"head"] + 20])[0]
+    if b"OS/2" in tables:
+        asc, desc = struct.unpack(">hh", data[tables[b"OS/2"] + 68:tables[b"OS/2"] + 72])
+    else:
+        asc, desc = struct.unpack(">hh", data[tables[b"hhea"] + 4:tables[b"hhea"] + 8])
+    return asc / units, -desc / units
+
+
+@lru_cache(maxsize=64)
+def _font(path: str, size_px: float) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(path, size_px)
+
+
+@lru_cache(maxsize=4096)
+def _glyphs(path: str, size_px: float, text: str):
+    """Prerendered bitmap of *text*: (mask, left, top, bottom, advance).
+
+    left/top/bottom place the mask relative to the pen position on the
+    baseline (y grows downwards).
+    """
+    font = _font(path, size_px)
+    left, top, right, bottom = font.getbbox(text, anchor="ls")
+    mask = Image.new("L", (max(right - left, 1), max(bottom - top, 1)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font, anchor="ls")
+    return mask, left, top, bottom, font.getlength(text)
+
+
+class _Label:
+    """Laid-out text: glyph runs and rules relative to its baseline origin."""
+
+    def __init__(self):
+        self.runs = []       # (path, size_px, text, dx, dy)
+        self.rules = []      # (x0, y0, x1, y1), y down
+        self.width = 0.0
+        self.ascent = 0.0
+        self.descent = 0.0
+
+    def add_run(self, path, size_px, text, dx=0.0, dy=0.0):
+        _, _, top, bottom, advance = _glyphs(path, size_px, text)
+        self.runs.append((path, size_px, text, dx, dy))
+        self.ascent = max(self.ascent, -dy - top)
+        self.descent = max(self.descent, bottom + dy)
+        return advance
+
+    def add(self, other, dx, dy):
+        for path, size_px, text, x, y in other.runs:
+            self.runs.append((path, size_px, text, x + dx, y + dy))
+        for x0, y0, x1, y1 in other.rules:
+            self.rules.append((x0 + dx, y0 + dy, x1 + dx, y1 + dy))
+        self.ascent = max(self.ascent, other.ascent - dy)
+        self.descent = max(self.descent, other.descent + dy)
+
+
+def _text_label(text: str, size_pt: float, italic: bool = False) -> _Label:
+    """Lay out *text* like matplotlib's Text: plain, or $...$ mathtext."""
+    size_px = _px(size_pt)
+    if text.count("$") == 2 and text.startswith("$") and text.endswith("$"):
+        label = _math_label(text[1:-1], size_px)
+    elif "$" in text:
+        raise _Unsupported(f"mixed text and math: {text!r}")
+    else:
+        label = _Label()
+        label.width = label.add_run(_font_files()["italic" if italic else "text"],
+                                    size_px, text)
+    # Line height is at least the text font's typographic ascent/descent
+    asc, desc = _typo_metrics(_font_files()["text"])
+    label.ascent = max(label.ascent, asc * size_px)
+    label.descent = max(label.descent, desc * size_px)
+    return label
+
+
+# ---------------------------------------------------------------------------
+# Mathtext subset (Computer Modern)
+# ---------------------------------------------------------------------------
+
+_MATH_TOKEN = re.compile(r"\\frac|\\pi|\\[,:; ]|\\.?|[{}]|\s|.")
+_MATH_SPACES = {r"\,": 0.16667, r"\:": 0.22222, r"\;": 0.27778, r"\ ": 0.33333}
+_MATH_GLYPHS = {  # token → (font role, character in the BaKoMa font)
+    **{c: ("rm", c) for c in "0123456789()[]=+"},
+    **{c: ("mi", c) for c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"},
+    ",": ("mi", ";"), ".": ("mi", ":"), "/": ("mi", "="),   # BaKoMa cmmi10 slots
+    "-": ("sy", "\xa1"),        # minus sign
+    r"\pi": ("mi", "\xbc"),
+}
+_BINARY = {"+", "-"}
+_RELATION = {"="}
+_OPEN = {"(", "[", "{"}
+
+
+def _math_tokens(tex: str) -> list[str]:
+    tokens = [t for t in _MATH_TOKEN.findall(tex) if not t.isspace()]
+    for tok in tokens:
+        if tok not in _MATH_GLYPHS and tok not in _MATH_SPACES and tok not in (r"\frac", "{", "}"):
+            raise _Unsupported(f"mathtext {tok!r}")
+    return tokens
+
+
+def _math_group(tokens: list[str], pos: int, size_px: float,
+                files: dict) -> tuple[_Label, int]:
+    """Lay out tokens from *pos* up to the matching "}" (or the end)."""
+    label = _Label()
+    x = 0.0
+    prev = "{"  # start of a group: no space before a leading minus sign
+    while pos < len(tokens):
+        tok = tokens[pos]
+        pos += 1
+        if tok == "}":
+            break
+        if tok == "{":
+            inner, pos = _math_group(tokens, pos, size_px, files)
+            label.add(inner, x, 0)
+            x += inner.width
+            prev = "}"
+        elif tok in _MATH_SPACES:
+            x += _MATH_SPACES[tok] * size_px
+        elif tok == r"\frac":
+            if tokens[pos:pos + 1] != ["{"]:
+                raise _Unsupported(r"\frac without braces")
+            num, pos = _math_group(tokens, pos + 1, size_px * _FRAC_SHRINK, files)
+            if tokens[pos:pos + 1] != ["{"]:
+                raise _Unsupported(r"\frac without braces")
+            den, pos = _math_group(tokens, pos + 1, size_px * _FRAC_SHRINK, files)
+            x += _frac(label, num, den, x, size_px, files)
+            prev = "}"
+        else:
+            role, char = _MATH_GLYPHS[tok]
+            # Binary operators after "{", an opening delimiter or a relation
+            # are signs and stay unspaced (spaces do not count as "after")
+            spaced = tok in _RELATION or (tok in _BINARY and prev not in _OPEN | _RELATION)
+            if spaced:
+                x += 0.2 * size_px
+            x += label.add_run(files[role], size_px, char, x)
+            nxt = tokens[pos] if pos < len(tokens) else ""
+            if spaced or tok == "," or (tok == "." and not (prev.isdigit() and nxt.isdigit())):
+                x += 0.2 * size_px
+            prev = tok
+    label.width = x
+    return label, pos
+
+
+def _frac(label: _Label, num: _Label, den: _Label, x: float, size_px: float,
+          files: dict) -> float:
+    """Add a fraction at *x*; return its advance (bar plus trailing space)."""
+    thickness = 0.75 / 12 * size_px   # TruetypeFonts.get_underline_thickness
+    _, _, top, bottom, _ = _glyphs(files["rm"], size_px, "=")
+    axis = -(top + bottom) / 2          # math axis: middle of "=", up
+    width = max(num.width, den.width)
+    label.add(num, x + (width - num.width) / 2, -(axis + 2.5 * thickness + num.descent))
+    label.add(den, x + (width - den.width) / 2, -(axis - 2.5 * thickness - den.ascent))
+    label.rules.append((x, -(axis + thickness / 2), x + width, -(axis - thickness / 2)))
+    label.ascent = max(label.ascent, axis + thickness / 2)
+    return width + 2 * thickness
+
+
+def _math_label(tex: str, size_px: float) -> _Label:
+    files = _font_files()
+    if "rm" not in files:
+        raise _Unsupported("mathtext fontset other than cm")
+    label, _ = _math_group(_math_tokens(tex), 0, size_px, files)
+    return label
+
+
+# ---------------------------------------------------------------------------
+# Ticks (AutoLocator + ScalarFormatter)
+# ---------------------------------------------------------------------------
+
+_STEPS = np.array([0.1, 0.2, 0.25, 0.5, 1, 2, 2.5, 5, 10, 20])
+
+
+def _edge_floor(x: float, step: float) -> float:
+    d, m = divmod(x, step)
+    return d + 1 if abs(m / step - 1) < 1e-10 else d
+
+
+def _edge_ceil(x: float, step: float) -> float:
+    d, m = divmod(x, step)
+    return d if abs(m / step) < 1e-10 else d + 1
+
+
+def _auto_ticks(vmin: float, vmax: float, nbins: int) -> np.ndarray:
+    """The tick locations matplotlib's MaxNLocator picks for [vmin, vmax]."""
+    dv = vmax - vmin
+    if dv <= 0 or abs((vmax + vmin) / 2) / dv >= 100:
+        raise _Unsupported("degenerate or offset axis range")
+    steps = _STEPS * 10 ** (math.log10(dv / nbins) // 1)
+    istep = np.nonzero(steps >= dv / nbins)[0][0]
+    for step in steps[:istep + 1][::-1]:
+        best_vmin = (vmin // step) * step
+        low = _edge_floor(vmin - best_vmin, step)
+        high = _edge_ceil(vmax - best_vmin, step)
+        ticks = np.arange(low, high + 1) * step + best_vmin
+        if ((ticks <= vmax) & (ticks >= vmin)).sum() >= 2:
+            break
+    return ticks
+
+
+def _nbins(length_px: float, label_pt: float, per_label: int) -> int:
+    """MaxNLocator "auto" bins: axis length over label size × per_label."""
+    return max(min(int(length_px * 72 / DPI // (label_pt * per_label)), 9), 1)
+
+
+def _tick_format(locs) -> str:
+    """ScalarFormatter's "%1.Nf" for *locs* (no offset, no scientific)."""
+    locs = np.asarray(locs, dtype=float)
+    if len(locs) == 0:
+        return "%1.0f"
+    if np.abs(locs).max() >= 1e5 or (np.abs(locs[locs != 0]).min(initial=1) < 1e-4):
+        raise _Unsupported("tick labels in scientific notation")
+    loc_range = np.ptp(locs) or abs(locs[0]) or 1
+    oom = math.floor(math.log10(loc_range))
+    sigfigs = max(0, 3 - oom)
+    thresh = 1e-3 * 10 ** oom
+    while sigfigs >= 0:
+        if np.abs(locs - np.round(locs, decimals=sigfigs)).max() < thresh:
+            sigfigs -= 1
+        else:
+            break
+    return f"%1.{sigfigs + 1}f"
+
+
+# ---------------------------------------------------------------------------
+# Scene: layout in figure pixels, then raster
+# ---------------------------------------------------------------------------
+
+class _Scene:
+    """Drawing commands in figure pixels (y down) for one axes."""
+
+    def __init__(self, figsize):
+        self.width = round(figsize[0] * DPI)
+        self.height = round(figsize[1] * DPI)
+        left, bottom, right, top = SUBPLOT
+        self.box = (left * self.width, (1 - top) * self.height,
+                    right * self.width, (1 - bottom) * self.height)
+        self.xlim = self.ylim = (0.0, 1.0)
+        self.clipped = []    # ("line", ...) drawn inside the axes box only
+        self.shapes = []     # everything else, in drawing order
+        self.overlay = []    # ("dot", ...) drawn over the text (zorder 5)
+        self.texts = []      # (label, x, y) with x, y the baseline origin
+
+    # Coordinates -----------------------------------------------------------
+
+    def x(self, xd):
+        x0, _, x1, _ = self.box
+        return x0 + (np.asarray(xd, dtype=float) - self.xlim[0]) / (self.xlim[1] - self.xlim[0]) * (x1 - x0)
+
+    def y(self, yd):
+        _, y0, _, y1 = self.box
+        return y1 - (np.asarray(yd, dtype=float) - self.ylim[0]) / (self.ylim[1] - self.ylim[0]) * (y1 - y0)
+
+    def ax_x(self, fx):
+        return self.box[0] + fx * (self.box[2] - self.box[0])
+
+    def ax_y(self, fy):
+        return self.box[3] - fy * (self.box[3] - self.box[1])
+
+    # Commands --------------------------------------------------------------
+
+    def line(self, xs, ys, width_pt, style="-", clip=True):
+        """Polyline through pixel coordinates; style is "-", "--" or ":"."""
+        if style not in _DASH_PATTERNS:
+            raise _Unsupported(f"line style {style!r}")
+        pts = np.column_stack([xs, ys])
+        (self.clipped if clip else self.shapes).append(("line", pts, _px(width_pt), style))
+
+    def data_line(self, xd, yd, width_pt, style="-"):
+        self.line(self.x(xd), self.y(yd), width_pt, style)
+
+    def dot(self, x, y, size_pt, hollow=False, edge_pt=_MARKER_EDGE, above_text=False):
+        """Circle marker ("o") of diameter *size_pt* at pixel (x, y)."""
+        shape = ("dot", float(x), float(y), _px(size_pt), _px(edge_pt), hollow)
+        (self.overlay if above_text else self.shapes).append(shape)
+
+    def triangle(self, x, y, size_pt, direction):
+        """Filled triangle marker (">" or "^") centred at pixel (x, y)."""
+        self.shapes.append(("triangle", float(x), float(y), _px(size_pt), direction))
+
+    def text(self, text, x, y, size_pt, ha="left", va="baseline", italic=False):
+        label = _text_label(text, size_pt, italic)
+        x -= {"left": 0, "center": label.width / 2, "right": label.width}[ha]
+        y += {"baseline": 0, "top": label.ascent, "bottom": -label.descent,
+              "center": (label.ascent - label.descent) / 2,
+              "center_baseline": label.ascent / 2}[va]
+        self.texts.append((label, x, y))
+
+    # Raster -----------------------------------------------------------------
+
+    def render(self) -> bytes:
+        ss = SUPERSAMPLE
+        canvas = Image.new("L", (self.width * ss, self.height * ss), 255)
+        if self.clipped:
+            # Drawn first, onto a layer the size of the axes box: clipping
+            x0, y0, x1, y1 = (round(v * ss) for v in self.box)
+            layer = Image.new("L", (x1 - x0, y1 - y0), 255)
+            draw = ImageDraw.Draw(layer)
+            for _, pts, width, style in self.clipped:
+                _draw_line(draw, pts * ss - (x0, y0), width * ss, style)
+            canvas.paste(layer, (x0, y0))
+        draw = ImageDraw.Draw(canvas)
+        for shape in self.shapes:
+            _draw_shape(draw, shape, ss)
+        figure = canvas.reduce(ss)
+
+        m = TEXT_MARGIN_PX
+        out = Image.new("L", (self.width + 2 * m, self.height + 2 * m), 255)
+        out.paste(figure, (m, m))
+        draw = ImageDraw.Draw(out)
+        for label, x, y in self.texts:
+            _draw_label(out, draw, label, x + m, y + m)
+        for shape in self.overlay:
+            _paste_dot(out, shape, m)
+
+        # bbox_inches="tight": ink, text boxes and the axes box, padded
+        boxes = [ImageChops.invert(out).getbbox() or (0, 0, 1, 1),
+                 tuple(v + m for v in self.box)]
+        boxes += [(x + m, y + m - label.ascent, x + m + label.width, y + m + label.descent)
+                  for label, x, y in self.texts]
+        crop = (max(0, math.floor(min(b[0] for b in boxes) - PAD_PX)),
+                max(0, math.floor(min(b[1] for b in boxes) - PAD_PX)),
+                min(out.width, math.ceil(max(b[2] for b in boxes) + PAD_PX)),
+                min(out.height, math.ceil(max(b[3] for b in boxes) + PAD_PX)))
+        return _png(out.crop(crop))
+
+
+def _png(img: Image.Image) -> bytes:
+    """Grayscale PNG with a 300 dpi pHYs chunk, unfiltered, zlib level 1.
+
+    Pillow's encoder tries a filter per row, which costs several times the
+    compression itself on line art that compresses well either way.
+    """
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data)))
+
+    w, h = img.size
+    rows = np.zeros((h, w + 1), dtype=np.uint8)  # filter byte 0 ("none") per row
+    rows[:, 1:] = np.asarray(img)
+    ppm = round(DPI / 0.0254)
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 0, 0, 0, 0))
+            + chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+            + chunk(b"IDAT", zlib.compress(rows.tobytes(), 1))
+            + chunk(b"IEND", b""))
+
+
+def _dash(pts: np.ndarray, on: float, off: float) -> list[np.ndarray]:
+    """The "on" pieces of an on/off dash pattern along polyline *pts*."""
+    lengths = np.hypot(*np.diff(pts, axis=0).T)
+    cum = np.concatenate([[0.0], np.cumsum(lengths)])
+    pieces = []
+    for start in np.arange(0.0, cum[-1], on + off):
+        end = min(start + on, cum[-1])
+        i, j = np.searchsorted(cum, start, "right"), np.searchsorted(cum, end, "left")
+        piece = np.vstack([
+            [np.interp(start, cum, pts[:, 0]), np.interp(start, cum, pts[:, 1])],
+            pts[i:j],
+            [np.interp(end, cum, pts[:, 0]), np.interp(end, cum, pts[:, 1])],
+        ])
+        pieces.append(piece)
+    return pieces
+
+
+def _draw_line(draw: ImageDraw.ImageDraw, pts: np.ndarray, width: float, style: str):
+    pattern = _DASH_PATTERNS[style]
+    pieces = [pts] if pattern is None else _dash(pts, *(p * width for p in pattern))
+    w = max(1, round(width))
+    for piece in pieces:
+        draw.line(piece.ravel().tolist(), fill=0, width=w)
+
+
+def _draw_shape(draw: ImageDraw.ImageDraw, shape: tuple, ss: int):
+    kind = shape[0]
+    if kind == "line":
+        _, pts, width, style = shape
+        _draw_line(draw, pts * ss, width * ss, style)
+    elif kind == "dot":
+        _, x, y, size, edge, hollow = (v * ss if isinstance(v, float) else v for v in shape)
+        r = (size + edge) / 2
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=0)
+        if hollow:
+            r = (size - edge) / 2
+            draw.ellipse((x - r, y - r, x + r, y + r), fill=255)
+    elif kind == "triangle":
+        _, x, y, size, direction = shape
+        x, y, h = x * ss, y * ss, (size + _px(_MARKER_EDGE)) * ss / 2
+        if direction == ">":
+            pts = [(x + h, y), (x - h, y - h), (x - h, y + h)]
+        else:
+            pts = [(x, y - h), (x - h, y + h), (x + h, y + h)]
+        draw.polygon(pts, fill=0)
+
+
+def _paste_dot(img: Image.Image, shape: tuple, offset: float):
+    """Draw a dot onto the final (not supersampled) image via a small tile."""
+    ss = SUPERSAMPLE
+    _, x, y, size, edge, hollow = shape
+    x, y = x + offset, y + offset
+    left, top = math.floor(x - size), math.floor(y - size)
+    n = math.ceil(2 * size) + 2
+    tile = ("dot", x - left, y - top, size, edge, hollow)
+    coverage = Image.new("L", (n * ss, n * ss), 255)
+    _draw_shape(ImageDraw.Draw(coverage), tile[:5] + (False,), ss)
+    ink = Image.new("L", (n * ss, n * ss), 255)
+    _draw_shape(ImageDraw.Draw(ink), tile, ss)
+    img.paste(ink.reduce(ss), (left, top), ImageChops.invert(coverage.reduce(ss)))
+
+
+def _draw_label(img: Image.Image, draw: ImageDraw.ImageDraw, label: _Label, x: float, y: float):
+    for path, size_px, text, dx, dy in label.runs:
+        mask, left, top, _, _ = _glyphs(path, size_px, text)
+        img.paste(0, (round(x + dx + left), round(y + dy + top)), mask)
+    for x0, y0, x1, y1 in label.rules:
+        draw.rectangle((round(x + x0), round(y + y0), round(x + x1) - 1,
+                        max(round(y + y0), round(y + y1) - 1)), fill=0)
+
+
+# ---------------------------------------------------------------------------
+# Graph types (mirroring graph_generator's plotters)
+# ---------------------------------------------------------------------------
+
+def _exam_axes(scene: _Scene, xlim, ylim, xticks=None):
+    """setup_exam_axes: spines through the origin, inward ticks, labels.
+
+    *xticks* [(value, label, size_pt)] replaces the automatic x ticks, as
+    a later set_xticks/set_xticklabels does.
+    """
+    if not (xlim[0] <= 0 <= xlim[1] and ylim[0] <= 0 <= ylim[1]):
+        raise _Unsupported("origin outside the axes")
+    x0, y0, x1, y1 = scene.box
+    ticks = {}
+    for axis, lim, length, per_label in (("x", xlim, x1 - x0, 3), ("y", ylim, y1 - y0, 2)):
+        locs = _auto_ticks(lim[0], lim[1], _nbins(length, 9, per_label))
+        locs = locs[np.abs(locs) > 0.01]
+        ticks[axis] = locs
+        if axis == "x" and xticks:
+            locs = np.concatenate([locs, [t for t, _, _ in xticks]])
+        if len(locs):  # set_ticks widens the view to the outermost tick
+            lim = (min(lim[0], locs.min()), max(lim[1], locs.max()))
+        if axis == "x":
+            scene.xlim = tuple(lim)
+        else:
+            scene.ylim = tuple(lim)
+
+    ox, oy = float(scene.x(0)), float(scene.y(0))
+    scene.line([ox, ox], [y0, y1], 1.0, clip=False)
+    scene.line([x0, x1], [oy, oy], 1.0, clip=False)
+    scene.triangle(x1, oy, 4, ">")
+    scene.triangle(ox, y0, 4, "^")
+    scene.text("x", scene.ax_x(1.02), oy, 11, ha="left", va="center", italic=True)
+    scene.text("y", ox, scene.ax_y(1.02), 11, ha="center", va="bottom", italic=True)
+    scene.text("O", scene.ax_x(-0.08), scene.ax_y(-0.06), 10, ha="center", va="center")
+
+    tick_len, pad = _px(3), _px(_TICK_PAD)
+    if xticks is None:
+        fmt = _tick_format(ticks["x"])
+        xticks = [(t, (fmt % t), 9) for t in ticks["x"]]
+    for t, text, size in xticks:
+        px = float(scene.x(t))
+        if x0 - 0.5 <= px <= x1 + 0.5:
+            scene.line([px, px], [oy, oy - tick_len], 0.7, clip=False)
+            scene.text(text, px, oy + pad, size, ha="center", va="top")
+    fmt = _tick_format(ticks["y"])
+    for t in ticks["y"]:
+        py = float(scene.y(t))
+        if y0 - 0.5 <= py <= y1 + 0.5:
+            scene.line([ox, ox + tick_len], [py, py], 0.7, clip=False)
+            scene.text(fmt % t, ox - pad, py, 9, ha="right", va="center_baseline")
+
+
+def _function(scene: _Scene, f, xlim, ylim, style="-", linewidth=1.5):
+    with np.errstate(all="ignore"):
+        for xs, ys in adaptive_sample(f, xlim[0], xlim[1], ylim):
+            scene.data_line(xs, ys, linewidth, style)
+
+
+def _corner_label(scene: _Scene, spec):
+    if spec.get("label"):
+        scene.text(f"${spec['label']}$", scene.ax_x(0.95), scene.ax_y(0.95), 10,
+                   ha="right", va="top")
+
+
+def _dots(scene: _Scene, xs, ys, size=4):
+    for x, y in zip(xs, ys):
+        scene.dot(scene.x(x), scene.y(y), size)
+
+
+def _vline(scene: _Scene, x, width=0.6, style="--"):
+    scene.line([scene.x(x)] * 2, [scene.box[1], scene.box[3]], width, style)
+
+
+def _hline(scene: _Scene, y, width=0.6, style="--"):
+    scene.line([scene.box[0], scene.box[2]], [scene.y(y)] * 2, width, style)
+
+
+def _fast_polynomial(scene, spec):
+    coeffs = spec.get("coeffs", [1, 0, 0, -1])
+    xlim, ylim = spec.get("xlim", (-5, 5)), spec.get("ylim", (-5, 5))
+    _exam_axes(scene, xlim, ylim)
+    _function(scene, lambda x: np.polyval(coeffs, x), xlim, ylim)
+    _corner_label(scene, spec)
+    points, roots = spec.get("points", []), spec.get("roots", [])
+    _dots(scene, [pt["x"] for pt in points] + list(roots),
+          [pt["y"] for pt in points] + [0] * len(roots))
+    for pt in points:
+        if "label" in pt:
+            scene.text(pt["label"], scene.x(pt["x"] + 0.2), scene.y(pt["y"] + 0.3), 8)
+    for r in roots:
+        scene.text(str(r), scene.x(r), scene.y(-0.5), 9, ha="center")
+
+
+def _fast_quadratic(scene, spec):
+    a, p, q = spec.get("a", 1), spec.get("p", 0), spec.get("q", 0)
+    xlim, ylim = spec.get("xlim", (-5, 5)), spec.get("ylim", (-5, 5))
+    _exam_axes(scene, xlim, ylim)
+    _function(scene, lambda x: a * (x - p) ** 2 + q, xlim, ylim)
+    if spec.get("show_vertex", True):
+        _dots(scene, [p], [q])
+        scene.text(f"$({p},\\;{q})$", scene.x(p + 0.2), scene.y(q - 0.5), 9)
+    if spec.get("show_axis", False):
+        _vline(scene, p)
+    _corner_label(scene, spec)
+
+
+_PI_LABELS = {0.5: r"$\frac{\pi}{2}$", 1: r"$\pi$", 1.5: r"$\frac{3\pi}{2}$",
+              2: r"$2\pi$", 2.5: r"$\frac{5\pi}{2}$", 3: r"$3\pi$"}
+
+
+def _fast_trig(scene, spec):
+    func = spec.get("func", "sin")
+    a, b = spec.get("amplitude", 1), spec.get("period_coeff", 1)
+    c, d = spec.get("phase", 0), spec.get("shift", 0)
+    xlim = spec.get("xlim", (-0.5, 2 * np.pi + 0.5))
+    ylim = spec.get("ylim", (-2, 2))
+    trig = {"sin": np.sin, "cos": np.cos, "tan": np.tan}[func]
+
+    xticks = None
+    if spec.get("pi_ticks", True) and func != "tan":
+        xticks = [(m * np.pi, text, 8) for m, text in _PI_LABELS.items()
+                  if xlim[0] < m * np.pi < xlim[1]] or None
+    _exam_axes(scene, xlim, ylim, xticks)
+    _function(scene, lambda x: a * trig(b * x + c) + d, xlim, ylim)
+    if func == "tan":
+        period = np.pi / abs(b)
+        k_start = int(np.floor((xlim[0] + np.pi / (2 * b) - c / b) / period))
+        k_end = int(np.ceil((xlim[1] + np.pi / (2 * b) - c / b) / period))
+        for k in range(k_start, k_end + 1):
+            asym_x = (k * np.pi - c + np.pi / 2) / b
+            if xlim[0] < asym_x < xlim[1]:
+                _vline(scene, asym_x)
+    _corner_label(scene, spec)
+
+
+def _fast_exp_log(scene, spec):
+    kind, base = spec.get("kind", "exp"), spec.get("base", np.e)
+    xlim, ylim = spec.get("xlim", (-3, 4)), spec.get("ylim", (-3, 5))
+    _exam_axes(scene, xlim, ylim)
+    if kind in ("exp", "both"):
+        _function(scene, np.exp if base == np.e else (lambda x: base ** x), xlim, ylim)
+        _dots(scene, [0], [1])
+    if kind in ("log", "both"):
+        f_log = np.log if base == np.e else (lambda x: np.log(x) / np.log(base))
+        _function(scene, f_log, (max(xlim[0], 0), xlim[1]), ylim,
+                  "--" if kind == "both" else "-")
+        _dots(scene, [1], [0])
+    if kind == "both":
+        scene.data_line(xlim, xlim, 0.5, ":")
+    _corner_label(scene, spec)
+
+
+def _fast_rational(scene, spec):
+    a, b, c, d = (spec.get(k, v) for k, v in (("a", 1), ("b", 0), ("c", 1), ("d", -1)))
+    xlim, ylim = spec.get("xlim", (-5, 5)), spec.get("ylim", (-5, 5))
+    _exam_axes(scene, xlim, ylim)
+    _function(scene, lambda x: (a * x + b) / (c * x + d), xlim, ylim)
+    if c != 0:
+        if xlim[0] < -d / c < xlim[1]:
+            _vline(scene, -d / c)
+        if ylim[0] < a / c < ylim[1]:
+            _hline(scene, a / c)
+    _corner_label(scene, spec)
+
+
+def _fast_number_line(scene, spec):
+    intervals, points = spec.get("intervals", []), spec.get("points", [])
+    scene.xlim, scene.ylim = tuple(spec.get("xlim", (-5, 5))), (-0.5, 0.5)
+    xlim = scene.xlim
+    x0, _, x1, y1 = scene.box
+
+    _hline(scene, 0, width=1.0, style="-")
+    # annotate("->"): shrinkA/B 2 pt, head 0.4 × 0.2 of the 10 pt mutation scale
+    tip, shrink = float(scene.x(xlim[1])) - _px(2), _px(2)
+    oy = float(scene.y(0))
+    scene.line([float(scene.x(xlim[1] - 0.3)) + shrink, tip], [oy, oy], 1.0, clip=False)
+    scene.line([tip - _px(4), tip, tip - _px(4)], [oy - _px(2), oy, oy + _px(2)], 1.0,
+               clip=False)
+
+    ticks = range(int(xlim[0]), int(xlim[1]) + 1)
+    for tick in ticks:
+        px = float(scene.x(tick))
+        scene.line([px, px], [oy - _px(4), oy + _px(4)], _MARKER_EDGE)
+        scene.text(str(tick), px, scene.y(-0.15), 8, ha="center")
+
+    # The x axis keeps its default ticks along the (hidden) bottom spine
+    locs = _auto_ticks(xlim[0], xlim[1], _nbins(x1 - x0, 10, 3))
+    fmt = _tick_format(locs)
+    for t in locs:
+        px = float(scene.x(t))
+        if x0 - 0.5 <= px <= x1 + 0.5:
+            scene.line([px, px], [y1, y1 + _px(3.5)], 0.8, clip=False)
+            scene.text(fmt % t, px, y1 + _px(3.5 + _TICK_PAD), 10, ha="center", va="top")
+
+    for iv in intervals:
+        scene.data_line([iv["from"], iv["to"]], [0, 0], 3)
+    ends = [(iv["from"], iv.get("open_left", False)) for iv in intervals]
+    ends += [(iv["to"], iv.get("open_right", False)) for iv in intervals]
+    ends += [(pt["x"], pt.get("open", False)) for pt in points]
+    for hollow, size, edge in ((False, 5, _MARKER_EDGE), (True, 7, 1.5)):
+        for x, is_open in ends:
+            if is_open == hollow:
+                scene.dot(scene.x(x), oy, size, hollow=hollow, edge_pt=edge, above_text=True)
+
+
+_FAST_PLOTTERS = {
+    "polynomial": _fast_polynomial,
+    "quadratic": _fast_quadratic,
+    "trig": _fast_trig,
+    "exp_log": _fast_exp_log,
+    "rational": _fast_rational,
+    "number_line": _fast_number_line,
+}
+assert tuple(_FAST_PLOTTERS) == FAST_TYPES
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def _compose(spec: dict) -> _Scene:
+    graph_type = spec.get("type", "custom")
+    if graph_type not in _FAST_PLOTTERS:
+        raise _Unsupported(f"graph type {graph_type!r}")
+    if render_mode(spec) != "tight" or "figsize" in spec:
+        raise _Unsupported("exact render mode or custom figsize")
+    scene = _Scene(DEFAULT_FIGSIZES.get(graph_type, DEFAULT_FIGSIZE))
+    _FAST_PLOTTERS[graph_type](scene, spec)
+    return scene
+
+
+def supports(spec: dict) -> bool:
+    """True if render_png draws *spec* itself rather than returning None."""
+    try:
+        _compose(spec)
+    except _Unsupported:
+        return False
+    return True
+
+
+def render_png(spec: dict) -> bytes | None:
+    """Render *spec* to PNG bytes, or None if it needs matplotlib.
+
+    The PNG is the size a tight 300 dpi matplotlib render would be, in
+    8-bit grayscale.
+    """
+    try:
+        scene = _compose(spec)
+    except _Unsupported:
+        return None
+    return scene.render()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""Font resolution for the graph renderer, cached on disk.
+
+graph_generator needs a Korean font for labels and a mathtext font set.
+Which fonts exist differs per machine, and asking matplotlib for a
+missing family falls back glyph by glyph with a warning each time. This
+module resolves both once, registers bundled fonts, and stores the result
+in a JSON cache next to the scripts so later processes skip the lookup.
+
+Bundled fonts (*.ttf, *.otf, *.ttc) are picked up from:
+- SKILL_DIR/fonts
+- every directory in $MATH_HWPX_FONT_DIRS (os.pathsep separated)
+
+$MATH_HWPX_KOREAN_FONT names the Korean family to use instead of
+searching KOREAN_FAMILIES; "none" keeps to matplotlib's own fonts, which
+is what test_graphs renders its golden images with.
+
+The cache (scripts/.font_cache.json, or $MATH_HWPX_FONT_CACHE) is reused
+while the matplotlib version and the bundled font files are unchanged
+and the resolved font file still exists. It is only written once a Korean
+font was found; without one, every process looks again (and warmup warns).
+
+The cache is validated without importing matplotlib, so renderers that
+draw text themselves (fast_raster) can read it through cached_fonts()
+and the font files in matplotlib_font_dir().
+
+Usage:
+    python font_cache.py warmup      # build matplotlib's and this cache
+    python font_cache.py show        # print the resolved fonts
+
+    from font_cache import exam_rc
+    with mpl.rc_context(exam_rc()): ...
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+from importlib.metadata import version
+from importlib.util import find_spec
+from pathlib import Path
+
+from metrics import CACHE_REQUESTS
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SKILL_DIR = SCRIPT_DIR.parent
+CACHE_VERSION = 1
+FONT_SUFFIXES = (".ttf", ".otf", ".ttc")
+
+# Preferred Korean families, most preferred first
+KOREAN_FAMILIES = {
+    "Darwin": ["AppleGothic", "Apple SD Gothic Neo", "NanumGothic"],
+    "Windows": ["Malgun Gothic", "NanumGothic", "Gulim"],
+}
+KOREAN_FAMILIES_DEFAULT = [
+    "NanumGothic", "NanumBarunGothic", "Noto Sans CJK KR", "Noto Sans KR",
+    "UnDotum", "Baekmuk Gulim",
+]
+FALLBACK_FAMILY = "DejaVu Sans"   # ships with matplotlib
+MATH_FONTSETS = {"cm": "cmr10", "stix": "STIXGeneral", "dejavusans": "DejaVu Sans"}
+
+_lock = threading.Lock()
+_resolved = None
+
+
+def cache_path() -> Path:
+    return Path(os.environ.get("MATH_HWPX_FONT_CACHE", SCRIPT_DIR / ".font_cache.json"))
+
+
+def font_dirs() -> list[Path]:
+    """Bundled font directories that exist, in lookup order."""
+    dirs = [SKILL_DIR / "fonts"]
+    dirs += [Path(d) for d in os.environ.get("MATH_HWPX_FONT_DIRS", "").split(os.pathsep) if d]
+    return [d for d in dirs if d.is_dir()]
+
+
+def _bundled_fonts() -> list[Path]:
+    return sorted(p for d in font_dirs() for p in d.rglob("*")
+                  if p.suffix.lower() in FONT_SUFFIXES)
+
+
+def matplotlib_font_dir() -> Path:
+    """Directory of the fonts shipped with matplotlib (DejaVu, cm*, STIX)."""
+    spec = find_spec("matplotlib")  # locates the package without importing it
+    return Path(spec.origin).parent / "mpl-data" / "fonts" / "ttf"
+
+
+def _fingerprint(fonts: list[Path]) -> dict:
+    return {
+        "version": CACHE_VERSION,
+        "matplotlib": version("matplotlib"),
+        "korean_family": os.environ.get("MATH_HWPX_KOREAN_FONT"),
+        "fonts": [[str(p), p.stat().st_size, int(p.stat().st_mtime)] for p in fonts],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Resolution
+# ---------------------------------------------------------------------------
+
+def _find(family: str) -> str | None:
+    """Path of the font file for *family*, without matplotlib's fallback."""
+    import matplotlib.font_manager as fm
+
+    try:
+        return fm.findfont(fm.FontProperties(family=family), fallback_to_default=False)
+    except ValueError:
+        return None
+
+
+def _resolve() -> dict:
+    korean_path = korean_family = None
+    forced = os.environ.get("MATH_HWPX_KOREAN_FONT")
+    if forced is not None:
+        candidates = [] if forced.lower() == "none" else [forced]
+    else:
+        preferred = KOREAN_FAMILIES.get(platform.system(), KOREAN_FAMILIES_DEFAULT)
+        candidates = preferred + [f for f in KOREAN_FAMILIES_DEFAULT if f not in preferred]
+    for family in candidates:
+        korean_path = _find(family)
+        if korean_path:
+            korean_family = family
+            break
+    math_fontset = next((name for name, family in MATH_FONTSETS.items() if _find(family)),
+                        "dejavusans")
+    return {"korean": korean_family, "korean_path": korean_path, "math_fontset": math_fontset}
+
+
+def _load_cache(fingerprint: dict) -> dict | None:
+    try:
+        data = json.loads(cache_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("fingerprint") != fingerprint:
+        return None
+    path = data.get("fonts", {}).get("korean_path")
+    if path and not Path(path).is_file():
+        return None
+    return data["fonts"]
+
+
+def _save_cache(fingerprint: dict, fonts: dict) -> None:
+    path = cache_path()
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    try:
+        tmp.write_text(json.dumps({"fingerprint": fingerprint, "fonts": fonts},
+                                  ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(path)
+    except OSError:  # read-only install: resolve again next process
+        tmp.unlink(missing_ok=True)
+
+
+def resolve_fonts(refresh: bool = False) -> dict:
+    """Return {"korean", "korean_path", "math_fontset"}, resolving once.
+
+    Bundled fonts are registered with matplotlib on every first call
+    (cheap); the family lookup itself comes from the cache when valid.
+    """
+    global _resolved
+    with _lock:
+        if _resolved is not None and not refresh:
+            return _resolved
+        import matplotlib.font_manager as fm
+
+        fonts = _bundled_fonts()
+        for path in fonts:
+            fm.fontManager.addfont(str(path))
+        fingerprint = _fingerprint(fonts)
+        resolved = None if refresh else _load_cache(fingerprint)
+        CACHE_REQUESTS.inc(cache="font", result="miss" if resolved is None else "hit")
+        if resolved is None:
+            resolved = _resolve()
+            # a missing Korean font is not cached: one installed system-wide
+            # later is found by the next process without a manual refresh
+            if resolved["korean"] is not None:
+                _save_cache(fingerprint, resolved)
+        _resolved = resolved
+        return resolved
+
+
+def cached_fonts() -> dict:
+    """resolve_fonts() without importing matplotlib when the cache is valid.
+
+    Bundled fonts are not registered with matplotlib on this path; callers
+    that go on to draw with matplotlib use resolve_fonts() instead.
+    """
+    if _resolved is not None:
+        return _resolved
+    fonts = _load_cache(_fingerprint(_bundled_fonts()))
+    if fonts is None:
+        return resolve_fonts()
+    CACHE_REQUESTS.inc(cache="font", result="hit")
+    return fonts
+
+
+def exam_rc() -> dict:
+    """rcParams for exam graphs: Korean font first, matplotlib's default after."""
+    fonts = resolve_fonts()
+    families = [fonts["korean"], FALLBACK_FAMILY] if fonts["korean"] else [FALLBACK_FAMILY]
+    return {
+        "font.family": families,
+        "axes.unicode_minus": False,
+        "mathtext.fontset": fonts["math_fontset"],
+    }
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def warmup() -> dict:
+    """Build matplotlib's font list and this cache, then draw text once.
+
+    Meant for image build time, so a fresh worker starts with warm caches.
+    """
+    import matplotlib as mpl
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fonts = resolve_fonts(refresh=True)
+    if fonts["korean"] is None:
+        print("WARNING: no Korean font found; graph labels in Hangul will not "
+              "render. Put a .ttf in SKILL_DIR/fonts or set MATH_HWPX_FONT_DIRS.",
+              file=sys.stderr)
+    with mpl.rc_context(exam_rc()):
+        fig = Figure(figsize=(1, 1), dpi=72)
+        FigureCanvasAgg(fig)
+        fig.text(0.5, 0.5, ("가 " if fonts["korean"] else "") + "$x^2$")
+        fig.canvas.draw()
+    return fonts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Resolve and cache graph fonts")
+    parser.add_argument("command", choices=["warmup", "show"])
+    args = parser.parse_args()
+
+    fonts = warmup() if args.command == "warmup" else resolve_fonts()
+    print(f"Korean font:  {fonts['korean'] or '(none)'}"
+          + (f" ({fonts['korean_path']})" if fonts["korean_path"] else ""))
+    print(f"Math fontset: {fonts['math_fontset']}")
+    print(f"Cache:        {cache_path()}")
+
+
+if __name__ == "__main__":
+    main()
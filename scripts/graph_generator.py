@@ -2,34 +2,120 @@
 """Generate math exam-style graphs as PNG images.
 
 Produces clean, black-and-white graphs suitable for Korean math exams (수능/모의고사).
-Supports 고1~고3 curriculum: polynomials, trig, exp/log, conics, normal dist, etc.
+Supports 고1~고3 curriculum: polynomials, trig, exp/log, conics, normal and
+binomial distributions, etc.
 
 Usage:
-    from graph_generator import generate_graph
+    from graph_generator import generate_graph, render_graph_bytes, render_many
     png_path = generate_graph(graph_spec, output_path)
+    png = render_graph_bytes(graph_spec)          # in memory, no file
+    pngs = render_many([spec1, spec2, ...])        # shared thread pool, same order
+
+Figures are drawn on matplotlib.figure.Figure with an Agg canvas (pyplot is
+never imported), so graphs can be rendered from a thread pool.
 """
 
-import platform
+import atexit
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
 import matplotlib as mpl
-import matplotlib.font_manager as fm
 import matplotlib.patches as mpatches
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from curve_engine import (
+    adaptive_sample,
+    ellipse_path,
+    ellipse_segments,
+    hyperbola_segments,
+    join_segments,
+)
+from distributions import binomial_moments, binomial_pmf, normal_cdf, normal_pdf
+from expr_compiler import compile_expression
+from font_cache import exam_rc
+from graph_sizing import design_figsize, graph_renderer, graph_size_px, render_mode
+from metrics import CACHE_REQUESTS
 
 # ---------------------------------------------------------------------------
 # Font configuration
 # ---------------------------------------------------------------------------
-if platform.system() == "Darwin":
-    mpl.rcParams["font.family"] = "AppleGothic"
-elif platform.system() == "Windows":
-    mpl.rcParams["font.family"] = "Malgun Gothic"
-else:
-    mpl.rcParams["font.family"] = "NanumGothic"
+# Applied only while a graph is being drawn (see _exam_style) so importing
+# this module leaves the caller's matplotlib settings untouched. The Korean
+# and math fonts are resolved once per machine by font_cache (run
+# "python font_cache.py warmup" when building a worker image).
+
+# rcParams are process-global and matplotlib reads them while drawing, so a
+# render holds _style_lock for as long as its rc_context is entered. Other
+# threads wait instead of seeing (or restoring) half-applied settings.
+_style_lock = threading.RLock()
+
 
-mpl.rcParams["axes.unicode_minus"] = False
-mpl.rcParams["mathtext.fontset"] = "cm"  # Computer Modern for math
+@contextmanager
+def _exam_style():
+    """Apply exam_rc() for the duration of a render (thread-safe, re-entrant)."""
+    with _style_lock, mpl.rc_context(exam_rc()):
+        yield
+
+
+# ---------------------------------------------------------------------------
+# Batched artists
+# ---------------------------------------------------------------------------
+# Every ax.plot call is a Line2D artist with its own transform, clip path
+# and renderer round-trip. Marks that come in groups (ticks, points, edges)
+# are drawn as one artist per group instead.
+
+def _segments(ax, segments, linewidth=1.0, linestyle="-", color="k", **kwargs):
+    """Draw straight segments as one LineCollection.
+
+    Caps and joins follow Line2D's defaults so a batch looks the same as
+    the equivalent ax.plot calls. Agg antialiases a long polyline in a
+    collection differently from the same Line2D (edges move by up to ~12
+    grey levels), so polylines of more than two points, such as the
+    ellipses of solid3d, are still drawn one Line2D each.
+    """
+    if len(segments) == 0:
+        return None
+    kwargs.setdefault("zorder", 2)  # Line2D's, above patches
+    for seg in segments:
+        if len(seg) > 2:
+            seg = np.asarray(seg)
+            ax.plot(seg[:, 0], seg[:, 1], color=color, linewidth=linewidth,
+                    linestyle=linestyle, **kwargs)
+    segments = [seg for seg in segments if len(seg) <= 2]
+    if not segments:
+        return None
+    solid = linestyle in ("-", "solid")
+    lc = LineCollection(segments, colors=color, linewidths=linewidth,
+                        linestyles=linestyle, joinstyle="round",
+                        capstyle="projecting" if solid else "butt", **kwargs)
+    ax.add_collection(lc)
+    return lc
+
+
+def _markers(ax, xs, ys, markersize=4, hollow=False, **kwargs):
+    """Draw point markers as one marker-only Line2D.
+
+    Agg stamps every marker of a Line2D from one rasterized path, which is
+    the cheapest way to draw many identical points. hollow=True gives the
+    white-filled circle used for excluded endpoints.
+    """
+    if len(xs) == 0:
+        return None
+    if hollow:
+        kwargs = {"markerfacecolor": "white", "markeredgecolor": "k",
+                  "markeredgewidth": 1.5, **kwargs}
+    else:
+        kwargs = {"color": "k", **kwargs}
+    line, = ax.plot(xs, ys, "o", markersize=markersize, **kwargs)
+    return line
 
 
 # ---------------------------------------------------------------------------
@@ -76,10 +162,80 @@ def setup_exam_axes(ax, xlim=(-5, 5), ylim=(-5, 5),
 
 
 def _new_fig(figsize=(2.8, 2.8), dpi=300):
-    fig, ax = plt.subplots(figsize=figsize, dpi=dpi)
+    """Create a standalone Agg figure with one axes (no pyplot state)."""
+    fig = _blank_fig(figsize, dpi)
+    ax = fig.add_subplot()
     return fig, ax
 
 
+def _blank_fig(figsize, dpi):
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _plot_function(ax, f, xlim, ylim, *args, **kwargs):
+    """Plot y = f(x) over xlim with adaptive sampling (split at poles/jumps)."""
+    segments = adaptive_sample(f, xlim[0], xlim[1], ylim)
+    ax.plot(*join_segments(segments), *args, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Figure pool
+# ---------------------------------------------------------------------------
+# Creating a Figure + canvas costs more than clearing one, so each thread
+# keeps its idle figures keyed by (figsize, dpi) and reuses them. Figures
+# never cross threads, which keeps the Agg renderer single-threaded. The
+# pool is a small LRU: releasing a figure of a new size evicts the least
+# recently used one, and a thread's pool is dropped with the thread.
+
+_POOL_SIZE = 4  # idle figures kept per thread
+_pool = threading.local()
+
+
+def _idle_figs() -> OrderedDict:
+    idle = getattr(_pool, "figs", None)
+    if idle is None:
+        idle = _pool.figs = OrderedDict()
+    return idle
+
+
+def _acquire_fig(figsize, dpi, margins=None):
+    """Take an idle figure from this thread's pool (or make one) with fresh axes.
+
+    *margins* are subplot parameters (left/bottom/right/top fractions);
+    None means the matplotlib defaults.
+    """
+    fig = _idle_figs().pop((tuple(figsize), dpi), None)
+    CACHE_REQUESTS.inc(cache="figure_pool", result="miss" if fig is None else "hit")
+    if fig is None:
+        fig = _blank_fig(figsize, dpi)
+    # clear() keeps subplot parameters, so set them on every use
+    if margins is None:
+        margins = {side: mpl.rcParams[f"figure.subplot.{side}"]
+                   for side in ("left", "bottom", "right", "top")}
+    fig.subplots_adjust(**margins)
+    return fig, fig.add_subplot()
+
+
+def _release_fig(fig, figsize, dpi):
+    """Reset *fig* and return it to this thread's pool, evicting the oldest."""
+    fig.clear()
+    idle = _idle_figs()
+    key = (tuple(figsize), dpi)
+    idle[key] = fig
+    idle.move_to_end(key)
+    while len(idle) > _POOL_SIZE:
+        idle.popitem(last=False)
+
+
+def clear_figure_pool():
+    """Drop this thread's idle figures (frees their canvases' memory)."""
+    idle = getattr(_pool, "figs", None)
+    if idle:
+        idle.clear()
+
+
 # ---------------------------------------------------------------------------
 # Geometry helper functions
 # ---------------------------------------------------------------------------
@@ -140,12 +296,12 @@ def _draw_equal_marks(ax, p1, p2, count=1):
     tang = d / length
     tick_len = 0.15
     spacing = 0.1
+    ticks = []
     for i in range(count):
         offset = (i - (count - 1) / 2) * spacing
         cp = mid + tang * offset
-        ax.plot([cp[0] - perp[0] * tick_len, cp[0] + perp[0] * tick_len],
-                [cp[1] - perp[1] * tick_len, cp[1] + perp[1] * tick_len],
-                "k-", linewidth=1.0)
+        ticks.append([cp - perp * tick_len, cp + perp * tick_len])
+    _segments(ax, ticks, linewidth=1.0)
 
 
 def _draw_parallel_marks(ax, p1, p2, count=1):
@@ -160,18 +316,15 @@ def _draw_parallel_marks(ax, p1, p2, count=1):
     perp = np.array([-d[1], d[0]]) / length
     arrow_len = 0.15
     spacing = 0.12
+    chevrons = []
     for i in range(count):
         offset = (i - (count - 1) / 2) * spacing
         cp = mid + tang * offset
-        # Draw a small ">" shape
-        tip = cp + tang * arrow_len
-        ax.plot([cp[0] - tang[0] * arrow_len + perp[0] * arrow_len * 0.5,
-                 tip[0],
-                 cp[0] - tang[0] * arrow_len - perp[0] * arrow_len * 0.5],
-                [cp[1] - tang[1] * arrow_len + perp[1] * arrow_len * 0.5,
-                 tip[1],
-                 cp[1] - tang[1] * arrow_len - perp[1] * arrow_len * 0.5],
-                "k-", linewidth=0.8)
+        # A small ">" shape
+        back = cp - tang * arrow_len
+        wing = perp * arrow_len * 0.5
+        chevrons.append([back + wing, cp + tang * arrow_len, back - wing])
+    _segments(ax, chevrons, linewidth=0.8)
 
 
 def _draw_dashed_line(ax, p1, p2, **kwargs):
@@ -181,6 +334,12 @@ def _draw_dashed_line(ax, p1, p2, **kwargs):
             linestyle="--", linewidth=kwargs.get("linewidth", 0.7))
 
 
+def _draw_dashed_lines(ax, segments, **kwargs):
+    """Draw several dashed auxiliary or hidden lines as one collection."""
+    _segments(ax, segments, color=kwargs.get("color", "k"),
+              linestyle="--", linewidth=kwargs.get("linewidth", 0.7))
+
+
 def _project_3d(x, y, z, angle_deg=30, scale=0.5):
     """Oblique projection: 3D → 2D for exam-style solid figures."""
     rad = np.radians(angle_deg)
@@ -211,7 +370,7 @@ def _plot_triangle(ax, spec):
                          padding=1.0)
 
     # Draw the triangle
-    tri = plt.Polygon(verts, fill=False, edgecolor="k", linewidth=1.5)
+    tri = mpatches.Polygon(verts, fill=False, edgecolor="k", linewidth=1.5)
     ax.add_patch(tri)
 
     # Vertex labels
@@ -313,7 +472,7 @@ def _plot_triangle(ax, spec):
             ux = ((A[0]**2 + A[1]**2) * (B[1] - C[1]) + (B[0]**2 + B[1]**2) * (C[1] - A[1]) + (C[0]**2 + C[1]**2) * (A[1] - B[1])) / D
             uy = ((A[0]**2 + A[1]**2) * (C[0] - B[0]) + (B[0]**2 + B[1]**2) * (A[0] - C[0]) + (C[0]**2 + C[1]**2) * (B[0] - A[0])) / D
             r = np.sqrt((A[0] - ux)**2 + (A[1] - uy)**2)
-            circ = plt.Circle((ux, uy), r, fill=False, edgecolor="gray",
+            circ = mpatches.Circle((ux, uy), r, fill=False, edgecolor="gray",
                               linestyle="--", linewidth=0.8)
             ax.add_patch(circ)
 
@@ -326,7 +485,7 @@ def _plot_triangle(ax, spec):
         incenter = (a_len * A + b_len * B + c_len * C) / (a_len + b_len + c_len)
         s = (a_len + b_len + c_len) / 2
         in_r = np.sqrt((s - a_len) * (s - b_len) * (s - c_len) / s)
-        circ = plt.Circle(incenter, in_r, fill=False, edgecolor="gray",
+        circ = mpatches.Circle(incenter, in_r, fill=False, edgecolor="gray",
                           linestyle="--", linewidth=0.8)
         ax.add_patch(circ)
 
@@ -343,8 +502,8 @@ def _plot_circle(ax, spec):
                          padding=1.5)
 
     # Main circle
-    circ = plt.Circle(center, radius, fill=False, edgecolor="k", linewidth=1.5)
-    ax.add_patch(circ)
+    ax.plot(*ellipse_path(center[0], center[1], radius, radius),
+            "k-", linewidth=1.5, zorder=1)  # under points, like a patch
 
     if show_center:
         ax.plot(*center, "ko", markersize=3)
@@ -358,19 +517,17 @@ def _plot_circle(ax, spec):
         pos = center + radius * np.array([np.cos(angle_rad), np.sin(angle_rad)])
         name = pt["label"]
         point_map[name] = pos
-        ax.plot(*pos, "ko", markersize=4)
         direction = pos - center
         direction = direction / np.linalg.norm(direction)
         ax.text(pos[0] + direction[0] * 0.35, pos[1] + direction[1] * 0.35,
                 name, fontsize=10, ha="center", va="center", fontweight="bold")
+    if point_map:
+        _markers(ax, *np.array(list(point_map.values())).T)
 
-    # Chords
-    for chord in spec.get("chords", []):
-        if len(chord) == 2 and chord[0] in point_map and chord[1] in point_map:
-            pa, pb = point_map[chord[0]], point_map[chord[1]]
-            ax.plot([pa[0], pb[0]], [pa[1], pb[1]], "k-", linewidth=1.0)
-
-    # Tangent lines at points
+    # Chords and tangent lines at points
+    lines = [[point_map[a], point_map[b]] for a, b in
+             (c for c in spec.get("chords", []) if len(c) == 2)
+             if a in point_map and b in point_map]
     for tname in spec.get("tangent_at", []):
         if tname not in point_map:
             continue
@@ -380,9 +537,8 @@ def _plot_circle(ax, spec):
         tangent_dir = np.array([-radial[1], radial[0]])
         tangent_dir = tangent_dir / np.linalg.norm(tangent_dir)
         t_len = radius * 0.8
-        ax.plot([pt[0] - tangent_dir[0] * t_len, pt[0] + tangent_dir[0] * t_len],
-                [pt[1] - tangent_dir[1] * t_len, pt[1] + tangent_dir[1] * t_len],
-                "k-", linewidth=1.0)
+        lines.append([pt - tangent_dir * t_len, pt + tangent_dir * t_len])
+    _segments(ax, lines, linewidth=1.0)
 
     # Arc highlight
     arc_spec = spec.get("arc_highlight")
@@ -390,15 +546,15 @@ def _plot_circle(ax, spec):
         fr = arc_spec.get("from", "")
         to = arc_spec.get("to", "")
         if fr in point_map and to in point_map:
-            a1 = np.degrees(np.arctan2(point_map[fr][1] - center[1],
-                                       point_map[fr][0] - center[0]))
-            a2 = np.degrees(np.arctan2(point_map[to][1] - center[1],
-                                       point_map[to][0] - center[0]))
+            a1 = np.arctan2(point_map[fr][1] - center[1],
+                            point_map[fr][0] - center[0])
+            a2 = np.arctan2(point_map[to][1] - center[1],
+                            point_map[to][0] - center[0])
+            if a2 <= a1:
+                a2 += 2 * np.pi  # counter-clockwise from → to
             color = arc_spec.get("color", "gray")
-            arc = mpatches.Arc(center, 2 * radius, 2 * radius,
-                               angle=0, theta1=a1, theta2=a2,
-                               color=color, linewidth=2.5)
-            ax.add_patch(arc)
+            ax.plot(*ellipse_path(center[0], center[1], radius, radius, a1, a2),
+                    color=color, linewidth=2.5, solid_capstyle="butt", zorder=1)
 
     # Central angle
     if spec.get("central_angle"):
@@ -407,10 +563,8 @@ def _plot_circle(ax, spec):
             a_name = pts_on[0]["label"]
             b_name = pts_on[1]["label"]
             if a_name in point_map and b_name in point_map:
-                ax.plot([center[0], point_map[a_name][0]],
-                        [center[1], point_map[a_name][1]], "k-", linewidth=0.8)
-                ax.plot([center[0], point_map[b_name][0]],
-                        [center[1], point_map[b_name][1]], "k-", linewidth=0.8)
+                _segments(ax, [[center, point_map[a_name]],
+                               [center, point_map[b_name]]], linewidth=0.8)
 
     # Inscribed angle
     insc = spec.get("inscribed_angle")
@@ -419,10 +573,8 @@ def _plot_circle(ax, spec):
         arc_pts = insc.get("arc", [])
         if vtx_name in point_map and len(arc_pts) == 2:
             vtx = point_map[vtx_name]
-            for an in arc_pts:
-                if an in point_map:
-                    ax.plot([vtx[0], point_map[an][0]],
-                            [vtx[1], point_map[an][1]], "k-", linewidth=0.8)
+            _segments(ax, [[vtx, point_map[an]] for an in arc_pts if an in point_map],
+                      linewidth=0.8)
 
 
 def _plot_quadrilateral(ax, spec):
@@ -438,7 +590,7 @@ def _plot_quadrilateral(ax, spec):
                          padding=1.0)
 
     # Draw quadrilateral
-    quad = plt.Polygon(verts, fill=False, edgecolor="k", linewidth=1.5)
+    quad = mpatches.Polygon(verts, fill=False, edgecolor="k", linewidth=1.5)
     ax.add_patch(quad)
 
     # Vertex labels
@@ -458,8 +610,7 @@ def _plot_quadrilateral(ax, spec):
 
     # Diagonals
     if spec.get("show_diagonals"):
-        _draw_dashed_line(ax, verts[0], verts[2])
-        _draw_dashed_line(ax, verts[1], verts[3])
+        _draw_dashed_lines(ax, [[verts[0], verts[2]], [verts[1], verts[3]]])
         # Intersection label
         int_label = spec.get("diagonal_intersection_label")
         if int_label:
@@ -533,24 +684,23 @@ def _plot_coordinate(ax, spec):
     ax.set_aspect("equal")
 
     # Segments
-    for seg in spec.get("segments", []):
-        if len(seg) == 2:
-            p1, p2 = seg
-            ax.plot([p1[0], p2[0]], [p1[1], p2[1]], "k-", linewidth=1.2)
+    _segments(ax, [seg for seg in spec.get("segments", []) if len(seg) == 2],
+              linewidth=1.2)
 
     # Fill polygon (shaded region)
     fill_poly = spec.get("fill_polygon")
     if fill_poly:
         alpha = spec.get("shade_alpha", 0.15)
-        poly = plt.Polygon(fill_poly, alpha=alpha, facecolor="gray",
+        poly = mpatches.Polygon(fill_poly, alpha=alpha, facecolor="gray",
                            edgecolor="k", linewidth=0.8)
         ax.add_patch(poly)
 
     # Points with labels
-    for pt in spec.get("points", []):
-        pos = pt["pos"]
-        ax.plot(pos[0], pos[1], "ko", markersize=4)
+    points = spec.get("points", [])
+    _markers(ax, [pt["pos"][0] for pt in points], [pt["pos"][1] for pt in points])
+    for pt in points:
         if "label" in pt:
+            pos = pt["pos"]
             ax.text(pos[0] + 0.2, pos[1] + 0.3, pt["label"], fontsize=8)
 
     # Lines (infinite lines given by slope/intercept)
@@ -559,13 +709,12 @@ def _plot_coordinate(ax, spec):
         intercept = ln.get("intercept", 0)
         style = ln.get("style", "k-")
         if slope is not None:
-            x = np.linspace(xlim[0], xlim[1], 500)
-            y = slope * x + intercept
-            ax.plot(x, y, style, linewidth=1.0)
+            _plot_function(ax, lambda x: slope * x + intercept, xlim, ylim,
+                           style, linewidth=1.0)
 
     # Circles on coordinate plane
     for c in spec.get("circles", []):
-        cc = plt.Circle(c["center"], c["radius"], fill=False,
+        cc = mpatches.Circle(c["center"], c["radius"], fill=False,
                         edgecolor="k", linewidth=1.2)
         ax.add_patch(cc)
 
@@ -584,20 +733,13 @@ def _plot_solid3d(ax, spec):
         r = params.get("radius", 2)
         h = params.get("height", 4)
         # Bottom ellipse
-        theta = np.linspace(0, 2 * np.pi, 200)
-        bx = r * np.cos(theta)
-        by = r * np.sin(theta) * 0.3  # foreshortened
-        ax.plot(bx, by, "k-", linewidth=1.2)
-        # Top ellipse
-        ax.plot(bx, by + h, "k-", linewidth=1.2)
-        # Side lines
-        ax.plot([-r, -r], [0, h], "k-", linewidth=1.2)
-        ax.plot([r, r], [0, h], "k-", linewidth=1.2)
+        bx, by = ellipse_path(0, 0, r, r * 0.3)  # foreshortened
+        # Bottom and top ellipses, side lines
+        _segments(ax, [np.column_stack([bx, by]), np.column_stack([bx, by + h]),
+                       [[-r, 0], [-r, h]], [[r, 0], [r, h]]], linewidth=1.2)
         # Hidden back of bottom ellipse
         if show_hidden:
-            bx_back = r * np.cos(np.linspace(0, np.pi, 100))
-            by_back = r * np.sin(np.linspace(0, np.pi, 100)) * 0.3
-            ax.plot(bx_back, by_back, "k--", linewidth=0.6)
+            ax.plot(*ellipse_path(0, 0, r, r * 0.3, 0, np.pi), "k--", linewidth=0.6)
         # Labels
         if "r" in solid_labels:
             ax.annotate("", xy=(r, 0), xytext=(0, 0),
@@ -610,17 +752,11 @@ def _plot_solid3d(ax, spec):
     elif kind == "cone":
         r = params.get("radius", 2)
         h = params.get("height", 4)
-        theta = np.linspace(0, 2 * np.pi, 200)
-        bx = r * np.cos(theta)
-        by = r * np.sin(theta) * 0.3
-        ax.plot(bx, by, "k-", linewidth=1.2)
-        # Side lines to apex
-        ax.plot([-r, 0], [0, h], "k-", linewidth=1.2)
-        ax.plot([r, 0], [0, h], "k-", linewidth=1.2)
+        # Base ellipse and side lines to apex
+        _segments(ax, [np.column_stack(ellipse_path(0, 0, r, r * 0.3)),
+                       [[-r, 0], [0, h]], [[r, 0], [0, h]]], linewidth=1.2)
         if show_hidden:
-            bx_back = r * np.cos(np.linspace(0, np.pi, 100))
-            by_back = r * np.sin(np.linspace(0, np.pi, 100)) * 0.3
-            ax.plot(bx_back, by_back, "k--", linewidth=0.6)
+            ax.plot(*ellipse_path(0, 0, r, r * 0.3, 0, np.pi), "k--", linewidth=0.6)
             _draw_dashed_line(ax, [0, 0], [0, h])
         if "r" in solid_labels:
             ax.text(r / 2, -0.5, solid_labels["r"], fontsize=9, ha="center")
@@ -632,10 +768,9 @@ def _plot_solid3d(ax, spec):
 
     elif kind == "sphere":
         r = params.get("radius", 2)
-        theta = np.linspace(0, 2 * np.pi, 200)
-        ax.plot(r * np.cos(theta), r * np.sin(theta), "k-", linewidth=1.2)
+        ax.plot(*ellipse_path(0, 0, r, r), "k-", linewidth=1.2)
         # Equator ellipse
-        ax.plot(r * np.cos(theta), r * np.sin(theta) * 0.3, "k--", linewidth=0.6)
+        ax.plot(*ellipse_path(0, 0, r, r * 0.3), "k--", linewidth=0.6)
         ax.plot(0, 0, "ko", markersize=3)
         if "r" in solid_labels:
             ax.plot([0, r], [0, 0], "k-", linewidth=0.8)
@@ -646,28 +781,24 @@ def _plot_solid3d(ax, spec):
         w = params.get("width", 4)
         h = params.get("height", 3)
         d = params.get("depth", 2)
-        # Front face
-        front = [[0, 0], [w, 0], [w, h], [0, h], [0, 0]]
-        fx = [p[0] for p in front]
-        fy = [p[1] for p in front]
-        ax.plot(fx, fy, "k-", linewidth=1.2)
         # Back face (oblique projected)
         bx0, by0 = _project_3d(0, 0, d)
         bx1, by1 = _project_3d(w, 0, d)
         bx2, by2 = _project_3d(w, h, d)
         bx3, by3 = _project_3d(0, h, d)
-        # Visible back edges
-        ax.plot([w, bx1], [h, by2], "k-", linewidth=1.2)  # top-right to back
-        ax.plot([bx1, bx2], [by1, by2], "k-", linewidth=1.2)  # back right
-        ax.plot([bx2, bx3], [by2, by3], "k-", linewidth=1.2)  # back top
-        ax.plot([0, bx0], [h, by3], "k-", linewidth=1.2)  # top-left to back
-        # Visible connecting edges
-        ax.plot([w, bx1], [0, by1], "k-", linewidth=1.2)  # bottom-right to back
+        _segments(ax, [
+            [[0, 0], [w, 0], [w, h], [0, h], [0, 0]],  # front face
+            [[w, h], [bx1, by2]],  # top-right to back
+            [[bx1, by1], [bx2, by2]],  # back right
+            [[bx2, by2], [bx3, by3]],  # back top
+            [[0, h], [bx0, by3]],  # top-left to back
+            [[w, 0], [bx1, by1]],  # bottom-right to back
+        ], linewidth=1.2)
         # Hidden edges
         if show_hidden:
-            _draw_dashed_line(ax, [0, 0], [bx0, by0])
-            _draw_dashed_line(ax, [bx0, by0], [bx1, by1])
-            _draw_dashed_line(ax, [bx0, by0], [bx3, by3])
+            _draw_dashed_lines(ax, [[[0, 0], [bx0, by0]],
+                                    [[bx0, by0], [bx1, by1]],
+                                    [[bx0, by0], [bx3, by3]]])
         if "w" in solid_labels:
             ax.text(w / 2, -0.4, solid_labels["w"], fontsize=9, ha="center")
         if "h" in solid_labels:
@@ -683,27 +814,20 @@ def _plot_solid3d(ax, spec):
         h = params.get("height", 3)
         d = params.get("depth", 2)
         ft = [[0, 0], [base, 0], [base / 2, h]]
-        for i in range(3):
-            j = (i + 1) % 3
-            ax.plot([ft[i][0], ft[j][0]], [ft[i][1], ft[j][1]], "k-", linewidth=1.2)
         # Back triangle (projected)
         bt = []
         for p in ft:
             bx, by = _project_3d(p[0], p[1], d)
             bt.append([bx, by])
-        # Back edges
-        for i in range(3):
-            j = (i + 1) % 3
-            style = "k--" if show_hidden and i == 0 else "k-"
-            lw = 0.6 if show_hidden and i == 0 else 1.2
-            ax.plot([bt[i][0], bt[j][0]], [bt[i][1], bt[j][1]], style, linewidth=lw)
-        # Connecting edges
-        for i in range(3):
-            is_hidden = show_hidden and i == 0
-            if is_hidden:
-                _draw_dashed_line(ax, ft[i], bt[i])
-            else:
-                ax.plot([ft[i][0], bt[i][0]], [ft[i][1], bt[i][1]], "k-", linewidth=1.2)
+        # Front edges, back edges and connecting edges; the bottom back
+        # edge and the edge joining it are hidden
+        visible = [[ft[i], ft[(i + 1) % 3]] for i in range(3)]
+        visible += [[bt[i], bt[(i + 1) % 3]] for i in range(1 if show_hidden else 0, 3)]
+        visible += [[ft[i], bt[i]] for i in range(1 if show_hidden else 0, 3)]
+        _segments(ax, visible, linewidth=1.2)
+        if show_hidden:
+            _segments(ax, [[bt[0], bt[1]]], linewidth=0.6, linestyle="--")
+            _draw_dashed_line(ax, ft[0], bt[0])
         all_x = [p[0] for p in ft + bt]
         all_y = [p[1] for p in ft + bt]
         _setup_geometry_axes(ax, xlim=(min(all_x), max(all_x)),
@@ -719,29 +843,19 @@ def _plot_solid3d(ax, spec):
         b2x, b2y = _project_3d(base, 0, d)
         b3x, b3y = _project_3d(0, 0, d)
         apex = [base / 2 + d * np.cos(np.radians(30)) * 0.5 / 2, h]
-        # Visible base edges
-        ax.plot([b0[0], b1[0]], [b0[1], b1[1]], "k-", linewidth=1.2)
-        ax.plot([b1[0], b2x], [b1[1], b2y], "k-", linewidth=1.2)
-        # Hidden base edges
-        if show_hidden:
-            _draw_dashed_line(ax, b0, [b3x, b3y])
-            _draw_dashed_line(ax, [b3x, b3y], [b2x, b2y])
-        else:
-            ax.plot([b0[0], b3x], [b0[1], b3y], "k-", linewidth=1.2)
-            ax.plot([b3x, b2x], [b3y, b2y], "k-", linewidth=1.2)
-        # Side edges to apex
-        ax.plot([b0[0], apex[0]], [b0[1], apex[1]], "k-", linewidth=1.2)
-        ax.plot([b1[0], apex[0]], [b1[1], apex[1]], "k-", linewidth=1.2)
-        ax.plot([b2x, apex[0]], [b2y, apex[1]], "k-", linewidth=1.2)
+        b2, b3 = [b2x, b2y], [b3x, b3y]
+        # Base edges and side edges to apex; those meeting the back-left
+        # corner b3 are hidden
+        visible = [[b0, b1], [b1, b2], [b0, apex], [b1, apex], [b2, apex]]
+        hidden = [[b0, b3], [b3, b2], [b3, apex]]
         if show_hidden:
-            _draw_dashed_line(ax, [b3x, b3y], apex)
+            base_center = [(b0[0] + b1[0] + b2x + b3x) / 4,
+                           (b0[1] + b1[1] + b2y + b3y) / 4]
+            hidden.append([base_center, apex])  # height
+            _draw_dashed_lines(ax, hidden)
         else:
-            ax.plot([b3x, apex[0]], [b3y, apex[1]], "k-", linewidth=1.2)
-        # Height dashed line
-        if show_hidden:
-            base_center_x = (b0[0] + b1[0] + b2x + b3x) / 4
-            base_center_y = (b0[1] + b1[1] + b2y + b3y) / 4
-            _draw_dashed_line(ax, [base_center_x, base_center_y], apex)
+            visible += hidden
+        _segments(ax, visible, linewidth=1.2)
         if "h" in solid_labels:
             ax.text(apex[0] + 0.3, h / 2, solid_labels["h"], fontsize=9, ha="left")
         all_x = [b0[0], b1[0], b2x, b3x, apex[0]]
@@ -768,24 +882,21 @@ def _plot_polynomial(ax, spec):
 
     setup_exam_axes(ax, xlim=xlim, ylim=ylim)
 
-    x = np.linspace(xlim[0], xlim[1], 1000)
-    y = np.polyval(coeffs, x)
-    ax.plot(x, y, "k-", linewidth=1.5)
+    _plot_function(ax, lambda x: np.polyval(coeffs, x), xlim, ylim, "k-", linewidth=1.5)
 
     if label:
         ax.text(0.95, 0.95, f"${label}$", transform=ax.transAxes,
                 ha="right", va="top", fontsize=10)
 
-    # Mark special points
-    for pt in spec.get("points", []):
-        px, py = pt["x"], pt["y"]
-        ax.plot(px, py, "ko", markersize=4)
+    # Mark special points and roots on the x-axis (one marker batch)
+    points = spec.get("points", [])
+    roots = spec.get("roots", [])
+    _markers(ax, [pt["x"] for pt in points] + list(roots),
+             [pt["y"] for pt in points] + [0] * len(roots))
+    for pt in points:
         if "label" in pt:
-            ax.text(px + 0.2, py + 0.3, pt["label"], fontsize=8)
-
-    # Mark roots on x-axis
-    for r in spec.get("roots", []):
-        ax.plot(r, 0, "ko", markersize=4)
+            ax.text(pt["x"] + 0.2, pt["y"] + 0.3, pt["label"], fontsize=8)
+    for r in roots:
         ax.text(r, -0.5, str(r), ha="center", fontsize=9)
 
 
@@ -800,9 +911,7 @@ def _plot_quadratic(ax, spec):
 
     setup_exam_axes(ax, xlim=xlim, ylim=ylim)
 
-    x = np.linspace(xlim[0], xlim[1], 1000)
-    y = a * (x - p) ** 2 + q
-    ax.plot(x, y, "k-", linewidth=1.5)
+    _plot_function(ax, lambda x: a * (x - p) ** 2 + q, xlim, ylim, "k-", linewidth=1.5)
 
     # Mark vertex
     if spec.get("show_vertex", True):
@@ -831,12 +940,12 @@ def _plot_trig(ax, spec):
 
     setup_exam_axes(ax, xlim=xlim, ylim=ylim)
 
-    x = np.linspace(xlim[0], xlim[1], 2000)
     trig_funcs = {"sin": np.sin, "cos": np.cos, "tan": np.tan}
-    raw = trig_funcs[func](b * x + c)
+    trig = trig_funcs[func]
+    _plot_function(ax, lambda x: a * trig(b * x + c) + d, xlim, ylim,
+                   "k-", linewidth=1.5)
 
     if func == "tan":
-        raw[np.abs(raw) > 20] = np.nan
         # Asymptotes
         period = np.pi / abs(b)
         k_start = int(np.floor((xlim[0] + np.pi / (2 * b) - c / b) / period))
@@ -846,9 +955,6 @@ def _plot_trig(ax, spec):
             if xlim[0] < asym_x < xlim[1]:
                 ax.axvline(asym_x, color="k", linestyle="--", linewidth=0.6)
 
-    y = a * raw + d
-    ax.plot(x, y, "k-", linewidth=1.5)
-
     # Pi tick labels
     if spec.get("pi_ticks", True) and func != "tan":
         period = 2 * np.pi / abs(b)
@@ -889,24 +995,24 @@ def _plot_exp_log(ax, spec):
 
     setup_exam_axes(ax, xlim=xlim, ylim=ylim)
 
-    x_exp = np.linspace(xlim[0], min(xlim[1], 5), 500)
-    x_log = np.linspace(0.01, xlim[1], 500)
-
     if kind in ("exp", "both"):
         if base == np.e:
-            y_exp = np.exp(x_exp)
+            f_exp = np.exp
         else:
-            y_exp = base ** x_exp
-        ax.plot(x_exp, y_exp, "k-", linewidth=1.5)
+            def f_exp(x):
+                return base ** x
+        _plot_function(ax, f_exp, xlim, ylim, "k-", linewidth=1.5)
         ax.plot(0, 1, "ko", markersize=4)
 
     if kind in ("log", "both"):
         if base == np.e:
-            y_log = np.log(x_log)
+            f_log = np.log
         else:
-            y_log = np.log(x_log) / np.log(base)
+            def f_log(x):
+                return np.log(x) / np.log(base)
         style = "k--" if kind == "both" else "k-"
-        ax.plot(x_log, y_log, style, linewidth=1.5)
+        # Domain x > 0; the sampler follows the curve down towards x = 0
+        _plot_function(ax, f_log, (max(xlim[0], 0), xlim[1]), ylim, style, linewidth=1.5)
         ax.plot(1, 0, "ko", markersize=4)
 
     if kind == "both":
@@ -936,12 +1042,8 @@ def _plot_rational(ax, spec):
     # Horizontal asymptote: y = a/c
     y_asym = a / c if c != 0 else None
 
-    x = np.linspace(xlim[0], xlim[1], 2000)
-    denom = c * x + d
-    y = (a * x + b) / denom
-    y[np.abs(denom) < 0.05] = np.nan
-
-    ax.plot(x, y, "k-", linewidth=1.5)
+    _plot_function(ax, lambda x: (a * x + b) / (c * x + d), xlim, ylim,
+                   "k-", linewidth=1.5)
 
     if x_asym is not None and xlim[0] < x_asym < xlim[1]:
         ax.axvline(x_asym, color="k", linestyle="--", linewidth=0.6)
@@ -963,20 +1065,20 @@ def _plot_conic(ax, spec):
     xlim = spec.get("xlim", (-5, 5))
     ylim = spec.get("ylim", (-5, 5))
     label = spec.get("label", "")
+    if kind == "circle" and not a > 0:
+        raise ValueError(f"circle needs a positive radius a, got a={a}")
+    if kind in ("ellipse", "hyperbola") and not (a > 0 and b > 0):
+        raise ValueError(f"{kind} needs positive a and b, got a={a}, b={b}")
 
     setup_exam_axes(ax, xlim=xlim, ylim=ylim)
     ax.set_aspect("equal")
 
-    xg = np.linspace(xlim[0], xlim[1], 800)
-    yg = np.linspace(ylim[0], ylim[1], 800)
-    X, Y = np.meshgrid(xg, yg)
-
     if kind == "circle":
-        Z = (X - h) ** 2 + (Y - k) ** 2
-        ax.contour(X, Y, Z, [a ** 2], colors="k", linewidths=1.5)
+        ax.plot(*join_segments(ellipse_segments(h, k, a, a, xlim, ylim)),
+                "k-", linewidth=1.5)
     elif kind == "ellipse":
-        Z = (X - h) ** 2 / a ** 2 + (Y - k) ** 2 / b ** 2
-        ax.contour(X, Y, Z, [1], colors="k", linewidths=1.5)
+        ax.plot(*join_segments(ellipse_segments(h, k, a, b, xlim, ylim)),
+                "k-", linewidth=1.5)
         # Foci
         if a > b:
             c_val = np.sqrt(a ** 2 - b ** 2)
@@ -985,21 +1087,20 @@ def _plot_conic(ax, spec):
             c_val = np.sqrt(b ** 2 - a ** 2)
             ax.plot([h, h], [k - c_val, k + c_val], "ko", markersize=3)
     elif kind == "hyperbola":
-        Z = (X - h) ** 2 / a ** 2 - (Y - k) ** 2 / b ** 2
-        ax.contour(X, Y, Z, [1], colors="k", linewidths=1.5)
-        # Asymptotes
-        x_asym = np.linspace(xlim[0], xlim[1], 100)
-        ax.plot(x_asym, k + (b / a) * (x_asym - h), "k--", linewidth=0.6)
-        ax.plot(x_asym, k - (b / a) * (x_asym - h), "k--", linewidth=0.6)
+        ax.plot(*join_segments(hyperbola_segments(h, k, a, b, xlim, ylim)),
+                "k-", linewidth=1.5)
+        # Asymptotes (straight, so their two ends are enough)
+        x_asym = np.array(xlim, dtype=float)
+        _segments(ax, [np.column_stack([x_asym, k + sign * (b / a) * (x_asym - h)])
+                       for sign in (1, -1)], linewidth=0.6, linestyle="--")
     elif kind == "parabola":
         # y^2 = 4px (horizontal) or x^2 = 4py (vertical)
         direction = spec.get("direction", "up")
         p = spec.get("p", 1)  # focal parameter
         if direction in ("up", "down"):
-            x_para = np.linspace(xlim[0], xlim[1], 1000)
             sign = 1 if direction == "up" else -1
-            y_para = sign * x_para ** 2 / (4 * p) + k
-            ax.plot(x_para, y_para, "k-", linewidth=1.5)
+            _plot_function(ax, lambda x: sign * x ** 2 / (4 * p) + k, xlim, ylim,
+                           "k-", linewidth=1.5)
             # Focus
             ax.plot(h, k + sign * p, "ko", markersize=3)
             # Directrix
@@ -1016,8 +1117,9 @@ def _plot_conic(ax, spec):
                 ha="right", va="top", fontsize=10)
 
     # Show special points
-    for pt in spec.get("points", []):
-        ax.plot(pt["x"], pt["y"], "ko", markersize=3)
+    points = spec.get("points", [])
+    _markers(ax, [pt["x"] for pt in points], [pt["y"] for pt in points], markersize=3)
+    for pt in points:
         if "label" in pt:
             ax.text(pt["x"] + 0.2, pt["y"] + 0.2, pt["label"], fontsize=8)
 
@@ -1033,24 +1135,20 @@ def _plot_derivative(ax, spec):
 
     setup_exam_axes(ax, xlim=xlim, ylim=ylim)
 
-    x = np.linspace(xlim[0], xlim[1], 1000)
     f_poly = np.poly1d(coeffs)
     fp_poly = f_poly.deriv()
 
     if show_f:
-        ax.plot(x, f_poly(x), "k-", linewidth=1.5)
+        _plot_function(ax, f_poly, xlim, ylim, "k-", linewidth=1.5)
     if show_fp:
         style = "k--" if show_f else "k-"
-        ax.plot(x, fp_poly(x), style, linewidth=1.5)
+        _plot_function(ax, fp_poly, xlim, ylim, style, linewidth=1.5)
 
     # Mark extrema
     if spec.get("show_extrema", False) and show_f:
         roots = np.roots(fp_poly.coeffs)
-        for r in roots:
-            if np.isreal(r) and xlim[0] < r.real < xlim[1]:
-                rx = r.real
-                ry = f_poly(rx)
-                ax.plot(rx, ry, "ko", markersize=4)
+        rx = [r.real for r in roots if np.isreal(r) and xlim[0] < r.real < xlim[1]]
+        _markers(ax, rx, f_poly(np.array(rx)))
 
     if label:
         ax.text(0.95, 0.95, f"${label}$", transform=ax.transAxes,
@@ -1068,10 +1166,8 @@ def _plot_integral_area(ax, spec):
 
     setup_exam_axes(ax, xlim=xlim, ylim=ylim)
 
-    x = np.linspace(xlim[0], xlim[1], 1000)
     f_poly = np.poly1d(coeffs)
-    y = f_poly(x)
-    ax.plot(x, y, "k-", linewidth=1.5)
+    _plot_function(ax, f_poly, xlim, ylim, "k-", linewidth=1.5)
 
     # Shaded area
     x_fill = np.linspace(a_val, b_val, 500)
@@ -1080,10 +1176,8 @@ def _plot_integral_area(ax, spec):
                      edgecolor="k", linewidth=0.5)
 
     # Boundary dashed lines
-    for val in [a_val, b_val]:
-        y_at = f_poly(val)
-        if abs(y_at) > 0.01:
-            ax.plot([val, val], [0, y_at], "k--", linewidth=0.6)
+    _segments(ax, [[(val, 0), (val, f_poly(val))] for val in (a_val, b_val)
+                   if abs(f_poly(val)) > 0.01], linewidth=0.6, linestyle="--")
 
     # Labels on x-axis
     ax.text(a_val, -0.4, f"${a_val}$" if a_val != 0 else "$a$",
@@ -1096,46 +1190,6 @@ def _plot_integral_area(ax, spec):
                 ha="right", va="top", fontsize=10)
 
 
-def _plot_normal(ax, spec):
-    """Plot normal distribution bell curve."""
-    from scipy.stats import norm
-
-    mu = spec.get("mu", 0)
-    sigma = spec.get("sigma", 1)
-    shade_from = spec.get("shade_from", None)
-    shade_to = spec.get("shade_to", None)
-    label = spec.get("label", "")
-
-    x = np.linspace(mu - 4 * sigma, mu + 4 * sigma, 1000)
-    y = norm.pdf(x, mu, sigma)
-
-    ax.plot(x, y, "k-", linewidth=1.5)
-
-    # Clean axes for bell curve
-    ax.spines["top"].set_visible(False)
-    ax.spines["right"].set_visible(False)
-    ax.spines["left"].set_visible(False)
-    ax.spines["bottom"].set_position(("data", 0))
-    ax.spines["bottom"].set_linewidth(1.0)
-    ax.set_yticks([])
-
-    # Mean and sigma marks
-    for k_val, lbl in [(0, f"${mu}$" if mu != 0 else "$m$")]:
-        ax.axvline(mu + k_val * sigma, ymax=0.03, color="k", linewidth=0.8)
-        ax.text(mu + k_val * sigma, -0.02, lbl,
-                ha="center", va="top", fontsize=9)
-
-    # Shaded region
-    if shade_from is not None and shade_to is not None:
-        x_fill = np.linspace(shade_from, shade_to, 300)
-        ax.fill_between(x_fill, norm.pdf(x_fill, mu, sigma),
-                         alpha=0.3, color="gray")
-
-    if label:
-        peak = norm.pdf(mu, mu, sigma)
-        ax.text(mu, peak + 0.02, f"${label}$", ha="center", fontsize=10)
-
-
 def _plot_number_line(ax, spec):
     """Plot number line with inequality solutions."""
     intervals = spec.get("intervals", [])  # [{from, to, open_left, open_right}]
@@ -1154,71 +1208,48 @@ def _plot_number_line(ax, spec):
     ax.annotate("", xy=(xlim[1], 0), xytext=(xlim[1] - 0.3, 0),
                 arrowprops=dict(arrowstyle="->", color="k", lw=1.0))
 
-    # Tick marks
-    for tick in range(int(xlim[0]), int(xlim[1]) + 1):
-        ax.plot(tick, 0, "|", color="k", markersize=8)
+    # Tick marks (one marker batch) and their labels
+    ticks = range(int(xlim[0]), int(xlim[1]) + 1)
+    ax.plot(ticks, [0] * len(ticks), "|", color="k", markersize=8)
+    for tick in ticks:
         ax.text(tick, -0.15, str(tick), ha="center", fontsize=8)
 
-    # Intervals
-    for iv in intervals:
-        fr, to = iv["from"], iv["to"]
-        ax.plot([fr, to], [0, 0], "k-", linewidth=3)
-        # Open/closed circles
-        for val, is_open in [(fr, iv.get("open_left", False)),
-                              (to, iv.get("open_right", False))]:
-            if is_open:
-                ax.plot(val, 0, "o", markersize=7, markerfacecolor="white",
-                        markeredgecolor="k", markeredgewidth=1.5, zorder=5)
-            else:
-                ax.plot(val, 0, "ko", markersize=5, zorder=5)
-
-    # Individual points
-    for pt in points:
-        is_open = pt.get("open", False)
-        if is_open:
-            ax.plot(pt["x"], 0, "o", markersize=7, markerfacecolor="white",
-                    markeredgecolor="k", markeredgewidth=1.5, zorder=5)
-        else:
-            ax.plot(pt["x"], 0, "ko", markersize=5, zorder=5)
+    # Intervals, with open/closed circles at their ends, and individual points
+    _segments(ax, [[(iv["from"], 0), (iv["to"], 0)] for iv in intervals], linewidth=3)
+    ends = [(iv["from"], iv.get("open_left", False)) for iv in intervals]
+    ends += [(iv["to"], iv.get("open_right", False)) for iv in intervals]
+    ends += [(pt["x"], pt.get("open", False)) for pt in points]
+    for hollow, size in ((False, 5), (True, 7)):
+        xs = [x for x, is_open in ends if is_open == hollow]
+        _markers(ax, xs, [0] * len(xs), markersize=size, hollow=hollow, zorder=5)
 
     ax.set_yticks([])
 
 
 def _plot_custom(ax, spec):
-    """Plot from custom expressions using eval (for flexibility)."""
+    """Plot from custom expressions (compiled and sandboxed by expr_compiler)."""
     xlim = spec.get("xlim", (-5, 5))
     ylim = spec.get("ylim", (-5, 5))
     label = spec.get("label", "")
 
     setup_exam_axes(ax, xlim=xlim, ylim=ylim)
 
-    x = np.linspace(xlim[0], xlim[1], 2000)
-
     for curve in spec.get("curves", []):
         expr = curve["expr"]
         style = curve.get("style", "k-")
         lw = curve.get("linewidth", 1.5)
-        # Evaluate expression safely
-        y = eval(expr, {"__builtins__": {}, "np": np, "x": x,
-                        "sin": np.sin, "cos": np.cos, "tan": np.tan,
-                        "exp": np.exp, "log": np.log, "sqrt": np.sqrt,
-                        "abs": np.abs, "pi": np.pi, "e": np.e})
-        if isinstance(y, (int, float)):
-            y = np.full_like(x, y)
-        ax.plot(x, y, style, linewidth=lw)
+        _plot_function(ax, compile_expression(expr), xlim, ylim, style, linewidth=lw)
         if "label" in curve:
             ax.text(0.95, 0.95 - 0.08 * spec.get("curves", []).index(curve),
                     f"${curve['label']}$", transform=ax.transAxes,
                     ha="right", va="top", fontsize=10)
 
-    for pt in spec.get("points", []):
-        is_open = pt.get("open", False)
-        if is_open:
-            ax.plot(pt["x"], pt["y"], "o", markersize=6,
-                    markerfacecolor="white", markeredgecolor="k",
-                    markeredgewidth=1.5, zorder=5)
-        else:
-            ax.plot(pt["x"], pt["y"], "ko", markersize=4, zorder=5)
+    points = spec.get("points", [])
+    for hollow, size in ((False, 4), (True, 6)):
+        group = [pt for pt in points if pt.get("open", False) == hollow]
+        _markers(ax, [pt["x"] for pt in group], [pt["y"] for pt in group],
+                 markersize=size, hollow=hollow, zorder=5)
+    for pt in points:
         if "label" in pt:
             ax.text(pt["x"] + 0.2, pt["y"] + 0.3, pt["label"], fontsize=8)
 
@@ -1233,18 +1264,10 @@ def _plot_custom(ax, spec):
     shade = spec.get("shade")
     if shade:
         x_fill = np.linspace(shade["from"], shade["to"], 500)
-        y_upper = eval(shade["upper"], {"__builtins__": {}, "np": np, "x": x_fill,
-                                         "sin": np.sin, "cos": np.cos,
-                                         "exp": np.exp, "log": np.log,
-                                         "sqrt": np.sqrt, "abs": np.abs,
-                                         "pi": np.pi, "e": np.e})
+        y_upper = compile_expression(shade["upper"])(x_fill)
         y_lower = shade.get("lower", 0)
         if isinstance(y_lower, str):
-            y_lower = eval(y_lower, {"__builtins__": {}, "np": np, "x": x_fill,
-                                      "sin": np.sin, "cos": np.cos,
-                                      "exp": np.exp, "log": np.log,
-                                      "sqrt": np.sqrt, "abs": np.abs,
-                                      "pi": np.pi, "e": np.e})
+            y_lower = compile_expression(y_lower)(x_fill)
         ax.fill_between(x_fill, y_upper, y_lower, alpha=0.25, color="gray")
 
     if label:
@@ -1252,10 +1275,251 @@ def _plot_custom(ax, spec):
                 ha="right", va="top", fontsize=10)
 
 
+# ---------------------------------------------------------------------------
+# Statistics graphs (확률과 통계)
+# ---------------------------------------------------------------------------
+# Densities and probabilities come from distributions.py (NumPy only).
+# Shaded regions are a list of {"from", "to"} intervals; a missing end
+# runs to the edge of the view. "label" writes text inside the region and
+# "hatch" (e.g. "//") draws it hatched instead of gray, to tell regions
+# apart in black and white.
+
+def _shade_intervals(spec):
+    """The "shade" list of a spec, or the single shade_from/shade_to pair."""
+    intervals = list(spec.get("shade", []))
+    if spec.get("shade_from") is not None and spec.get("shade_to") is not None:
+        intervals.append({"from": spec["shade_from"], "to": spec["shade_to"]})
+    return intervals
+
+
+def _interval_bounds(iv, xlim):
+    lo = xlim[0] if iv.get("from") is None else max(iv["from"], xlim[0])
+    hi = xlim[1] if iv.get("to") is None else min(iv["to"], xlim[1])
+    return lo, hi
+
+
+def _fill_under(ax, pdf, intervals, xlim):
+    """Shade the area under *pdf* over each interval, with optional labels.
+
+    Call after the y limits are set; label placement depends on them.
+    """
+    for iv in intervals:
+        lo, hi = _interval_bounds(iv, xlim)
+        if lo >= hi:
+            continue
+        x = np.linspace(lo, hi, 200)
+        y = pdf(x)
+        if iv.get("hatch"):
+            ax.fill_between(x, y, facecolor="none", edgecolor="k", hatch=iv["hatch"],
+                            linewidth=0)
+        else:
+            ax.fill_between(x, y, alpha=0.3, color="gray", linewidth=0)
+        if iv.get("label"):
+            # At the area's centroid, or above the curve with an arrow when
+            # the region is too thin for text (tails)
+            cx, cy = np.sum(x * y) / np.sum(y), np.sum(y * y) / (2 * np.sum(y))
+            top = ax.get_ylim()[1]
+            if cy > 0.2 * top:
+                ax.text(cx, cy, f"${iv['label']}$", ha="center", va="center", fontsize=8)
+            else:
+                ax.annotate(f"${iv['label']}$", xy=(cx, cy),
+                            xytext=(cx, float(pdf(cx)) + 0.2 * top),
+                            ha="center", va="bottom", fontsize=8,
+                            arrowprops={"arrowstyle": "-", "color": "k", "lw": 0.6})
+
+
+def _bell_axes(ax, xlim, peak):
+    """Bottom axis only, as in 정규분포 diagrams: no y axis, no frame."""
+    ax.set_xlim(xlim)
+    ax.set_ylim(0, peak * 1.15)
+    for side in ("top", "right", "left"):
+        ax.spines[side].set_visible(False)
+    ax.spines["bottom"].set_position(("data", 0))
+    ax.spines["bottom"].set_linewidth(1.0)
+    ax.set_yticks([])
+    ax.set_xticks([])
+
+
+def _axis_marks(ax, xs, labels, fontsize=9, row=0):
+    """Short ticks on the bottom axis with a row of labels below them."""
+    _segments(ax, [[(x, 0), (x, 0.03)] for x in xs], linewidth=0.8,
+              transform=ax.get_xaxis_transform())
+    for x, lbl in zip(xs, labels):
+        ax.text(x, -0.03 - 0.13 * row, lbl, transform=ax.get_xaxis_transform(),
+                ha="center", va="top", fontsize=fontsize)
+
+
+def _num(v):
+    """Number for a label: 60 rather than 60.0, at most 4 decimals."""
+    return f"{round(float(v), 4):g}"
+
+
+def _plot_normal(ax, spec):
+    """Plot normal distribution bell curve, with any number of shaded intervals."""
+    mu = spec.get("mu", 0)
+    sigma = spec.get("sigma", 1)
+    label = spec.get("label", "")
+    xlim = (mu - 4 * sigma, mu + 4 * sigma)
+    peak = float(normal_pdf(mu, mu, sigma))
+
+    def pdf(x):
+        return normal_pdf(x, mu, sigma)
+
+    _bell_axes(ax, xlim, peak)
+    _fill_under(ax, pdf, _shade_intervals(spec), xlim)
+    _plot_function(ax, pdf, xlim, None, "k-", linewidth=1.5)
+
+    # Mean, plus any extra marks (e.g. μ ± σ values)
+    marks = [m for m in spec.get("marks", []) if m != mu]
+    _axis_marks(ax, [mu] + marks, [f"${_num(mu)}$" if mu != 0 else "$m$"]
+                + [f"${_num(m)}$" for m in marks])
+
+    if label:
+        ax.text(mu, peak * 1.05, f"${label}$", ha="center", fontsize=10)
+
+
+def _plot_binomial(ax, spec):
+    """Bar chart of P(X = k), k = 0..n, for X ~ B(n, p).
+
+    "shade" intervals pick out bars (k from..to inclusive), "show_values"
+    writes each probability above its bar, and "normal_approx" overlays
+    the approximating normal curve N(np, np(1-p)) dashed.
+    """
+    n = spec.get("n", 10)
+    p = spec.get("p", 0.5)
+    if not isinstance(n, int) or n < 1 or not 0 <= p <= 1:
+        raise ValueError(f"binomial needs an integer n >= 1 and 0 <= p <= 1, got n={n}, p={p}")
+    label = spec.get("label", "")
+
+    k = np.arange(n + 1)
+    pmf = binomial_pmf(k, n, p)
+    picked = np.zeros(n + 1, dtype=bool)
+    for iv in _shade_intervals(spec):
+        lo, hi = _interval_bounds(iv, (0, n))
+        picked |= (k >= lo) & (k <= hi)
+
+    ax.bar(k, pmf, width=0.6, color=np.where(picked, "0.6", "white"),
+           edgecolor="k", linewidth=0.8)
+    if spec.get("normal_approx", False) and 0 < p < 1:
+        mean, sd = binomial_moments(n, p)
+        _plot_function(ax, lambda x: normal_pdf(x, mean, sd), (-0.5, n + 0.5), None,
+                       "k--", linewidth=1.0)
+    if spec.get("show_values", False):
+        for kk, prob in zip(k, pmf):
+            ax.text(kk, prob + pmf.max() * 0.02, f"{prob:.3f}", ha="center", va="bottom",
+                    fontsize=6, rotation=90 if n > 6 else 0)
+
+    ax.set_xlim(-0.7, n + 0.7)
+    ax.set_ylim(0, pmf.max() * (1.3 if spec.get("show_values", False) else 1.12))
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.xaxis.set_major_locator(mpl.ticker.MaxNLocator(11, integer=True))
+    ax.tick_params(labelsize=8, direction="in")
+    ax.text(1.02, 0, "$x$", transform=ax.transAxes, ha="left", va="center", fontsize=10)
+    ax.text(0, 1.02, "$P(X=x)$", transform=ax.transAxes, ha="center", va="bottom", fontsize=9)
+
+    if label:
+        ax.text(0.95, 0.95, f"${label}$", transform=ax.transAxes,
+                ha="right", va="top", fontsize=10)
+
+
+def _plot_standardization(ax, spec):
+    """One bell curve read on two scales: X ~ N(mu, sigma²) and Z = (X - mu)/sigma.
+
+    "values" (in X units) are marked with their x value on the first row
+    and the matching z value on the second; "shade" is in X units too.
+    """
+    mu = spec.get("mu", 0)
+    sigma = spec.get("sigma", 1)
+    values = spec.get("values", [mu - sigma, mu, mu + sigma])
+    xlim = (mu - 3.8 * sigma, mu + 3.8 * sigma)
+
+    def pdf(x):
+        return normal_pdf(x, mu, sigma)
+
+    _bell_axes(ax, xlim, float(pdf(mu)))
+    _fill_under(ax, pdf, _shade_intervals(spec), xlim)
+    _plot_function(ax, pdf, xlim, None, "k-", linewidth=1.5)
+
+    _axis_marks(ax, values, [f"${_num(v)}$" for v in values], row=0)
+    _axis_marks(ax, values, [f"${_num((v - mu) / sigma)}$" for v in values], row=1)
+    for row, name in enumerate(("X", "Z")):
+        ax.text(xlim[0], -0.03 - 0.13 * row, f"${name}$", transform=ax.get_xaxis_transform(),
+                ha="left", va="top", fontsize=9)
+
+    if spec.get("label"):
+        ax.text(0.98, 0.95, f"${spec['label']}$", transform=ax.transAxes,
+                ha="right", va="top", fontsize=9)
+
+
+def _plot_normal_table(ax, spec):
+    """Standard normal curve with P(0 ≤ Z ≤ z) shaded, beside its table.
+
+    The table lists P(0 ≤ Z ≤ z) for "z_values" (z with as many decimals
+    as the most precise value, probabilities with 4), the way
+    표준정규분포표 appear in 확률과 통계 problems. Without a "shade"
+    list the area from 0 to "z" (default: the largest z value) is shaded.
+    """
+    z_values = spec.get("z_values", [0.5, 1.0, 1.5, 2.0])
+    if not z_values:
+        raise ValueError("normal_table needs at least one value in z_values")
+    z = spec.get("z", max(z_values))
+    shade = _shade_intervals(spec) or [{"from": 0, "to": z}]
+    curve_lim = (-3.5, 3.5)
+    xlim = (curve_lim[0], curve_lim[1] + 6.0)  # right part holds the table
+
+    _bell_axes(ax, xlim, float(normal_pdf(0)))
+    ax.spines["bottom"].set_bounds(*curve_lim)
+    _fill_under(ax, normal_pdf, shade, curve_lim)
+    _plot_function(ax, normal_pdf, curve_lim, None, "k-", linewidth=1.5)
+    _axis_marks(ax, [0, z], ["$0$", "$z$"])
+
+    probs = normal_cdf(np.asarray(z_values, dtype=float)) - 0.5
+    # z as given (1.96 stays 1.96), all with the same number of decimals
+    digits = max(1, *(len(_num(zv).partition(".")[2]) for zv in z_values))
+    rows = [[f"{zv:.{digits}f}", f"{pv:.4f}"] for zv, pv in zip(z_values, probs)]
+    table = ax.table(cellText=rows,
+                     colLabels=["$z$", r"$P(0 \leq Z \leq z)$"],
+                     cellLoc="center", bbox=[0.62, 0.1, 0.38, 0.8])
+    table.auto_set_font_size(False)
+    table.set_fontsize(7)
+    for cell in table.get_celld().values():
+        cell.set_linewidth(0.6)
+
+
 # ---------------------------------------------------------------------------
 # Graph type dispatcher
 # ---------------------------------------------------------------------------
 
+# Exact render mode: room for ticks/labels around the axes, in inches at
+# the design figure size — (left, bottom, right, top). Measured from tight
+# bounding boxes of typical specs plus the 0.05 in tight-mode padding.
+_EXAM_AXES_MARGINS = (0.28, 0.25, 0.18, 0.25)
+_GEOMETRY_MARGINS = (0.05, 0.05, 0.05, 0.05)
+_EXACT_MARGINS = {
+    "number_line": (0.10, 0.29, 0.09, 0.05),
+    "normal": (0.10, 0.25, 0.10, 0.25),
+    "binomial": (0.45, 0.30, 0.20, 0.25),
+    "standardization": (0.15, 0.45, 0.10, 0.10),
+    "normal_table": (0.10, 0.25, 0.10, 0.10),
+    "triangle": _GEOMETRY_MARGINS,
+    "circle": _GEOMETRY_MARGINS,
+    "quadrilateral": _GEOMETRY_MARGINS,
+    "solid3d": _GEOMETRY_MARGINS,
+}
+
+
+def _exact_margins(graph_type, figsize):
+    """Subplot parameters for an exact render of *graph_type*."""
+    left, bottom, right, top = _EXACT_MARGINS.get(graph_type, _EXAM_AXES_MARGINS)
+    width, height = figsize
+    # Keep at least a sliver of axes on very flat or narrow figures
+    fx = min(1.0, 0.9 * width / (left + right))
+    fy = min(1.0, 0.9 * height / (bottom + top))
+    return {"left": left * fx / width, "right": 1 - right * fx / width,
+            "bottom": bottom * fy / height, "top": 1 - top * fy / height}
+
+
 GRAPH_TYPES = {
     "polynomial": _plot_polynomial,
     "quadratic": _plot_quadratic,
@@ -1266,6 +1530,9 @@ GRAPH_TYPES = {
     "derivative": _plot_derivative,
     "integral_area": _plot_integral_area,
     "normal": _plot_normal,
+    "binomial": _plot_binomial,
+    "standardization": _plot_standardization,
+    "normal_table": _plot_normal_table,
     "number_line": _plot_number_line,
     "custom": _plot_custom,
     # Geometry shapes
@@ -1277,37 +1544,121 @@ GRAPH_TYPES = {
 }
 
 
+def _render(spec: dict, target, fmt: str | None = None) -> None:
+    """Draw *spec* and save it to *target* (a path or a binary file object).
+
+    *fmt* None takes the image format from the path's extension.
+    """
+    graph_type = spec.get("type", "custom")
+
+    if graph_type not in GRAPH_TYPES:
+        raise ValueError(f"Unknown graph type: {graph_type}. "
+                         f"Available: {list(GRAPH_TYPES.keys())}")
+
+    figsize = design_figsize(spec)
+    if render_mode(spec) == "exact":
+        # Lay out at the design width (same text/line proportions as a tight
+        # render) with the target aspect ratio, and pick the dpi that lands
+        # on the exact pixel size; fixed margins replace the tight bbox pass
+        px_w, px_h = graph_size_px(spec)
+        dpi = px_w / figsize[0]
+        figsize = ((px_w + 0.01) / dpi, (px_h + 0.01) / dpi)
+        margins = _exact_margins(graph_type, figsize)
+        save_kwargs = {}
+    else:
+        dpi = 300
+        margins = None
+        save_kwargs = {"bbox_inches": "tight", "pad_inches": 0.05}
+
+    with _exam_style():
+        fig, ax = _acquire_fig(figsize, dpi, margins)
+        try:
+            GRAPH_TYPES[graph_type](ax, spec)
+            fig.savefig(target, format=fmt, dpi=dpi, facecolor="white",
+                        transparent=False, **save_kwargs)
+        finally:
+            _release_fig(fig, figsize, dpi)
+
+
+def _fast_png(spec: dict) -> bytes | None:
+    """PNG bytes from fast_raster for a "fast" renderer spec it can draw, else None."""
+    if graph_renderer(spec) != "fast":
+        return None
+    from fast_raster import render_png
+
+    return render_png(spec)
+
+
 def generate_graph(spec: dict, output_path: str | Path) -> Path:
     """Generate a graph PNG from specification.
 
     Args:
         spec: Graph specification dict with "type" key and type-specific params.
-              Common keys: xlim, ylim, label, points
+              Common keys: xlim, ylim, label, points. With "render": "exact"
+              the PNG is width_hu × height_hu at print_dpi (see graph_sizing);
+              with "renderer": "fast" simple function graphs are drawn by
+              fast_raster instead of matplotlib.
         output_path: Where to save the PNG.
 
     Returns:
         Path to the generated PNG file.
+
+    Safe to call from several threads at once: figures come from a
+    per-thread pool, and the rc_context styling is held under a lock for
+    the whole render, so matplotlib drawing itself is serialized.
     """
     output_path = Path(output_path)
-    graph_type = spec.get("type", "custom")
+    png = _fast_png(spec) if output_path.suffix.lower() == ".png" else None
+    if png is not None:
+        output_path.write_bytes(png)
+    else:
+        _render(spec, str(output_path))
+    return output_path
 
-    if graph_type not in GRAPH_TYPES:
-        raise ValueError(f"Unknown graph type: {graph_type}. "
-                         f"Available: {list(GRAPH_TYPES.keys())}")
 
-    _default_sizes = {
-        "number_line": (3.5, 0.6),
-        "normal": (3.0, 2.0),
-    }
-    figsize = spec.get("figsize", _default_sizes.get(graph_type, (2.8, 2.8)))
+def render_graph_bytes(spec: dict) -> memoryview:
+    """Render *spec* to PNG in memory and return the encoded bytes.
 
-    fig, ax = _new_fig(figsize=figsize, dpi=300)
-    GRAPH_TYPES[graph_type](ax, spec)
+    The memoryview wraps the output buffer directly (no copy); it can be
+    passed to ZipFile.writestr, hashed, or turned into bytes().
+    """
+    png = _fast_png(spec)
+    if png is not None:
+        return memoryview(png)
+    buf = io.BytesIO()
+    _render(spec, buf, fmt="png")
+    return buf.getbuffer()
 
-    fig.savefig(str(output_path), dpi=300, bbox_inches="tight",
-                pad_inches=0.05, facecolor="white", transparent=False)
-    plt.close(fig)
-    return output_path
+
+# One long-lived pool for render_many: its threads keep their figure pools
+# warm across calls. Created on first use and shut down at exit.
+_RENDER_WORKERS = min(4, os.cpu_count() or 1)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _render_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(_RENDER_WORKERS, thread_name_prefix="graph")
+            atexit.register(_executor.shutdown)
+        return _executor
+
+
+def render_many(specs: list[dict], executor: Executor | None = None) -> list[memoryview]:
+    """Render several specs to PNG bytes, in order, on a thread pool.
+
+    Without *executor* the module's shared pool is used; its worker
+    threads outlive the call, so their figure pools are reused by the next
+    batch. An error in any spec is raised once the earlier specs are done.
+    """
+    specs = list(specs)
+    if executor is None:
+        if _RENDER_WORKERS <= 1 or len(specs) <= 1:
+            return [render_graph_bytes(spec) for spec in specs]
+        executor = _render_executor()
+    return list(executor.map(render_graph_bytes, specs))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Graph size conventions shared by rendering and document layout.
+
+graph_generator needs the design figure size of each graph type and, in
+"exact" render mode, the size the picture will occupy in the document;
+table_layout and page_layout need that same display size in HWPUNIT.
+Keeping both here guarantees the PNG is rendered at the pixel size it
+is shown at.
+
+Render modes (spec "render", or data "graph_render" / --graph-render):
+- "tight" (default): 300 dpi, bbox_inches="tight"; Hangul scales the PNG
+  to width_hu × height_hu (both default to 11340 HU ≈ 40 mm)
+- "exact": the PNG is width_hu × height_hu at print_dpi pixels, drawn in
+  one pass with fixed margins. A missing height_hu (or width_hu) follows
+  the aspect ratio of the type's design figure size.
+
+Renderers (spec "renderer", or data "graph_renderer" / --graph-renderer):
+- "matplotlib" (default): every PNG is drawn by graph_generator
+- "fast": FAST_TYPES are drawn by fast_raster without matplotlib; a spec
+  using anything fast_raster does not draw falls back to matplotlib
+"""
+
+HU_PER_INCH = 7200
+DEFAULT_GRAPH_HU = 11340        # ~40 mm
+DEFAULT_PRINT_DPI = 300
+RENDER_MODES = ("tight", "exact")
+BACKENDS = ("png", "native")
+NATIVE_TYPES = ("triangle", "quadrilateral", "coordinate", "number_line")
+RENDERERS = ("matplotlib", "fast")
+FAST_TYPES = ("polynomial", "quadratic", "trig", "exp_log", "rational", "number_line")
+
+DEFAULT_FIGSIZE = (2.8, 2.8)    # inches
+DEFAULT_FIGSIZES = {
+    "number_line": (3.5, 0.6),
+    "normal": (3.0, 2.0),
+    "binomial": (3.0, 2.2),
+    "standardization": (3.0, 2.2),
+    "normal_table": (4.2, 2.0),
+}
+
+
+def design_figsize(spec: dict) -> tuple[float, float]:
+    """Figure size in inches that graph_generator lays the graph out at."""
+    graph_type = spec.get("type", "custom")
+    return tuple(spec.get("figsize", DEFAULT_FIGSIZES.get(graph_type, DEFAULT_FIGSIZE)))
+
+
+def render_mode(spec: dict) -> str:
+    mode = spec.get("render", "tight")
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {mode}. Available: {list(RENDER_MODES)}")
+    return mode
+
+
+def graph_backend(spec: dict) -> str:
+    """"native" if *spec* is drawn as HWPX drawing objects, else "png"."""
+    backend = spec.get("backend", "png")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown graph backend: {backend}. Available: {list(BACKENDS)}")
+    if backend == "native" and spec.get("type", "custom") not in NATIVE_TYPES:
+        return "png"
+    return backend
+
+
+def graph_renderer(spec: dict) -> str:
+    """"fast" if *spec* should try fast_raster first, else "matplotlib"."""
+    renderer = spec.get("renderer", "matplotlib")
+    if renderer not in RENDERERS:
+        raise ValueError(f"Unknown graph renderer: {renderer}. Available: {list(RENDERERS)}")
+    if renderer == "fast" and spec.get("type", "custom") not in FAST_TYPES:
+        return "matplotlib"
+    return renderer
+
+
+def graph_size_hu(spec: dict) -> tuple[int, int]:
+    """Display size (width, height) of a graph picture in HWPUNIT."""
+    width = spec.get("width_hu")
+    height = spec.get("height_hu")
+    if render_mode(spec) != "exact" and graph_backend(spec) != "native":
+        return width or DEFAULT_GRAPH_HU, height or DEFAULT_GRAPH_HU
+
+    fig_w, fig_h = design_figsize(spec)
+    if width is None and height is None:
+        width = DEFAULT_GRAPH_HU
+    if width is None:
+        width = round(height * fig_w / fig_h)
+    if height is None:
+        height = round(width * fig_h / fig_w)
+    return int(width), int(height)
+
+
+def graph_size_px(spec: dict) -> tuple[int, int]:
+    """Pixel size of an "exact" render: display size at print_dpi."""
+    dpi = spec.get("print_dpi", DEFAULT_PRINT_DPI)
+    width_hu, height_hu = graph_size_hu(spec)
+    return (max(1, round(width_hu * dpi / HU_PER_INCH)),
+            max(1, round(height_hu * dpi / HU_PER_INCH)))
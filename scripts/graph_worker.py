@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Render graphs in a worker subprocess with a time and memory limit.
+
+A graph spec that allocates a huge array or never finishes would
+otherwise stall or kill the whole build. GraphWorker keeps one child
+process that renders specs one at a time (so matplotlib is imported
+once, not per graph):
+
+- each render gets a wall-clock timeout; past it the child is killed and
+  a fresh one is started for the next graph
+- the child's address space is capped with RLIMIT_AS (POSIX), so a
+  runaway allocation fails inside the child as MemoryError
+- a child that dies (segfault, OOM killer) is replaced the same way
+
+Failures come back as GraphFailure, including any exception other than
+ValueError raised while rendering; a ValueError from the spec itself
+(unknown type, bad expression) is re-raised as ValueError. The build
+treats graphs rendered in-process the same way. placeholder_png() gives a stand-in picture of the
+right size so a build can carry on without the graph.
+
+Provides:
+- render_png_bytes: PNG bytes of a spec in this process (fast renderer first)
+- GraphWorker: the isolated renderer (context manager)
+- GraphFailure: timeout, memory limit or crash of one render
+- placeholder_png: framed empty PNG the size the graph would have had
+"""
+
+import io
+import multiprocessing
+
+from graph_sizing import design_figsize, graph_renderer, graph_size_px, render_mode
+
+_START_METHOD = "spawn"  # the child imports matplotlib itself; no forked state
+
+
+class GraphFailure(Exception):
+    """A graph could not be rendered within the worker's limits."""
+
+
+def render_png_bytes(spec: dict) -> bytes | memoryview:
+    """Render *spec* to PNG in this process.
+
+    Specs on the "fast" renderer go to fast_raster first, so matplotlib is
+    only imported when a graph actually needs it.
+    """
+    if graph_renderer(spec) == "fast":
+        from fast_raster import render_png
+
+        png = render_png(spec)
+        if png is not None:
+            return png
+    from graph_generator import render_graph_bytes
+
+    return render_graph_bytes(spec)
+
+
+# ---------------------------------------------------------------------------
+# Child process
+# ---------------------------------------------------------------------------
+
+def _limit_memory(memory_mb: int) -> None:
+    try:
+        import resource
+    except ImportError:  # Windows: no rlimits, the timeout still applies
+        return
+    limit = memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _serve(conn, memory_mb: int | None) -> None:
+    """Child main loop: receive a spec, send back ("ok" | error kind, payload).
+
+    "ready" is sent once the renderer is imported, so start-up time does
+    not count against the first graph's timeout.
+    """
+    if memory_mb:
+        _limit_memory(memory_mb)
+    try:
+        # Import up front: start-up must not count against the first timeout
+        import graph_generator  # noqa: F401
+    except (ImportError, MemoryError) as e:  # NumPy reports a failed malloc as ImportError
+        first_line = next((line for line in str(e).splitlines() if line.strip()), "")
+        conn.send(("start", f"{type(e).__name__}: {first_line}"))
+        return
+    conn.send(("ready", None))
+    while True:
+        try:
+            spec = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        try:
+            reply = ("ok", bytes(render_png_bytes(spec)))
+        except ValueError as e:
+            reply = ("value", str(e))
+        except MemoryError:
+            reply = ("memory", None)
+        except Exception as e:  # anything else fails this graph only
+            reply = ("error", f"{type(e).__name__}: {e}")
+        conn.send(reply)
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+class GraphWorker:
+    """Render specs in a child process, restarting it after a failure.
+
+    timeout is seconds of wall-clock time per graph (None: no limit);
+    memory_mb caps the child's address space. Interpreter, NumPy and
+    matplotlib take a few hundred MB of address space by themselves, so
+    limits below ~1024 MB can fail every graph.
+    """
+
+    def __init__(self, timeout: float | None = None, memory_mb: int | None = None):
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._ctx = multiprocessing.get_context(_START_METHOD)
+        self._proc = None
+        self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _start(self) -> None:
+        parent, child = self._ctx.Pipe()
+        self._proc = self._ctx.Process(target=_serve, args=(child, self.memory_mb),
+                                       name="graph-worker", daemon=True)
+        self._proc.start()
+        child.close()
+        self._conn = parent
+        try:
+            kind, detail = self._conn.recv()
+        except EOFError:
+            kind, detail = "died", None
+        if kind != "ready":
+            self._kill()
+            limit = f" within {self.memory_mb} MB" if self.memory_mb else ""
+            raise GraphFailure(f"worker process could not start{limit}"
+                               + (f": {detail}" if detail else ""))
+
+    def _kill(self) -> None:
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.join()
+            self._conn.close()
+        self._proc = self._conn = None
+
+    def close(self) -> None:
+        """Stop the child (it exits when its end of the pipe closes)."""
+        if self._proc is not None:
+            self._conn.close()
+            self._proc.join(timeout=5)
+            if self._proc.is_alive():
+                self._proc.kill()
+                self._proc.join()
+        self._proc = self._conn = None
+
+    def render(self, spec: dict) -> bytes:
+        """PNG bytes of *spec*; GraphFailure or ValueError if it fails."""
+        if self._proc is None or not self._proc.is_alive():
+            self._kill()
+            self._start()
+        try:
+            self._conn.send(spec)
+        except OSError as e:  # BrokenPipeError: the child died after is_alive()
+            self._kill()
+            raise GraphFailure(f"worker process died ({e})")
+        if not self._conn.poll(self.timeout):
+            self._kill()
+            raise GraphFailure(f"timed out after {self.timeout:g} s")
+        try:
+            kind, payload = self._conn.recv()
+        except EOFError:
+            self._proc.join(timeout=1)
+            code = self._proc.exitcode
+            self._kill()
+            raise GraphFailure(f"worker process died (exit code {code})")
+        if kind == "ok":
+            return payload
+        if kind == "value":
+            raise ValueError(payload)
+        if kind == "memory":
+            raise GraphFailure(f"exceeded the memory limit of {self.memory_mb} MB")
+        raise GraphFailure(payload)
+
+
+# ---------------------------------------------------------------------------
+# Placeholder
+# ---------------------------------------------------------------------------
+
+def placeholder_png(spec: dict) -> bytes:
+    """White PNG with a gray frame and cross, sized like the graph's render."""
+    from PIL import Image, ImageDraw
+
+    if render_mode(spec) == "exact":
+        width, height = graph_size_px(spec)
+    else:
+        fig_w, fig_h = design_figsize(spec)
+        width, height = round(fig_w * 300), round(fig_h * 300)
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    line = max(1, min(width, height) // 150)
+    draw.rectangle((0, 0, width - 1, height - 1), outline=160, width=line)
+    draw.line((0, 0, width - 1, height - 1), fill=200, width=line)
+    draw.line((0, height - 1, width - 1, 0), fill=200, width=line)
+    buf = io.BytesIO()
+    img.save(buf, format="png", dpi=(300, 300))
+    return buf.getvalue()
+
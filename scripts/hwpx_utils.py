@@ -12,6 +12,8 @@ from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 
 from lxml import etree
 
+from profiling import span
+
 
 def validate_xml(filepath: Path) -> None:
     """Check that an XML file is well-formed."""
@@ -55,11 +57,18 @@ def update_metadata(content_hpf: Path, title: str | None, creator: str | None) -
     tree.write(str(content_hpf), pretty_print=True, xml_declaration=True, encoding="UTF-8")
 
 
-def pack_hwpx(input_dir: Path, output_path: Path) -> None:
-    """Create HWPX archive with mimetype as first entry (ZIP_STORED)."""
+def pack_hwpx(input_dir: Path, output_path: Path,
+              entries: dict[str, bytes] | None = None) -> None:
+    """Create HWPX archive with mimetype as first entry (ZIP_STORED).
+
+    *entries* maps archive names to in-memory content (e.g. rendered graph
+    PNGs) written alongside the files of *input_dir*; an entry replaces a
+    file of the same name.
+    """
     mimetype_file = input_dir / "mimetype"
     if not mimetype_file.is_file():
         raise SystemExit(f"Missing 'mimetype' in {input_dir}")
+    entries = entries or {}
 
     all_files = sorted(
         p.relative_to(input_dir).as_posix()
@@ -69,10 +78,14 @@ def pack_hwpx(input_dir: Path, output_path: Path) -> None:
 
     with ZipFile(output_path, "w", ZIP_DEFLATED) as zf:
         zf.write(mimetype_file, "mimetype", compress_type=ZIP_STORED)
-        for rel_path in all_files:
+        for rel_path in sorted(set(all_files) | set(entries)):
             if rel_path == "mimetype":
                 continue
-            zf.write(input_dir / rel_path, rel_path, compress_type=ZIP_DEFLATED)
+            with span("zip_entry", name=rel_path, memory=rel_path in entries):
+                if rel_path in entries:
+                    zf.writestr(rel_path, entries[rel_path], compress_type=ZIP_DEFLATED)
+                else:
+                    zf.write(input_dir / rel_path, rel_path, compress_type=ZIP_DEFLATED)
 
 
 def validate_hwpx(hwpx_path: Path) -> list[str]:
@@ -118,7 +131,7 @@ def validate_hwpx(hwpx_path: Path) -> list[str]:
 
 
 def _add_images_to_manifest(hpf_path: Path, image_ids: dict,
-                              problems: list) -> None:
+                              problems: list | None = None) -> None:
     """Add image entries to content.hpf manifest for graph PNGs."""
     tree = etree.parse(str(hpf_path))
     root = tree.getroot()
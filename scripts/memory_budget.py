@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Per-stage memory report and budgets for builds.
+
+MemoryMonitor listens to the profiling spans build() records (problem
+loading, section assembly, each graph render, packing, ...) and measures
+two things per stage:
+
+- traced: peak growth of Python/NumPy allocations over the stage, from
+  tracemalloc (the peak counter is reset per span, nested spans fold
+  their peak into the enclosing one)
+- rss: peak resident set size of the process during the stage, sampled
+  from a background thread every few milliseconds (Linux /proc; elsewhere
+  only ru_maxrss at the end is known and this column stays empty)
+
+Budgets are in MB: "rss" limits the process RSS at any stage end, any
+other key limits the traced growth of that stage (e.g. graph=64). When a
+budget is exceeded the action is either
+- "fail": raise MemoryBudgetExceeded (the build stops), or
+- "degrade": warn once and switch to the low-memory strategy for the rest
+  of the build: figure pool and render caches are dropped and remaining
+  graphs render in a graph_worker subprocess, outside this process.
+
+tracemalloc slows Python code noticeably; this is a diagnostic mode.
+Spans are assumed to come from one thread (build() is single-threaded).
+
+Provides:
+- MemoryMonitor: context manager; report() gives the per-stage table
+- MemoryBudgetExceeded: raised by the "fail" action
+- parse_budgets: "800" or "rss=800,graph=64" → {"rss": 800.0, "graph": 64.0}
+- degraded: whether the active monitor switched to the low-memory strategy
+
+Usage:
+    with MemoryMonitor({"rss": 800, "graph": 64}, action="degrade") as mon:
+        build(...)
+    print(mon.report())
+"""
+
+import gc
+import os
+import sys
+import threading
+import tracemalloc
+
+from profiling import add_listener, remove_listener
+
+ACTIONS = ("fail", "degrade")
+_MB = 1024 * 1024
+_RSS_INTERVAL = 0.005  # seconds between RSS samples
+
+_active = None
+
+
+class MemoryBudgetExceeded(Exception):
+    """A stage went over its memory budget with action "fail"."""
+
+
+def parse_budgets(text: str) -> dict[str, float]:
+    """Budgets from "MB" (RSS) or "stage=MB,..." ("rss" for the process)."""
+    budgets = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        stage, _, value = part.rpartition("=")
+        try:
+            budgets[stage.strip() or "rss"] = float(value)
+        except ValueError:
+            raise ValueError(f"bad memory budget {part!r}: expected MB or stage=MB") from None
+    return budgets
+
+
+def degraded() -> bool:
+    """True once the active monitor has switched to the low-memory strategy."""
+    return _active is not None and _active.degraded
+
+
+def _rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Frame:
+    __slots__ = ("name", "args", "start", "peak", "rss")
+
+    def __init__(self, name, args, start, rss):
+        self.name, self.args, self.start, self.peak, self.rss = name, args, start, start, rss
+
+
+class MemoryMonitor:
+    """Record per-stage memory peaks while active; enforce *budgets* (MB)."""
+
+    def __init__(self, budgets: dict[str, float] | None = None, action: str = "fail"):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown memory budget action: {action}. Available: {list(ACTIONS)}")
+        self.budgets = dict(budgets or {})
+        self.action = action
+        self.degraded = False
+        self.exceeded = []   # (stage, measure, peak MB, budget MB, args)
+        self.stages = {}     # name → [calls, max traced MB, max rss MB, args of max]
+        self._stack = []
+        self._rss_window = 0  # highest RSS sampled since the last span boundary
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._started_tracing = False
+
+    # Lifecycle --------------------------------------------------------------
+
+    def __enter__(self):
+        global _active
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if _rss_bytes() is not None:
+            self._rss_window = _rss_bytes()
+            self._sampler = threading.Thread(target=self._sample, name="rss-sampler",
+                                             daemon=True)
+            self._sampler.start()
+        add_listener(self._on_end, self._on_start)
+        _active = self
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        _active = None
+        remove_listener(self._on_end, self._on_start)
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(_RSS_INTERVAL):
+            rss = _rss_bytes()
+            with self._lock:
+                self._rss_window = max(self._rss_window, rss)
+
+    def _take_rss_window(self) -> int:
+        """Peak RSS since the last boundary; starts a new window at the current RSS."""
+        now = _rss_bytes() or 0
+        with self._lock:
+            peak, self._rss_window = max(self._rss_window, now), now
+        return peak
+
+    # Span hooks -------------------------------------------------------------
+
+    def _on_start(self, name: str, args: dict) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        rss = self._take_rss_window()
+        if self._stack:
+            parent = self._stack[-1]
+            parent.peak = max(parent.peak, peak)
+            parent.rss = max(parent.rss, rss)
+        self._stack.append(_Frame(name, args, current, rss))
+        tracemalloc.reset_peak()
+
+    def _on_end(self, name: str, seconds: float, args: dict) -> None:
+        if not self._stack or self._stack[-1].name != name:
+            return  # span opened before the monitor started
+        _, peak = tracemalloc.get_traced_memory()
+        frame = self._stack.pop()
+        frame.peak = max(frame.peak, peak)
+        frame.rss = max(frame.rss, self._take_rss_window())
+        if self._stack:
+            parent = self._stack[-1]
+            parent.peak = max(parent.peak, frame.peak)
+            parent.rss = max(parent.rss, frame.rss)
+        tracemalloc.reset_peak()
+
+        traced_mb = (frame.peak - frame.start) / _MB
+        rss_mb = frame.rss / _MB if self._sampler is not None else None
+        row = self.stages.setdefault(name, [0, 0.0, None, {}])
+        row[0] += 1
+        if traced_mb >= row[1]:
+            row[1], row[3] = traced_mb, args
+        if rss_mb is not None:
+            row[2] = max(row[2] or 0.0, rss_mb)
+        self._check(name, traced_mb, rss_mb, args)
+
+    # Budgets ----------------------------------------------------------------
+
+    def _check(self, name, traced_mb, rss_mb, args) -> None:
+        over = []
+        if name in self.budgets and traced_mb > self.budgets[name]:
+            over.append(("traced", traced_mb, self.budgets[name]))
+        if "rss" in self.budgets and rss_mb is not None and rss_mb > self.budgets["rss"]:
+            over.append(("rss", rss_mb, self.budgets["rss"]))
+        for measure, peak, budget in over:
+            self.exceeded.append((name, measure, peak, budget, args))
+            tag = "".join(f" {k}={v}" for k, v in args.items())
+            message = (f"memory budget exceeded in {name}{tag}: {measure} "
+                       f"{peak:.1f} MB > {budget:g} MB")
+            if self.action == "fail":
+                raise MemoryBudgetExceeded(message)
+            if not self.degraded:
+                print(f"WARNING: {message}; switching to low-memory mode", file=sys.stderr)
+                self._degrade()
+
+    def _degrade(self) -> None:
+        """Free what this process holds on to; graphs move to a worker process."""
+        self.degraded = True
+        gg = sys.modules.get("graph_generator")
+        if gg is not None:
+            gg.clear_figure_pool()
+        for module, func in (("fast_raster", "_glyphs"), ("expr_compiler", "compile_expression")):
+            mod = sys.modules.get(module)
+            if mod is not None:
+                getattr(mod, func).cache_clear()
+        gc.collect()
+
+    # Report -----------------------------------------------------------------
+
+    def report(self) -> str:
+        """Per-stage table of peak traced growth and peak RSS, worst call tagged."""
+        lines = [f"{'stage':<16} {'calls':>6} {'traced (MB)':>12} {'rss (MB)':>9}  worst"]
+        for name, (calls, traced, rss, args) in sorted(self.stages.items(),
+                                                       key=lambda r: -r[1][1]):
+            worst = " ".join(f"{k}={v}" for k, v in args.items())
+            rss_text = f"{rss:>9.1f}" if rss is not None else f"{'-':>9}"
+            lines.append(f"{name:<16} {calls:>6} {traced:>12.2f} {rss_text}  {worst}")
+        try:
+            import resource
+        except ImportError:  # Windows: no getrusage, the stage table still applies
+            max_rss_text = "-"
+        else:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            scale = 1 if sys.platform == "darwin" else 1024  # bytes on macOS, KiB elsewhere
+            max_rss_text = f"{max_rss * scale / _MB:.1f} MB"
+        lines.append(f"process max RSS: {max_rss_text}"
+                     + (" (low-memory mode used)" if self.degraded else ""))
+        return "\n".join(lines)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Prometheus metrics for builds running inside a long-lived service.
+
+A process-wide registry of counters and histograms, recorded on the hot
+path (a lock, a dict update and, for histograms, one bisect) and exposed
+in the Prometheus text format (version 0.0.4):
+
+- render_text(): the exposition as a string
+- write_textfile(path): atomic write for node_exporter's textfile collector
+- serve(port): /metrics on a local HTTP endpoint (daemon thread)
+
+Stage latencies come from the profiling spans build() already records,
+once enable() has registered a span listener: serve() does so, and so
+does the CLI for --metrics-textfile. Until then spans stay on their
+no-op path and only the counters above are recorded. Hit/miss counts of the in-process lru caches
+(custom expressions, equation sizes, fast renderer glyphs) are read from
+cache_info() at exposition time, so they cost nothing while building.
+Graphs rendered in a graph_worker subprocess count their own caches there,
+not here.
+
+Provides:
+- Counter, Histogram: metric types (labels passed as keyword arguments)
+- DOCUMENTS, PROBLEMS, GRAPHS, STAGE_SECONDS, CACHE_REQUESTS, OUTPUT_BYTES,
+  GRAPH_BYTES, GRAPH_FAILURES, VALIDATION_FAILURES: the build metrics
+- enable: start recording stage latencies from profiling spans
+- render_text, write_textfile, serve: exposition
+
+Usage:
+    python build_math_hwpx.py -p p.json -o exam.hwpx --metrics-textfile /var/lib/node_exporter/math_hwpx.prom
+
+    import metrics
+    metrics.serve(9464)       # enables stage timing; then call build() as requests come in
+"""
+
+import bisect
+import math
+import os
+import sys
+import threading
+from pathlib import Path
+
+from profiling import add_listener
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _label_text(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        try:
+            return tuple(labels[n] for n in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"{self.name}: missing label {e}") from None
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += self._samples()
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic count; extra sources add samples computed at exposition."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._sources = []
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def add_source(self, source) -> None:
+        """*source*() returns {label values tuple: count}, read when rendering."""
+        self._sources.append(source)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+        if not self.labelnames:
+            values.setdefault((), 0)
+        for source in self._sources:
+            for key, count in source().items():
+                values[key] = values.get(key, 0) + count
+        return [f"{self.name}{_label_text(self.labelnames, key)} {_number(v)}"
+                for key, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with _bucket, _sum and _count series."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, n) for key, (counts, total, n)
+                      in self._values.items()}
+        lines = []
+        for key, (counts, total, n) in sorted(values.items()):
+            running = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                running += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {running}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {n}")
+        return lines
+
+
+# ---------------------------------------------------------------------------
+# Build metrics
+# ---------------------------------------------------------------------------
+
+_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 30, 50, 100, 200, 500, 1000)
+_SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+DOCUMENTS = Counter("math_hwpx_documents_built_total",
+                    "HWPX documents built, by validation status", ("status",))
+PROBLEMS = Histogram("math_hwpx_problems_per_document", "Problems in each built document",
+                     _COUNT_BUCKETS)
+GRAPHS = Histogram("math_hwpx_graphs_per_document", "Graphs in each built document",
+                   _COUNT_BUCKETS)
+STAGE_SECONDS = Histogram("math_hwpx_stage_seconds", "Wall time of each build stage",
+                          _SECONDS_BUCKETS, ("stage",))
+CACHE_REQUESTS = Counter("math_hwpx_cache_requests_total",
+                         "Cache lookups by cache and result (hit, miss)", ("cache", "result"))
+OUTPUT_BYTES = Counter("math_hwpx_output_bytes_total", "Bytes of HWPX files written")
+GRAPH_BYTES = Counter("math_hwpx_graph_png_bytes_total", "Bytes of graph PNGs rendered")
+GRAPH_FAILURES = Counter("math_hwpx_graph_failures_total",
+                         "Graphs replaced by a placeholder (timeout, memory, crash)")
+VALIDATION_FAILURES = Counter("math_hwpx_validation_failures_total",
+                              "Failed checks by kind (equation: script error, "
+                              "xml: malformed part, hwpx: package)",
+                              ("check",))
+
+# lru caches read at exposition: (module, function, cache label)
+_LRU_CACHES = (
+    ("expr_compiler", "compile_expression", "expression"),
+    ("page_layout", "equation_size", "equation_size"),
+    ("fast_raster", "_glyphs", "glyph"),
+)
+
+
+def _lru_counts() -> dict:
+    counts = {}
+    for module, func, label in _LRU_CACHES:
+        mod = sys.modules.get(module)  # never import a module just to report on it
+        if mod is None:
+            continue
+        info = getattr(mod, func).cache_info()
+        counts[(label, "hit")] = info.hits
+        counts[(label, "miss")] = info.misses
+    return counts
+
+
+CACHE_REQUESTS.add_source(_lru_counts)
+
+
+def _on_span(name: str, seconds: float, args: dict) -> None:
+    STAGE_SECONDS.observe(seconds, stage=name)
+
+
+_enabled = False
+_enable_lock = threading.Lock()
+
+
+def enable() -> None:
+    """Record stage latencies from profiling spans from now on (idempotent).
+
+    Not done at import: a listener makes every span time itself, so builds
+    that export no metrics keep the no-op span path.
+    """
+    global _enabled
+    with _enable_lock:
+        if not _enabled:
+            add_listener(_on_span)
+            _enabled = True
+
+
+# ---------------------------------------------------------------------------
+# Exposition
+# ---------------------------------------------------------------------------
+
+def render_text() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+def write_textfile(path: str | Path) -> None:
+    """Write render_text() to *path* atomically (textfile collector)."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(render_text(), encoding="utf-8")
+    tmp.replace(path)
+
+
+def serve(port: int, addr: str = "127.0.0.1"):
+    """Serve /metrics on addr:port from a daemon thread; returns the server.
+
+    Calls enable(), so stage latencies are recorded from here on.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # scrapes are not worth a log line
+            pass
+
+    enable()
+    server = ThreadingHTTPServer((addr, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""Geometry figures as native HWPX drawing objects (the "native" backend).
+
+Triangles, quadrilaterals, coordinate-plane figures and number lines are
+only lines, polygons, arcs, points and labels, so instead of rasterising
+them with matplotlib they can be written straight into the section XML
+as grouped drawing objects (see drawing_objects.py). The specs are the
+same as for graph_generator; the figure is laid out at its display size
+(graph_sizing.graph_size_hu), so labels keep their point size at any
+figure size.
+
+Differences from the PNG rendering:
+- text is set in the document font (CHAR_FIG_LABEL), not matplotlib's
+- fills are opaque, so shaded polygons are drawn below the outlines
+- curves (circles, angle arcs) become polylines clipped to the window
+
+Usage:
+    from native_figures import make_native_figure_para
+    xml = make_native_figure_para(idgen, graph_spec)
+"""
+
+import numpy as np
+
+from curve_engine import ellipse_path, ellipse_segments
+from drawing_objects import (
+    LINE_HEAVY,
+    LINE_NORMAL,
+    LINE_THICK,
+    LINE_THIN,
+    make_drawing_para,
+    make_ellipse,
+    make_line,
+    make_polygon,
+    make_textbox,
+    text_extent,
+)
+from graph_sizing import NATIVE_TYPES, graph_size_hu
+from xml_primitives import IDGen
+
+_LABEL_HEIGHT = 900      # CHAR_FIG_LABEL is 9 pt
+_LABEL_GAP = 80          # HU between an anchor point and its label box
+_DOT_RADIUS = 110        # filled point marker
+_OPEN_DOT_RADIUS = 170   # hollow (open interval) marker
+_TICK_LENGTH = 120
+_GRAY = "#808080"
+
+
+# ---------------------------------------------------------------------------
+# Canvas: data coordinates → container HWPUNIT
+# ---------------------------------------------------------------------------
+
+class Canvas:
+    """Collects drawing objects for one figure, mapping data to HWPUNIT.
+
+    The window xlim × ylim is fitted inside width × height minus *margins*
+    (left, bottom, right, top in HWPUNIT); with equal=True both axes share
+    one scale and the window is centred, like ax.set_aspect("equal").
+    """
+
+    def __init__(self, idgen: IDGen, width: int, height: int, xlim, ylim,
+                 equal: bool = False, margins=(0, 0, 0, 0)):
+        self.idgen = idgen
+        self.width, self.height = width, height
+        self.xlim, self.ylim = tuple(xlim), tuple(ylim)
+        self.members: list[str] = []
+
+        left, bottom, right, top = margins
+        avail_w, avail_h = width - left - right, height - top - bottom
+        self._sx = avail_w / (xlim[1] - xlim[0])
+        self._sy = avail_h / (ylim[1] - ylim[0])
+        if equal:
+            self._sx = self._sy = min(self._sx, self._sy)
+        self._ox = left + (avail_w - self._sx * (xlim[1] - xlim[0])) / 2
+        self._oy = top + (avail_h - self._sy * (ylim[1] - ylim[0])) / 2
+
+    def hu(self, p) -> tuple[int, int]:
+        """Container position of data point *p* (y axis flipped)."""
+        return (round(self._ox + (p[0] - self.xlim[0]) * self._sx),
+                round(self._oy + (self.ylim[1] - p[1]) * self._sy))
+
+    # --- shapes (data coordinates) -----------------------------------------
+
+    def line(self, p1, p2, **kwargs):
+        self.members.append(make_line(self.idgen, self.hu(p1), self.hu(p2), **kwargs))
+
+    def polyline(self, points, closed=False, **kwargs):
+        pts = [self.hu(p) for p in points]
+        self.members.append(make_polygon(self.idgen, pts, closed=closed, **kwargs))
+
+    def circle(self, center, radius, **kwargs):
+        """Circle clipped to the window, as polylines (none for radius <= 0)."""
+        if not radius > 0:
+            return
+        for xs, ys in ellipse_segments(center[0], center[1], radius, radius,
+                                       self.xlim, self.ylim):
+            self.polyline(zip(xs, ys), **kwargs)
+
+    def dot(self, p, hollow=False):
+        """Point marker: filled, or white with an outline for open endpoints."""
+        if hollow:
+            self.members.append(make_ellipse(
+                self.idgen, self.hu(p), _OPEN_DOT_RADIUS, _OPEN_DOT_RADIUS,
+                width=LINE_THICK, fill="#FFFFFF"))
+        else:
+            self.members.append(make_ellipse(
+                self.idgen, self.hu(p), _DOT_RADIUS, _DOT_RADIUS,
+                width=LINE_THIN, fill="#000000"))
+
+    # --- labels -------------------------------------------------------------
+
+    def label(self, p, text, direction=(0.0, 0.0)):
+        """Put *text* next to data point *p*, pushed out along *direction*.
+
+        *direction* is in data coordinates; (0, 0) centres the label on *p*.
+        The box edge, not its centre, keeps _LABEL_GAP from the point.
+        """
+        text = str(text).replace("$", "")
+        if not text:
+            return
+        w, h = text_extent(text, _LABEL_HEIGHT)
+        dx, dy = float(direction[0]), -float(direction[1])
+        norm = np.hypot(dx, dy)
+        cx, cy = self.hu(p)
+        if norm > 1e-9:
+            dx, dy = dx / norm, dy / norm
+            reach = _LABEL_GAP + (abs(dx) * w + abs(dy) * h) / 2
+            cx, cy = cx + dx * reach, cy + dy * reach
+        x = min(max(round(cx - w / 2), 0), self.width - w)
+        y = min(max(round(cy - h / 2), 0), self.height - h)
+        self.members.append(make_textbox(self.idgen, x, y, w, h, text))
+
+    def para(self) -> str:
+        return make_drawing_para(self.idgen, self.members, self.width, self.height)
+
+
+def _line_style(style: str) -> str:
+    """OWPML line type for a matplotlib format string such as "k--"."""
+    if "--" in style:
+        return "DASH"
+    if "-." in style:
+        return "DASH_DOT"
+    if ":" in style:
+        return "DOT"
+    return "SOLID"
+
+
+def _nice_ticks(lo: float, hi: float, max_ticks: int = 9) -> list[float]:
+    """Round tick positions in [lo, hi] (steps of 1, 2, 2.5 or 5 × 10^k)."""
+    span = hi - lo
+    magnitude = 10 ** np.floor(np.log10(span / max_ticks))
+    for factor in (1, 2, 2.5, 5, 10):
+        step = factor * magnitude
+        if span / step <= max_ticks:
+            break
+    first = np.ceil(lo / step - 1e-9) * step
+    return [round(t, 10) for t in np.arange(first, hi + step * 1e-9, step)]
+
+
+# ---------------------------------------------------------------------------
+# Geometry marks
+# ---------------------------------------------------------------------------
+
+def _angle_mark(cv, center, p1, p2, radius=0.4, label=None):
+    """Arc between the rays center→p1 and center→p2 (interior angle)."""
+    c = np.asarray(center, dtype=float)
+    v1, v2 = np.asarray(p1, dtype=float) - c, np.asarray(p2, dtype=float) - c
+    a1, a2 = np.arctan2(v1[1], v1[0]), np.arctan2(v2[1], v2[0])
+    if (a2 - a1) % (2 * np.pi) > np.pi:
+        a1, a2 = a2, a1
+    a2 = a1 + (a2 - a1) % (2 * np.pi)
+    xs, ys = ellipse_path(c[0], c[1], radius, radius, a1, a2, n=24)
+    cv.polyline(zip(xs, ys), width=LINE_NORMAL)
+    if label:
+        mid = (a1 + a2) / 2
+        anchor = c + radius * np.array([np.cos(mid), np.sin(mid)])
+        cv.label(anchor, label, (np.cos(mid), np.sin(mid)))
+
+
+def _right_angle_mark(cv, corner, p1, p2, size=0.3):
+    c = np.asarray(corner, dtype=float)
+    d1 = np.asarray(p1, dtype=float) - c
+    d2 = np.asarray(p2, dtype=float) - c
+    d1 = d1 / np.linalg.norm(d1) * size
+    d2 = d2 / np.linalg.norm(d2) * size
+    cv.polyline([c + d1, c + d1 + d2, c + d2], width=LINE_THIN)
+
+
+def _equal_marks(cv, p1, p2, count=1):
+    """Tick marks across a segment (equal lengths)."""
+    p1, p2 = np.asarray(p1, dtype=float), np.asarray(p2, dtype=float)
+    d = p2 - p1
+    length = np.linalg.norm(d)
+    if length < 1e-9:
+        return
+    tang, perp = d / length, np.array([-d[1], d[0]]) / length
+    for i in range(count):
+        cp = (p1 + p2) / 2 + tang * (i - (count - 1) / 2) * 0.1
+        cv.line(cp - perp * 0.15, cp + perp * 0.15, width=LINE_NORMAL)
+
+
+def _parallel_marks(cv, p1, p2, count=1):
+    """">" marks on a segment (parallel sides)."""
+    p1, p2 = np.asarray(p1, dtype=float), np.asarray(p2, dtype=float)
+    d = p2 - p1
+    length = np.linalg.norm(d)
+    if length < 1e-9:
+        return
+    tang, perp = d / length, np.array([-d[1], d[0]]) / length
+    for i in range(count):
+        cp = (p1 + p2) / 2 + tang * (i - (count - 1) / 2) * 0.12
+        back = cp - tang * 0.15
+        cv.polyline([back + perp * 0.075, cp + tang * 0.15, back - perp * 0.075],
+                    width=LINE_NORMAL)
+
+
+def _vertex_labels(cv, labels, centroid):
+    for name, pos in labels.items():
+        pos = np.asarray(pos, dtype=float)
+        cv.label(pos, name, pos - centroid)
+
+
+def _side_label(cv, pa, pb, text, centroid):
+    """Label the side pa–pb on the outside of the figure."""
+    mid = (pa + pb) / 2
+    d = pb - pa
+    perp = np.array([-d[1], d[0]])
+    if np.dot(perp, mid - centroid) < 0:
+        perp = -perp
+    cv.label(mid, text, perp)
+
+
+def _dashed(cv, p1, p2):
+    cv.line(p1, p2, width=LINE_THIN, style="DASH")
+
+
+def _polygon_canvas(idgen, spec, verts):
+    """Canvas around the vertex bounding box, padded like the PNG version."""
+    xs = [v[0] for v in verts]
+    ys = [v[1] for v in verts]
+    width, height = graph_size_hu(spec)
+    return Canvas(idgen, width, height,
+                  (min(xs) - 1.0, max(xs) + 1.0), (min(ys) - 1.0, max(ys) + 1.0),
+                  equal=True)
+
+
+# ---------------------------------------------------------------------------
+# Figures
+# ---------------------------------------------------------------------------
+
+def _draw_triangle(idgen, spec):
+    verts = [np.array(v, dtype=float) for v in spec["vertices"]]
+    labels = spec.get("labels", {})
+    angle_labels = spec.get("angle_labels", [None, None, None])
+    cv = _polygon_canvas(idgen, spec, verts)
+    centroid = sum(verts) / 3
+    name_to_pos = {name: np.array(pos, dtype=float) for name, pos in labels.items()}
+
+    # Circumcircle / incircle first, so the triangle is drawn over them
+    A, B, C = verts
+    if spec.get("show_circumcircle"):
+        D = 2 * (A[0] * (B[1] - C[1]) + B[0] * (C[1] - A[1]) + C[0] * (A[1] - B[1]))
+        if abs(D) > 1e-9:
+            sa, sb, sc = A @ A, B @ B, C @ C
+            ux = (sa * (B[1] - C[1]) + sb * (C[1] - A[1]) + sc * (A[1] - B[1])) / D
+            uy = (sa * (C[0] - B[0]) + sb * (A[0] - C[0]) + sc * (B[0] - A[0])) / D
+            cv.circle((ux, uy), np.hypot(A[0] - ux, A[1] - uy),
+                      width=LINE_THIN, style="DASH", color=_GRAY)
+    if spec.get("show_incircle"):
+        a_len, b_len, c_len = (np.linalg.norm(B - C), np.linalg.norm(A - C),
+                               np.linalg.norm(A - B))
+        perimeter = a_len + b_len + c_len
+        s = perimeter / 2
+        cv.circle((a_len * A + b_len * B + c_len * C) / perimeter,
+                  np.sqrt((s - a_len) * (s - b_len) * (s - c_len) / s),
+                  width=LINE_THIN, style="DASH", color=_GRAY)
+
+    cv.polyline(verts, closed=True, width=LINE_THICK)
+    _vertex_labels(cv, labels, centroid)
+
+    for i, show in enumerate(spec.get("show_angles", [False, False, False])):
+        if not show:
+            continue
+        c, p1, p2 = verts[i], verts[(i + 1) % 3], verts[(i + 2) % 3]
+        label = angle_labels[i] if i < len(angle_labels) else None
+        if label and label.replace("°", "").strip() == "90":
+            _right_angle_mark(cv, c, p1, p2)
+        else:
+            _angle_mark(cv, c, p1, p2, label=label)
+
+    for side_key, text in spec.get("side_labels", {}).items():
+        if len(side_key) == 2 and side_key[0] in name_to_pos and side_key[1] in name_to_pos:
+            _side_label(cv, name_to_pos[side_key[0]], name_to_pos[side_key[1]],
+                        text, centroid)
+
+    for side_key, count in spec.get("equal_marks", {}).items():
+        if len(side_key) == 2 and side_key[0] in name_to_pos and side_key[1] in name_to_pos:
+            _equal_marks(cv, name_to_pos[side_key[0]], name_to_pos[side_key[1]], count)
+
+    ordered_names = list(labels.keys())
+    for aux in spec.get("auxiliary_lines", []):
+        vtx_name = aux.get("vertex", "")
+        if vtx_name not in name_to_pos:
+            continue
+        vtx = name_to_pos[vtx_name]
+        idx = ordered_names.index(vtx_name)
+        opp_a = name_to_pos[ordered_names[(idx + 1) % 3]]
+        opp_b = name_to_pos[ordered_names[(idx + 2) % 3]]
+
+        if aux.get("type") == "median":
+            _dashed(cv, vtx, (opp_a + opp_b) / 2)
+        elif aux.get("type") == "altitude":
+            d = opp_b - opp_a
+            t = np.dot(vtx - opp_a, d) / np.dot(d, d)
+            foot = opp_a + t * d
+            _dashed(cv, vtx, foot)
+            _right_angle_mark(cv, foot, vtx, opp_b if t < 1 else opp_a)
+        elif aux.get("type") == "bisector":
+            bisect_dir = ((opp_a - vtx) / np.linalg.norm(opp_a - vtx)
+                          + (opp_b - vtx) / np.linalg.norm(opp_b - vtx))
+            side = opp_b - opp_a
+            denom = bisect_dir[0] * side[1] - bisect_dir[1] * side[0]
+            if abs(denom) > 1e-9:
+                s = ((opp_a[0] - vtx[0]) * side[1] - (opp_a[1] - vtx[1]) * side[0]) / denom
+                _dashed(cv, vtx, vtx + s * bisect_dir)
+    return cv
+
+
+def _draw_quadrilateral(idgen, spec):
+    verts = [np.array(v, dtype=float) for v in spec["vertices"]]
+    labels = spec.get("labels", {})
+    cv = _polygon_canvas(idgen, spec, verts)
+    centroid = sum(verts) / 4
+    name_to_pos = {name: np.array(pos, dtype=float) for name, pos in labels.items()}
+
+    cv.polyline(verts, closed=True, width=LINE_THICK)
+    _vertex_labels(cv, labels, centroid)
+
+    if spec.get("show_diagonals"):
+        _dashed(cv, verts[0], verts[2])
+        _dashed(cv, verts[1], verts[3])
+        int_label = spec.get("diagonal_intersection_label")
+        if int_label:
+            p1, p3 = verts[0], verts[1]
+            d1, d2 = verts[2] - verts[0], verts[3] - verts[1]
+            denom = d1[0] * d2[1] - d1[1] * d2[0]
+            if abs(denom) > 1e-9:
+                t = ((p3[0] - p1[0]) * d2[1] - (p3[1] - p1[1]) * d2[0]) / denom
+                inter = p1 + t * d1
+                cv.dot(inter)
+                cv.label(inter, int_label, (1, 1))
+
+    for side_key, text in spec.get("side_labels", {}).items():
+        if len(side_key) == 2 and side_key[0] in name_to_pos and side_key[1] in name_to_pos:
+            _side_label(cv, name_to_pos[side_key[0]], name_to_pos[side_key[1]],
+                        text, centroid)
+
+    for side_key, count in spec.get("equal_marks", {}).items():
+        if len(side_key) == 2 and side_key[0] in name_to_pos and side_key[1] in name_to_pos:
+            _equal_marks(cv, name_to_pos[side_key[0]], name_to_pos[side_key[1]], count)
+
+    # "AB_DC": 1 means AB ∥ DC with one arrow mark
+    for key, count in spec.get("parallel_marks", {}).items():
+        parts = key.split("_")
+        if len(parts) == 2 and len(parts[0]) == 2 and len(parts[1]) == 2:
+            for a_name, b_name in parts:
+                if a_name in name_to_pos and b_name in name_to_pos:
+                    _parallel_marks(cv, name_to_pos[a_name], name_to_pos[b_name], count)
+
+    ordered = list(labels.keys())
+    for corner_name in spec.get("show_right_angles", []):
+        if corner_name not in name_to_pos:
+            continue
+        idx = ordered.index(corner_name)
+        prev_name = ordered[(idx - 1) % len(ordered)]
+        next_name = ordered[(idx + 1) % len(ordered)]
+        _right_angle_mark(cv, name_to_pos[corner_name],
+                          name_to_pos[prev_name], name_to_pos[next_name])
+    return cv
+
+
+def _exam_axes(cv, xlabel="x", ylabel="y"):
+    """Axes through the origin with arrow heads, inward ticks and "O"."""
+    (x0, x1), (y0, y1) = cv.xlim, cv.ylim
+    ax_y = min(max(0.0, y0), y1)   # where the x axis runs
+    ax_x = min(max(0.0, x0), x1)   # where the y axis runs
+    cv.line((x0, ax_y), (x1, ax_y), width=LINE_NORMAL, arrow=True)
+    cv.line((ax_x, y0), (ax_x, y1), width=LINE_NORMAL, arrow=True)
+    cv.label((x1, ax_y), xlabel, (1, 0))
+    cv.label((ax_x, y1), ylabel, (0, 1))
+    if x0 <= 0 <= x1 and y0 <= 0 <= y1:
+        cv.label((0, 0), "O", (-1, -1))
+
+    for t in _nice_ticks(x0, x1):
+        if abs(t) > 0.01 and x0 < t < x1:
+            bx, by = cv.hu((t, ax_y))
+            cv.members.append(make_line(cv.idgen, (bx, by), (bx, by - _TICK_LENGTH),
+                                        width=LINE_THIN))
+            cv.label((t, ax_y), f"{t:g}", (0, -1))
+    for t in _nice_ticks(y0, y1):
+        if abs(t) > 0.01 and y0 < t < y1:
+            bx, by = cv.hu((ax_x, t))
+            cv.members.append(make_line(cv.idgen, (bx, by), (bx + _TICK_LENGTH, by),
+                                        width=LINE_THIN))
+            cv.label((ax_x, t), f"{t:g}", (-1, 0))
+
+
+def _draw_coordinate(idgen, spec):
+    xlim = spec.get("xlim", (-1, 7))
+    ylim = spec.get("ylim", (-1, 7))
+    width, height = graph_size_hu(spec)
+    # Room for the axis names beyond the arrow heads
+    cv = Canvas(idgen, width, height, xlim, ylim, equal=True,
+                margins=(200, 200, 500, 500))
+
+    # Shaded region first: native fills are opaque
+    fill_poly = spec.get("fill_polygon")
+    if fill_poly:
+        alpha = spec.get("shade_alpha", 0.15)
+        level = round(255 - alpha * (255 - 0x80))  # gray at alpha over white
+        cv.polyline(fill_poly, closed=True, width=LINE_THIN,
+                    fill=f"#{level:02X}{level:02X}{level:02X}")
+
+    _exam_axes(cv)
+
+    for seg in spec.get("segments", []):
+        if len(seg) == 2:
+            cv.line(seg[0], seg[1], width=LINE_NORMAL)
+
+    # Lines y = slope·x + intercept, clipped to the window
+    (x0, x1), (y0, y1) = xlim, ylim
+    for ln in spec.get("lines", []):
+        slope = ln.get("slope")
+        if slope is None:
+            continue
+        intercept = ln.get("intercept", 0)
+        lo, hi = x0, x1
+        if slope:
+            ya, yb = sorted(((y0 - intercept) / slope, (y1 - intercept) / slope))
+            lo, hi = max(lo, ya), min(hi, yb)
+        elif not y0 <= intercept <= y1:
+            continue
+        if lo < hi:
+            cv.line((lo, slope * lo + intercept), (hi, slope * hi + intercept),
+                    width=LINE_NORMAL, style=_line_style(ln.get("style", "k-")))
+
+    for c in spec.get("circles", []):
+        cv.circle(c["center"], c["radius"], width=LINE_NORMAL)
+
+    for pt in spec.get("points", []):
+        cv.dot(pt["pos"])
+        if "label" in pt:
+            cv.label(pt["pos"], pt["label"], (1, 1))
+    return cv
+
+
+def _draw_number_line(idgen, spec):
+    xlim = spec.get("xlim", (-5, 5))
+    width, height = graph_size_hu(spec)
+    cv = Canvas(idgen, width, height, xlim, (-0.5, 0.5), margins=(300, 0, 300, 0))
+
+    cv.line((xlim[0], 0), (xlim[1], 0), width=LINE_NORMAL, arrow=True)
+    for tick in range(int(xlim[0]), int(xlim[1]) + 1):
+        bx, by = cv.hu((tick, 0))
+        cv.members.append(make_line(idgen, (bx, by - _TICK_LENGTH), (bx, by + _TICK_LENGTH),
+                                    width=LINE_THIN))
+        cv.label((tick, -0.08), str(tick), (0, -1))
+
+    ends = []
+    for iv in spec.get("intervals", []):
+        cv.line((iv["from"], 0), (iv["to"], 0), width=LINE_HEAVY)
+        ends += [(iv["from"], iv.get("open_left", False)),
+                 (iv["to"], iv.get("open_right", False))]
+    ends += [(pt["x"], pt.get("open", False)) for pt in spec.get("points", [])]
+    # Endpoint markers last, on top of the interval bars
+    for x, is_open in ends:
+        cv.dot((x, 0), hollow=is_open)
+    return cv
+
+
+NATIVE_FIGURES = {
+    "triangle": _draw_triangle,
+    "quadrilateral": _draw_quadrilateral,
+    "coordinate": _draw_coordinate,
+    "number_line": _draw_number_line,
+}
+assert tuple(NATIVE_FIGURES) == NATIVE_TYPES
+
+
+def make_native_figure_para(idgen: IDGen, spec: dict) -> str:
+    """Paragraph with the figure for *spec* as grouped drawing objects."""
+    graph_type = spec.get("type")
+    draw = NATIVE_FIGURES.get(graph_type)
+    if draw is None:
+        raise ValueError(f"No native drawing for graph type: {graph_type}. "
+                         f"Available: {list(NATIVE_FIGURES)}")
+    return draw(idgen, spec).para()
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""Near-duplicate problem detection with MinHash and LSH banding.
+
+Two problems are near duplicates when their normalized content mostly
+overlaps, even if the equation is written differently ("x^2-5x+6" and
+"x ^{2} - 5 x + 6") or the text differs in spacing and punctuation:
+
+- equation scripts are tokenized with eq_keywords.TOKEN_RE, with braces,
+  spacing (~ `) and structure-only keywords (left, right, rm ...) dropped
+  and keywords lowercased; shingles are EQ_SHINGLE consecutive tokens
+- text (NFKC, lowercased, only letters and digits, problem/choice numbers
+  and "[3점]" removed) is shingled into TEXT_SHINGLE character runs,
+  which suits Korean better than word shingles
+
+Each shingle set is reduced to a NUM_PERM MinHash signature (vectorized
+with NumPy over whole batches of problems); signatures are cut into BANDS
+bands whose hashes go into sorted arrays, so the candidates of a problem
+are found by binary search in each band instead of by comparing it with
+every other problem. Candidates are kept when the share of equal
+signature entries (the estimated Jaccard similarity) reaches --threshold.
+Within the inputs (scan), all problems that share a band bucket are
+compared, up to BUCKET_SPAN neighbours each in very large buckets.
+
+Problems come from .json/.jsonl problem files or from the section XML of
+.hwpx archives (split at the "N. " paragraphs this skill writes). Graphs
+are not compared: an archive only holds their PNG.
+
+Provides:
+- problem_features / features: normalized equation tokens and text of a problem
+- shingle_hashes / signatures: shingles and MinHash signatures of a batch of problems
+- iter_file_problems: (location, snippet, features) of a problem file or .hwpx
+- MinHashIndex: signatures + LSH band tables; add, candidates, duplicate_pairs, save, load
+- clusters: groups of near-duplicate problems from verified pairs
+
+Usage:
+    python near_dup.py scan bank.jsonl old_papers/*.hwpx            # duplicates among the inputs
+    python near_dup.py index bank.jsonl old_papers/*.hwpx -o bank.npz
+    python near_dup.py check bank.npz new_paper.json --threshold 0.8  # new problems vs the index
+"""
+
+import argparse
+import re
+import sys
+import unicodedata
+import zlib
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from pathlib import Path
+
+from eq_keywords import KEYWORDS_LOWER, SILENT, TOKEN_RE
+
+NUM_PERM = 128      # MinHash signature length
+BANDS = 16          # 16 bands × 8 rows: pairs near 0.7 similarity collide in some band
+EQ_SHINGLE = 3      # equation tokens per shingle
+TEXT_SHINGLE = 3    # characters per text shingle (3 × 21 bits fit a uint64)
+THRESHOLD = 0.7     # default estimated Jaccard similarity to report
+BUCKET_SPAN = 64    # rows of one LSH bucket compared with each other
+_BATCH_SHINGLES = 16384  # shingles hashed per vectorized batch (NUM_PERM × this × 8 bytes)
+
+_EQ_DROP = {"{", "}", "~", "`", "&"} | SILENT
+# "3. ", "(2) " at the start of a run, circled choice numbers, "[4점]"
+_MARKER_RE = re.compile(r"^\s*(?:\d+\.\s|\(\d+\)\s?)|[①-⑩]|\[\d+점\]")
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_NUMBERED_RE = re.compile(r"^\s*(\d+)\.\s")
+_SNIPPET = 40
+_EQ_MIX = 0x100000001B3           # odd 64-bit multiplier mixing token hashes
+_EQ_BIT = 1 << 63
+
+
+# ---------------------------------------------------------------------------
+# Normalization and shingles
+# ---------------------------------------------------------------------------
+
+def normalize_script(script: str) -> list[str]:
+    """Equation tokens with layout-only tokens dropped and keywords lowercased."""
+    tokens = []
+    for tok in TOKEN_RE.findall(script):
+        low = tok.lower()
+        if tok in _EQ_DROP or low in _EQ_DROP:
+            continue
+        tokens.append(low if low in KEYWORDS_LOWER else tok)
+    return tokens
+
+
+def normalize_text(text: str) -> str:
+    """Letters and digits of *text*, lowercased, without numbering marks."""
+    text = unicodedata.normalize("NFKC", _MARKER_RE.sub(" ", text))
+    return _NON_WORD_RE.sub("", text.lower())
+
+
+@lru_cache(maxsize=65536)
+def _script_hashes(script: str) -> tuple[int, ...]:
+    """CRC-32 of each normalized token (cached: choices repeat across a bank)."""
+    return tuple(zlib.crc32(t.encode("utf-8")) for t in normalize_script(script))
+
+
+def features(texts: Iterable[str], scripts: Iterable[str]) -> tuple[list[tuple[int, ...]], str]:
+    """(token hashes of each equation script, normalized text) of a problem.
+
+    Text pieces are joined: a choice or sub-problem split differently in a
+    source only changes the shingles across the joints. Shingles are only
+    formed per batch, by shingle_hashes.
+    """
+    seqs = [_script_hashes(s) for s in scripts]
+    return [q for q in seqs if q], "".join(normalize_text(t) for t in texts)
+
+
+def _windows(values, seq, k: int):
+    """Columns of the k-value windows that stay inside one sequence, and their sequence.
+
+    A sequence shorter than k gives one window, zero-padded.
+    """
+    import numpy as np
+
+    n = len(values)
+    pad_v = np.concatenate((values, np.zeros(k - 1, dtype=values.dtype)))
+    pad_s = np.concatenate((seq, np.full(k - 1, -1, dtype=seq.dtype)))
+    cols = [np.where(pad_s[j:j + n] == seq, pad_v[j:j + n], 0) for j in range(k)]
+    start = np.ones(n, dtype=bool)
+    start[1:] = seq[1:] != seq[:-1]
+    valid = (pad_s[k - 1:k - 1 + n] == seq) | start
+    return [c[valid] for c in cols], seq[valid]
+
+
+def shingle_hashes(batch: list[tuple[list[tuple[int, ...]], str]]):
+    """(uint64 shingle hashes grouped by problem, shingles per problem) of features.
+
+    All problems of the batch are shingled in one pass of array operations.
+    A text shingle packs its three 21-bit code points into one integer (no
+    collisions); an equation shingle mixes the CRC-32 of EQ_SHINGLE tokens,
+    with the top bit set so the two kinds never meet. Repeated shingles are
+    kept: they do not change a minimum.
+    """
+    import numpy as np
+    from itertools import chain
+
+    n = len(batch)
+    seq_counts = np.fromiter((len(seqs) for seqs, _ in batch), dtype=np.int64, count=n)
+    seq_lens = np.fromiter((len(q) for seqs, _ in batch for q in seqs), dtype=np.int64,
+                           count=int(seq_counts.sum()))
+    tokens = np.fromiter(chain.from_iterable(q for seqs, _ in batch for q in seqs),
+                         dtype=np.uint64, count=int(seq_lens.sum()))
+    seq_owner = np.repeat(np.arange(n), seq_counts)
+    text_lens = np.fromiter((len(text) for _, text in batch), dtype=np.int64, count=n)
+    chars = np.frombuffer("".join(text for _, text in batch).encode("utf-32-le"),
+                          dtype=np.uint32).astype(np.uint64)
+
+    with np.errstate(over="ignore"):
+        cols, seq = _windows(tokens, np.repeat(np.arange(len(seq_lens)), seq_lens), EQ_SHINGLE)
+        eq = np.zeros(len(seq), dtype=np.uint64)
+        for col in cols:
+            eq = (eq + col) * np.uint64(_EQ_MIX)
+        cols, text_owner = _windows(chars, np.repeat(np.arange(n), text_lens), TEXT_SHINGLE)
+        text = np.zeros(len(text_owner), dtype=np.uint64)
+        for col in cols:
+            text = (text << np.uint64(21)) | col
+    owner = np.concatenate((seq_owner[seq], text_owner))
+    order = np.argsort(owner, kind="stable")
+    values = np.concatenate((eq | np.uint64(_EQ_BIT), text))[order]
+    return values, np.bincount(owner, minlength=n)
+
+
+def _problem_parts(prob: dict) -> tuple[list[str], list[str]]:
+    """(text pieces, equation scripts) of a problem dict."""
+    texts, scripts = [prob.get("text", "")], []
+    if prob.get("equation"):
+        scripts.append(prob["equation"])
+    for sub in prob.get("sub_problems", []):
+        texts.append(sub.get("text", ""))
+        if sub.get("equation"):
+            scripts.append(sub["equation"])
+    for choice in prob.get("choices", []):
+        if choice.startswith("$") and choice.endswith("$"):
+            scripts.append(choice[1:-1])
+        else:
+            texts.append(choice)
+    return texts, scripts
+
+
+def problem_features(prob: dict) -> tuple[list[tuple[int, ...]], str]:
+    """features() of a problem dict (text, equation, sub-problems, choices)."""
+    return features(*_problem_parts(prob))
+
+
+def _snippet(texts: list[str], scripts: list[str]) -> str:
+    text = " ".join(" ".join(_MARKER_RE.sub(" ", t).split()) for t in texts)
+    return (" ".join(text.split()) or " ".join(scripts))[:_SNIPPET]
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+def iter_hwpx_parts(path: Path) -> Iterator[tuple[int, list[str], list[str]]]:
+    """(problem number, text runs, equation scripts) per problem of an archive.
+
+    A problem starts at a paragraph whose first text is "N. "; paragraphs
+    before the first one (title block) are skipped. Text and scripts are
+    read from each paragraph's own runs, so table cells are visited in
+    document order without counting a cell's content twice.
+    """
+    from zipfile import ZipFile
+
+    from lxml import etree
+
+    from xml_primitives import NS
+
+    hp = "{%s}" % NS["hp"]
+    para, run, text, equation, script = (hp + "p", hp + "run", hp + "t",
+                                         hp + "equation", hp + "script")
+    number, texts, scripts = None, [], []
+    with ZipFile(path) as zf:
+        sections = sorted((n for n in zf.namelist()
+                           if re.fullmatch(r"Contents/section\d+\.xml", n)),
+                          key=lambda n: int(re.search(r"\d+", n).group()))
+        for name in sections:
+            with zf.open(name) as f:
+                for _, elem in etree.iterparse(f, events=("end",), tag=para):
+                    pieces, eqs = [], []
+                    for r in elem.iterchildren(run):
+                        for child in r:
+                            if child.tag == text:
+                                pieces.append(child.text or "")
+                            elif child.tag == equation:
+                                s = child.find(script)
+                                if s is not None and s.text:
+                                    eqs.append(s.text)
+                    elem.clear()
+                    m = _NUMBERED_RE.match(pieces[0]) if pieces else None
+                    if m:
+                        if number is not None:
+                            yield number, texts, scripts
+                        number, texts, scripts = int(m.group(1)), [], []
+                        pieces[0] = pieces[0][m.end():]
+                    if number is not None:
+                        texts += pieces
+                        scripts += eqs
+    if number is not None:
+        yield number, texts, scripts
+
+
+def iter_file_problems(path: Path) -> Iterator[tuple[str, str, tuple]]:
+    """(location, snippet, features) of every problem of a file.
+
+    .hwpx archives are read through iter_hwpx_parts, anything else as a
+    .json/.jsonl problem file (streamed by problem_io).
+    """
+    if path.suffix.lower() == ".hwpx":
+        for number, texts, scripts in iter_hwpx_parts(path):
+            yield f"{path}: problem {number}", _snippet(texts, scripts), features(texts, scripts)
+        return
+    from problem_io import load_problems
+
+    _, problems = load_problems(path)
+    for prob_num, prob in enumerate(problems, 1):
+        texts, scripts = _problem_parts(prob)
+        yield f"{path}: problem {prob_num}", _snippet(texts, scripts), features(texts, scripts)
+
+
+# ---------------------------------------------------------------------------
+# MinHash + LSH
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _hash_params(num_perm: int):
+    """Fixed (a, b) of the multiply-shift hash family and the band mixing constant.
+
+    Seeded so that signatures saved in an index stay comparable with the
+    ones computed later.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(20240917)
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+
+def signatures(batch: list[tuple], num_perm: int = NUM_PERM):
+    """(n, num_perm) uint32 MinHash signatures of a batch of non-empty features.
+
+    Shingle hashes are permuted with h(x) = (a·x + b) >> 32 in uint64 arithmetic
+    (wrapping), all sets of the batch at once; the per-set minima come from
+    one minimum.reduceat over the set boundaries.
+    """
+    import numpy as np
+
+    a, b = _hash_params(num_perm)
+    values, sizes = shingle_hashes(batch)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    with np.errstate(over="ignore"):
+        hashed = (a * values[None, :] + b) >> np.uint64(32)
+    return np.minimum.reduceat(hashed, starts, axis=1).T.astype(np.uint32)
+
+
+def band_keys(sigs, bands: int = BANDS):
+    """(n, bands) uint64 hash of each band of the signatures."""
+    import numpy as np
+
+    n, num_perm = sigs.shape
+    rows = num_perm // bands
+    parts = sigs[:, :bands * rows].reshape(n, bands, rows).astype(np.uint64)
+    keys = np.zeros((n, bands), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for r in range(rows):
+            keys = keys * np.uint64(0x100000001B3) + parts[:, :, r]
+    return keys
+
+
+class MinHashIndex:
+    """MinHash signatures of problems plus sorted LSH band tables.
+
+    add() buffers problems and hashes them in vectorized batches; the band
+    tables are (re)built on the first lookup after adding.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm, self.bands = num_perm, bands
+        self.locations: list[str] = []
+        self.snippets: list[str] = []
+        self._chunks = []          # signature arrays of flushed batches
+        self._pending = []         # features not hashed yet
+        self._pending_size = 0
+        self._sigs = None
+        self._tables = None        # per band: (sorted keys, row order)
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def add(self, location: str, snippet: str, feats: tuple) -> bool:
+        """Add one problem's features; False (not added) when it has nothing to compare."""
+        seqs, text = feats
+        if not seqs and not text:
+            return False
+        self.locations.append(location)
+        self.snippets.append(snippet)
+        self._pending.append(feats)
+        self._pending_size += len(text) + sum(map(len, seqs))
+        if self._pending_size >= _BATCH_SHINGLES:
+            self._flush()
+        return True
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._chunks.append(signatures(self._pending, self.num_perm))
+            self._pending, self._pending_size = [], 0
+            self._sigs = self._tables = None
+
+    @property
+    def sigs(self):
+        import numpy as np
+
+        self._flush()
+        if self._sigs is None:
+            self._sigs = (np.concatenate(self._chunks) if self._chunks
+                          else np.empty((0, self.num_perm), dtype=np.uint32))
+            self._chunks = [self._sigs]
+        return self._sigs
+
+    def _band_tables(self):
+        if self._tables is None:
+            keys = band_keys(self.sigs, self.bands)
+            self._tables = []
+            for band in range(self.bands):
+                order = keys[:, band].argsort(kind="stable")
+                self._tables.append((keys[order, band], order))
+        return self._tables
+
+    def similarity(self, i, sig):
+        """Estimated Jaccard similarity of rows i (int or array) with a signature."""
+        return (self.sigs[i] == sig).mean(axis=-1)
+
+    def candidates(self, feats: tuple, threshold: float = THRESHOLD) -> list[tuple[int, float]]:
+        """(row, estimated similarity) of indexed problems similar to a problem's features.
+
+        Each band is looked up by binary search in its sorted key table.
+        """
+        import numpy as np
+
+        if not (feats[0] or feats[1]) or not len(self):
+            return []
+        sig = signatures([feats], self.num_perm)
+        keys = band_keys(sig, self.bands)[0]
+        rows = []
+        for band, (sorted_keys, order) in enumerate(self._band_tables()):
+            lo, hi = np.searchsorted(sorted_keys, keys[band], side="left"), \
+                np.searchsorted(sorted_keys, keys[band], side="right")
+            rows.append(order[lo:hi])
+        rows = np.unique(np.concatenate(rows))
+        if not rows.size:
+            return []
+        sims = self.similarity(rows, sig[0])
+        keep = sims >= threshold
+        return sorted(zip(rows[keep].tolist(), sims[keep].tolist()), key=lambda c: -c[1])
+
+    def duplicate_pairs(self, threshold: float = THRESHOLD):
+        """(i, j, estimated similarity) of indexed problems that look alike, i < j.
+
+        In each band, every two rows with equal keys are compared, as long
+        as they are less than BUCKET_SPAN rows apart in the sorted table.
+        Only a bucket larger than that (hundreds of copies of one problem)
+        skips pairs, which are then usually found through another band.
+        """
+        import numpy as np
+
+        pairs = []
+        for sorted_keys, order in self._band_tables():
+            for d in range(1, BUCKET_SPAN):
+                same = np.flatnonzero(sorted_keys[d:] == sorted_keys[:-d])
+                if not same.size:
+                    break  # no bucket has more than d rows
+                a, b = order[same], order[same + d]
+                pairs.append(np.stack((np.minimum(a, b), np.maximum(a, b)), axis=1))
+        if not pairs:
+            return []
+        pairs = np.unique(np.concatenate(pairs), axis=0)
+        sigs = self.sigs
+        sims = np.concatenate([(sigs[chunk[:, 0]] == sigs[chunk[:, 1]]).mean(axis=1)
+                               for chunk in np.array_split(pairs, max(1, len(pairs) // 65536))])
+        keep = sims >= threshold
+        return [(int(i), int(j), float(s)) for (i, j), s in zip(pairs[keep], sims[keep])]
+
+    def save(self, path: Path) -> None:
+        """Write signatures and labels to an .npz file."""
+        import numpy as np
+
+        def joined(strings):
+            return np.frombuffer("\n".join(strings).encode("utf-8"), dtype=np.uint8)
+
+        np.savez_compressed(path, sigs=self.sigs, bands=np.array([self.bands]),
+                            locations=joined(self.locations),
+                            snippets=joined(s.replace("\n", " ") for s in self.snippets))
+
+    @classmethod
+    def load(cls, path: Path) -> "MinHashIndex":
+        import numpy as np
+
+        with np.load(path) as data:
+            sigs = data["sigs"]
+            index = cls(sigs.shape[1], int(data["bands"][0]))
+            index.locations = bytes(data["locations"]).decode("utf-8").split("\n")
+            index.snippets = bytes(data["snippets"]).decode("utf-8").split("\n")
+        if not len(sigs):
+            index.locations = index.snippets = []
+        index._chunks = [sigs]
+        return index
+
+
+def clusters(n: int, pairs: Iterable[tuple[int, int, float]]) -> list[list[int]]:
+    """Groups (of two or more rows) connected by near-duplicate pairs."""
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j, _ in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    groups = {}
+    for i in range(n):
+        groups.setdefault(find(i), []).append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _build_index(files: list[Path], bands: int) -> MinHashIndex:
+    index = MinHashIndex(bands=bands)
+    for path in files:
+        if not path.is_file():
+            raise SystemExit(f"File not found: {path}")
+        for location, snippet, feats in iter_file_problems(path):
+            index.add(location, snippet, feats)
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find near-duplicate problems (MinHash/LSH)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_scan = sub.add_parser("scan", help="Report near duplicates among the input files "
+                            f"(each compared with up to {BUCKET_SPAN} others per LSH bucket)")
+    p_scan.add_argument("files", nargs="+", type=Path, help=".json, .jsonl or .hwpx files")
+    p_index = sub.add_parser("index", help="Save an index of the input files")
+    p_index.add_argument("files", nargs="+", type=Path, help=".json, .jsonl or .hwpx files")
+    p_index.add_argument("--output", "-o", type=Path, required=True, help="Index .npz file")
+    p_check = sub.add_parser("check", help="Look up each input problem in a saved index")
+    p_check.add_argument("index", type=Path, help="Index .npz from the index command")
+    p_check.add_argument("files", nargs="+", type=Path, help=".json, .jsonl or .hwpx files")
+    for p in (p_scan, p_index, p_check):
+        p.add_argument("--threshold", type=float, default=THRESHOLD,
+                       help=f"Estimated Jaccard similarity to report (default: {THRESHOLD})")
+        p.add_argument("--bands", type=int, default=BANDS,
+                       help=f"LSH bands of the {NUM_PERM}-entry signature (default: {BANDS}; "
+                            "more bands find less similar pairs)")
+    args = parser.parse_args()
+
+    if args.command == "index":
+        index = _build_index(args.files, args.bands)
+        index.save(args.output)
+        print(f"{len(index)} problems → {args.output}")
+        return
+
+    found = 0
+    if args.command == "scan":
+        index = _build_index(args.files, args.bands)
+        pairs = index.duplicate_pairs(args.threshold)
+        best = {}
+        for i, j, sim in pairs:
+            best[j] = max(best.get(j, 0.0), sim)
+        for group in clusters(len(index), pairs):
+            found += 1
+            print(f"Cluster {found} ({len(group)} problems):")
+            for row in group:
+                sim = f"{best[row]:.2f}" if row in best else "    "
+                print(f"  {sim}  {index.locations[row]}  {index.snippets[row]}")
+        print(f"{found} near-duplicate cluster(s) among {len(index)} problems", file=sys.stderr)
+    else:
+        if not args.index.is_file():
+            raise SystemExit(f"Index not found: {args.index}")
+        index = MinHashIndex.load(args.index)
+        for path in args.files:
+            if not path.is_file():
+                raise SystemExit(f"File not found: {path}")
+            for location, snippet, feats in iter_file_problems(path):
+                matches = index.candidates(feats, args.threshold)
+                if matches:
+                    found += 1
+                    print(f"{location}  {snippet}")
+                    for row, sim in matches[:5]:
+                        print(f"  {sim:.2f}  {index.locations[row]}  {index.snippets[row]}")
+        print(f"{found} problem(s) with near duplicates in {args.index} "
+              f"({len(index)} problems)", file=sys.stderr)
+    sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""Content-aware page packing for exam format problem tables.
+
+Estimates how tall each problem renders inside a table cell and decides how
+many problems go on each page:
+- estimate_problem_height: cell content height in HWPUNIT
+- fixed_pages: the original layout (problems_per_page, fixed row heights)
+- packed_pages: linear next-fit packing with per-page row counts
+
+Both page planners take a problem list or lazy iterator and yield
+(group, row_count, row_height) tuples for make_problem_table, printing a
+warning for every problem whose estimated height exceeds its cell.
+
+Heights are estimates: text width comes from precomputed glyph-width
+tables for the charPr fonts used in problem cells (함초롬돋움, see
+templates/base/Contents/header.xml), equation size from a light parse of
+the Hancom equation script.
+"""
+
+import math
+import sys
+import unicodedata
+from collections.abc import Iterator
+from functools import lru_cache
+
+from eq_keywords import ACCENTS, BIG_OPS, SCRIPTS, SILENT, STACKS, SYMBOLS, TOKEN_RE
+from graph_sizing import graph_size_hu
+from xml_primitives import STYLE
+
+
+# ---------------------------------------------------------------------------
+# Cell geometry (must match table_layout.make_problem_table)
+# ---------------------------------------------------------------------------
+
+TABLE_WIDTH = 48192
+CELL_MARGIN_LR = 283
+CELL_MARGIN_TB = 142
+CELL_TEXT_WIDTH = TABLE_WIDTH // 2 - 2 * CELL_MARGIN_LR   # 23530
+
+# paraPr metrics from header.xml: (line spacing %, space before, space after)
+_PARA_METRICS = {
+    STYLE["PARA_BODY"]: (150, 800, 100),
+    STYLE["PARA_EQ"]: (140, 100, 100),
+    STYLE["PARA_CHOICE"]: (140, 50, 50),
+}
+
+
+# ---------------------------------------------------------------------------
+# Glyph-width tables
+# ---------------------------------------------------------------------------
+
+# Latin advance widths (1/1000 em) for printable ASCII 0x20..0x7E,
+# proportional gothic metrics close to 함초롬돋움's Latin face.
+_ASCII_WIDTHS_REGULAR = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,  # ' '..'/'
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,  # '0'..'?'
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,  # '@'..'O'
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,   # 'P'..'_'
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,   # '`'..'o'
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,        # 'p'..'~'
+)
+_BOLD_SCALE = 1.06
+_WIDE_EM = 1000       # Hangul, CJK, circled numbers
+_NARROW_EM = 600      # other symbols (Greek, ≤, ×, ...)
+
+
+def _build_width_table(size: int, bold: bool) -> dict[str, int]:
+    """Precompute HWPUNIT advance widths for ASCII at a given font size."""
+    scale = size / 1000 * (_BOLD_SCALE if bold else 1.0)
+    return {chr(0x20 + i): round(w * scale)
+            for i, w in enumerate(_ASCII_WIDTHS_REGULAR)}
+
+
+# charPr ID → (height in HWPUNIT, bold), from header.xml
+_CHAR_FONTS = {
+    STYLE["CHAR_BODY"]: (1000, False),
+    STYLE["CHAR_CHOICE"]: (900, False),
+    STYLE["CHAR_EXAM_NUM"]: (1000, True),
+    STYLE["CHAR_POINTS"]: (900, False),
+}
+_WIDTH_TABLES = {cid: _build_width_table(size, bold)
+                 for cid, (size, bold) in _CHAR_FONTS.items()}
+
+
+@lru_cache(maxsize=4096)
+def _other_char_em(ch: str) -> int:
+    if unicodedata.east_asian_width(ch) in ("W", "F", "A"):
+        return _WIDE_EM
+    return _NARROW_EM
+
+
+def text_width(text: str, char_pr: int = STYLE["CHAR_BODY"]) -> int:
+    """Estimated rendered width of *text* in HWPUNIT for a body charPr."""
+    table = _WIDTH_TABLES[char_pr]
+    size = _CHAR_FONTS[char_pr][0]
+    width = 0
+    for ch in text:
+        w = table.get(ch)
+        if w is None:
+            w = _other_char_em(ch) * size // 1000
+        width += w
+    return width
+
+
+# ---------------------------------------------------------------------------
+# Equation size estimation
+# ---------------------------------------------------------------------------
+
+def _eq_parse(tokens: list, i: int, stop: str | None) -> tuple[list, int]:
+    """Group tokens into nested lists at braces; return (items, next index)."""
+    items = []
+    while i < len(tokens):
+        tok = tokens[i]
+        if tok == "}":
+            if stop == "}":
+                return items, i + 1
+            i += 1
+            continue
+        if tok == "{":
+            sub, i = _eq_parse(tokens, i + 1, "}")
+            items.append(sub)
+            continue
+        items.append(tok)
+        i += 1
+    return items, i
+
+
+def _eq_seq_size(items: list) -> tuple[float, float]:
+    """(width, height) in em of a token sequence; handles over/scripts/stacks."""
+    sizes: list[tuple[float, float]] = []
+    i = 0
+    n = len(items)
+
+    def operand(j: int) -> tuple[tuple[float, float], int]:
+        if j >= n:
+            return (0.0, 1.0), j
+        return _eq_item_size(items, j)
+
+    while i < n:
+        tok = items[i]
+        if tok == "over" and sizes:
+            (wr, hr), i = operand(i + 1)
+            wl, hl = sizes.pop()
+            sizes.append((max(wl, wr) + 0.2, hl + hr + 0.2))
+            continue
+        if isinstance(tok, str) and tok in SCRIPTS and sizes:
+            (ws, hs), i = operand(i + 1)
+            wb, hb = sizes.pop()
+            sizes.append((wb + 0.7 * ws, hb + 0.35 * hs))
+            continue
+        size, i = _eq_item_size(items, i)
+        sizes.append(size)
+
+    if not sizes:
+        return 0.0, 1.0
+    return sum(w for w, _ in sizes), max(h for _, h in sizes)
+
+
+def _eq_item_size(items: list, i: int) -> tuple[tuple[float, float], int]:
+    """Size of the item at index i (a token or a brace group)."""
+    tok = items[i]
+    if isinstance(tok, list):
+        return _eq_seq_size(tok), i + 1
+    if tok in STACKS and i + 1 < len(items) and isinstance(items[i + 1], list):
+        rows, row = [], []
+        for t in items[i + 1]:
+            if t == "#":
+                rows.append(row)
+                row = []
+            elif t != "&":
+                row.append(t)
+        rows.append(row)
+        row_sizes = [_eq_seq_size(r) for r in rows]
+        width = max(w for w, _ in row_sizes) + (0.0 if tok in ("pile", "eqalign") else 0.8)
+        height = sum(h for _, h in row_sizes) + 0.2 * (len(rows) - 1)
+        return (width, height), i + 2
+    if tok in ("sqrt", "root"):
+        j = i + 1
+        if tok == "root" and j + 1 < len(items):
+            j += 2  # skip "n of"
+        if j < len(items):
+            (w, h), j = _eq_item_size(items, j)
+        else:
+            w, h = 0.0, 1.0
+        return (w + 0.8, h + 0.2), j
+    if tok in ACCENTS and i + 1 < len(items):
+        (w, h), j = _eq_item_size(items, i + 1)
+        return (w, h + 0.25), j
+    if tok in BIG_OPS:
+        return (1.2, 1.6), i + 1
+    if tok in SILENT or tok == "#":
+        return (0.0, 1.0), i + 1
+    if tok in SYMBOLS or tok in ("+-", "<=", ">=", "<->") or tok.startswith("-"):
+        return (0.8, 1.0), i + 1
+    if tok == "~":
+        return (0.5, 1.0), i + 1
+    if tok == "`":
+        return (0.125, 1.0), i + 1
+    if tok.startswith('"'):
+        return (0.55 * (len(tok) - 2), 1.0), i + 1
+    if tok[0].isdigit():
+        return (0.55 * len(tok), 1.0), i + 1
+    if tok[0].isalpha():
+        return (0.5 * len(tok), 1.0), i + 1
+    if tok in "+=<>":
+        return (0.9, 1.0), i + 1
+    return (0.45, 1.0), i + 1
+
+
+@lru_cache(maxsize=8192)
+def equation_size(script: str, font_size: int = 1000) -> tuple[int, int]:
+    """Estimated (width, height) in HWPUNIT of a Hancom equation script."""
+    tokens = TOKEN_RE.findall(script)
+    items, _ = _eq_parse(tokens, 0, None)
+    # Top-level "#" starts a new equation line
+    lines, line = [], []
+    for t in items:
+        if t == "#":
+            lines.append(line)
+            line = []
+        else:
+            line.append(t)
+    lines.append(line)
+    sizes = [_eq_seq_size(ln) for ln in lines]
+    width = max(w for w, _ in sizes)
+    height = sum(h for _, h in sizes)
+    return round(width * font_size), round(height * font_size)
+
+
+# ---------------------------------------------------------------------------
+# Problem height estimation
+# ---------------------------------------------------------------------------
+
+def _para_height(width: int, para_pr: int, font_size: int,
+                 eq_height: int = 0) -> int:
+    """Height of one paragraph whose runs add up to *width* HWPUNIT."""
+    spacing, before, after = _PARA_METRICS[para_pr]
+    lines = max(1, math.ceil(width / CELL_TEXT_WIDTH))
+    pitch = font_size * spacing // 100
+    # An inline equation taller than one text line stretches its line
+    extra = max(0, eq_height - font_size)
+    return before + lines * pitch + extra + after
+
+
+def _mixed_para_height(text: str, script: str | None, para_pr: int,
+                       char_pr: int) -> int:
+    size = _CHAR_FONTS[char_pr][0]
+    width = text_width(text, char_pr)
+    eq_h = 0
+    if script:
+        eq_w, eq_h = equation_size(script, size)
+        width += eq_w
+    return _para_height(width, para_pr, size, eq_h)
+
+
+def estimate_problem_height(prob: dict, prob_num: int = 1) -> int:
+    """Estimated height in HWPUNIT of a problem cell's content.
+
+    Mirrors the paragraphs emitted by table_layout._make_problem_cell_content:
+    problem line (number, text, inline equation, points), standalone
+    equation, sub-problems, graph picture and vertical choice lines.
+    """
+    body = STYLE["CHAR_BODY"]
+    choice = STYLE["CHAR_CHOICE"]
+    text = prob.get("text", "")
+    eq = prob.get("equation", "")
+    points = prob.get("points")
+
+    # Problem line
+    size = _CHAR_FONTS[body][0]
+    width = text_width(f"{prob_num}. ", STYLE["CHAR_EXAM_NUM"]) + text_width(text, body)
+    if points is not None:
+        width += text_width(f" [{points}점]", STYLE["CHAR_POINTS"])
+    eq_h = 0
+    if eq and text:
+        eq_w, eq_h = equation_size(eq, size)
+        width += eq_w
+    height = _para_height(width, STYLE["PARA_BODY"], size, eq_h)
+
+    if eq and not text:
+        height += _mixed_para_height("", eq, STYLE["PARA_EQ"], body)
+
+    for j, sub in enumerate(prob.get("sub_problems", [])):
+        height += _mixed_para_height(f"({j + 1}) {sub.get('text', '')} ",
+                                     sub.get("equation") or None,
+                                     STYLE["PARA_CHOICE"], body)
+
+    graph = prob.get("graph")
+    if graph:
+        _, before, after = _PARA_METRICS[STYLE["PARA_EQ"]]
+        height += before + graph_size_hu(graph)[1] + after
+
+    for choice_text in prob.get("choices", []):
+        if choice_text.startswith("$") and choice_text.endswith("$"):
+            height += _mixed_para_height("① ", choice_text[1:-1],
+                                         STYLE["PARA_CHOICE"], choice)
+        else:
+            height += _mixed_para_height(f"① {choice_text}", None,
+                                         STYLE["PARA_CHOICE"], choice)
+
+    return height + 2 * CELL_MARGIN_TB
+
+
+# ---------------------------------------------------------------------------
+# Page planners
+# ---------------------------------------------------------------------------
+
+def report_overflow(prob_num: int, estimated: int, available: int) -> None:
+    """Print an overflow-risk warning for one problem cell."""
+    print(f"WARNING: problem {prob_num} may overflow its cell "
+          f"(estimated {estimated} HU > {available} HU row)", file=sys.stderr)
+
+
+def fixed_pages(problems, problems_per_page: int, first_row_height: int,
+                row_height: int) -> Iterator[tuple[list, int, int]]:
+    """Original layout: problems_per_page per page, 2 rows of fixed height."""
+    page, prob_num = [], 1
+    first = True
+    for prob in problems:
+        rh = first_row_height if first else row_height
+        est = estimate_problem_height(prob, prob_num)
+        if est > rh:
+            report_overflow(prob_num, est, rh)
+        page.append(prob)
+        prob_num += 1
+        if len(page) == problems_per_page:
+            yield page, 2, rh
+            page, first = [], False
+    if page:
+        yield page, 2, first_row_height if first else row_height
+
+
+def packed_pages(problems, first_page_height: int, page_height: int,
+                 max_rows: int = 4, writing_space: int = 6000,
+                 col_count: int = 2) -> Iterator[tuple[list, int, int]]:
+    """Pack problems into pages by estimated height (next-fit, one pass).
+
+    A page with n problems uses ceil(n / col_count) rows of equal height, so
+    a problem is added only while rows × tallest (content + writing_space)
+    still fits the page. Leftover height is spread evenly over the rows as
+    extra writing space. Each problem is estimated exactly once.
+    """
+    page: list = []
+    tallest = 0
+    capacity = first_page_height
+    prob_num = 1
+    start_num = 1
+
+    def flush():
+        rows = math.ceil(len(page) / col_count)
+        row_h = capacity // rows
+        for k, est in enumerate(page_est):
+            if est - writing_space > row_h:
+                report_overflow(start_num + k, est - writing_space, row_h)
+        return page, rows, row_h
+
+    page_est: list[int] = []
+    for prob in problems:
+        need = estimate_problem_height(prob, prob_num) + writing_space
+        rows = math.ceil((len(page) + 1) / col_count)
+        if page and (rows > max_rows or rows * max(tallest, need) > capacity):
+            yield flush()
+            page, page_est, tallest = [], [], 0
+            capacity = page_height
+            start_num = prob_num
+        page.append(prob)
+        page_est.append(need)
+        tallest = max(tallest, need)
+        prob_num += 1
+    if page:
+        yield flush()
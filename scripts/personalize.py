@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""Personalized worksheets from parameterized problem templates (mail merge).
+
+A template problem is an ordinary problem whose text, equation,
+sub-problems, choices, answer and graph spec contain {{name}} placeholders
+for parameters declared in "params":
+
+    {
+      "text": "이차방정식의 두 근의 합을 구하시오.",
+      "equation": "x^2 - {{s}}x + {{p}} = 0",
+      "params": {
+        "r1": {"int": [1, 9]},
+        "r2": {"int": [1, 9]},
+        "k": {"choice": [2, 3, 5]},
+        "c": {"float": [0.5, 2], "round": 1},
+        "s": "r1 + r2",
+        "p": "r1 * r2"
+      },
+      "constraints": ["r1 < r2", "p % 2 == 0"],
+      "answer": "s",
+      "graph": {"type": "polynomial", "coeffs": [1, "{{-s}}", "{{p}}"]}
+    }
+
+- int [lo, hi] (inclusive), float [lo, hi] with "round" decimals, or
+  choice [values] draw a value per student; a string is an expression of
+  the parameters declared before it (expr_compiler syntax: + - * / // %
+  **, comparisons, sqrt, abs, ...)
+- constraints are expressions that must hold; students whose draw breaks
+  one are drawn again (only those rows), up to MAX_ROUNDS times
+- "answer" is an expression, or text with placeholders
+- {{name}} only names declared parameters ({{-s}}, a negated parameter,
+  is also accepted); anything else in double braces is left alone, so
+  Hancom scripts such as {{1} over {2}} are safe
+- in a graph spec, a value that is a single placeholder becomes a number;
+  templated graphs are always rendered as PNGs
+
+All students are drawn at once: every parameter, derived value, constraint
+and answer is one NumPy array over the class. The paper is then laid out
+once as a skeleton with value markers; each student's section0.xml is the
+skeleton with that student's values joined in, and graphs are rendered
+once per distinct spec (in parallel with --jobs). Layout follows the
+skeleton, so every student gets the same page breaks; picture sizes come
+from the first student's graph.
+
+Header fields (title, subtitle, info) may use {{student}} (the roster name,
+or the student number without a roster) and {{number}}.
+
+Provides:
+- sample_params: parameter arrays for n students, constraints enforced
+- format_values: array → display strings (integers without ".0")
+- merge_build: one .hwpx per student plus answers.csv
+
+Usage:
+    python personalize.py --problems templates.json --students roster.txt --output-dir out/
+    python personalize.py --problems templates.json -n 1000 --seed 7 --exam-type worksheet --output-dir out/
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from build_math_hwpx import BASE_DIR, _graph_defaults, _lint_equations, apply_overrides
+from expr_compiler import ExpressionError, compile_expression
+from graph_sizing import graph_backend
+from graph_worker import render_png_bytes
+from hwpx_utils import (
+    _add_images_to_manifest,
+    pack_hwpx,
+    update_metadata,
+    validate_hwpx,
+    validate_xml,
+)
+from problem_io import load_problems
+from profiling import span
+from section_generators import iter_section_xml
+
+MAX_ROUNDS = 100        # redraws for students that break a constraint
+DEFAULT_DECIMALS = 4    # decimals shown for non-integer values without "round"
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*(-?)\s*([A-Za-z_]\w*)\s*\}\}")
+_MARK_RE = re.compile("\ue000(\\d+)\ue001")
+_HEADER_FIELDS = ("title", "subtitle", "info")
+_UNSAFE_NAME_RE = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+# ---------------------------------------------------------------------------
+# Parameters
+# ---------------------------------------------------------------------------
+
+def _evaluate(expr: str, values: dict, where: str) -> np.ndarray:
+    """expr over the numeric arrays in values; SystemExit naming where on errors."""
+    values = {k: v for k, v in values.items() if v.dtype.kind in "iufb"}
+    try:
+        return compile_expression(expr, tuple(sorted(values))).evaluate(values)
+    except ExpressionError as e:
+        raise SystemExit(f"Template error in {where}: {e}")
+
+
+def _draw(name: str, spec, size: int, rng, where: str) -> np.ndarray:
+    if isinstance(spec, dict) and "int" in spec:
+        lo, hi = spec["int"]
+        return rng.integers(lo, hi + 1, size)
+    if isinstance(spec, dict) and "float" in spec:
+        lo, hi = spec["float"]
+        return np.round(rng.uniform(lo, hi, size), spec.get("round", 2))
+    if isinstance(spec, dict) and "choice" in spec:
+        return rng.choice(np.asarray(spec["choice"]), size)
+    raise SystemExit(f"Template error in {where}: parameter {name!r} needs int, float, "
+                     "choice or an expression")
+
+
+def sample_params(params: dict, constraints: list[str], n: int, rng,
+                  where: str = "template") -> dict[str, np.ndarray]:
+    """Arrays of n values per parameter (declaration order), all constraints met.
+
+    A student with a non-finite value (a / b with b = 0, sqrt(-1), ...)
+    fails like a broken constraint and is drawn again.
+    """
+    drawn = {name: spec for name, spec in params.items() if not isinstance(spec, str)}
+    derived = {name: spec for name, spec in params.items() if isinstance(spec, str)}
+
+    def derive(values: dict) -> None:
+        for name, spec in params.items():
+            if name in derived:
+                known = {k: v for k, v in values.items() if k in params and k != name}
+                values[name] = _evaluate(spec, known, f"{where}, parameter {name!r}")
+
+    values = {name: _draw(name, spec, n, rng, where) for name, spec in drawn.items()}
+    derive(values)
+    rows = np.arange(n)  # students whose values are not checked yet
+    for _ in range(MAX_ROUNDS):
+        subset = {name: v[rows] for name, v in values.items()}
+        ok = np.ones(len(rows), dtype=bool)
+        for v in subset.values():
+            if v.dtype.kind == "f":
+                ok &= np.isfinite(v)
+        for constraint in constraints:
+            ok &= _evaluate(constraint, subset, f"{where}, constraint {constraint!r}") != 0
+        rows = rows[~ok]
+        if not rows.size:
+            return values
+        redrawn = {name: _draw(name, spec, rows.size, rng, where) for name, spec in drawn.items()}
+        derive(redrawn)
+        for name, v in redrawn.items():
+            if values[name].dtype != v.dtype:
+                values[name] = values[name].astype(np.result_type(values[name], v))
+            values[name][rows] = v
+    invalid = [name for name, v in values.items()
+               if v.dtype.kind == "f" and not np.isfinite(v[rows]).all()]
+    if invalid:
+        raise SystemExit(f"Template error in {where}: parameter {invalid[0]!r} is not a finite "
+                         f"number for {rows.size} of {n} students after {MAX_ROUNDS} draws "
+                         "(division by zero?); add a constraint that rules those draws out")
+    raise SystemExit(f"Template error in {where}: constraints still fail for {rows.size} of "
+                     f"{n} students after {MAX_ROUNDS} draws; widen the parameter ranges")
+
+
+def format_values(values: np.ndarray, decimals: int | None = None) -> list[str]:
+    """Display strings: integral numbers without a decimal point, others rounded."""
+    if values.dtype.kind not in "iufb":
+        return [str(v) for v in values]
+    if values.dtype.kind in "iub":
+        return [str(int(v)) for v in values]
+    decimals = DEFAULT_DECIMALS if decimals is None else decimals
+    rounded = np.round(values, decimals)
+    integral = np.isfinite(rounded) & (rounded == np.round(rounded))
+    return [str(int(v)) if whole else f"{v:.{decimals}f}".rstrip("0").rstrip(".")
+            for v, whole in zip(rounded.tolist(), integral.tolist())]
+
+
+# ---------------------------------------------------------------------------
+# Skeleton
+# ---------------------------------------------------------------------------
+
+class _Columns:
+    """Per-student display values, one column per placeholder; marker i ↔ column i."""
+
+    def __init__(self):
+        self.columns: list[list[str]] = []
+        self._index = {}
+
+    def marker(self, key, make) -> str:
+        """Marker for column *key*; make() gives its values the first time."""
+        if key not in self._index:
+            self._index[key] = len(self.columns)
+            self.columns.append(make())
+        return f"\ue000{self._index[key]}\ue001"
+
+
+def _substitute(text: str, replace) -> str:
+    """Replace {{name}}/{{-name}} placeholders for which replace() returns a string."""
+    def sub(m):
+        out = replace(m.group(2), bool(m.group(1)))
+        return m.group(0) if out is None else out
+    return PLACEHOLDER_RE.sub(sub, text)
+
+
+def _walk(value, func):
+    """Apply func to every string in a JSON-like value."""
+    if isinstance(value, str):
+        return func(value)
+    if isinstance(value, list):
+        return [_walk(v, func) for v in value]
+    if isinstance(value, dict):
+        return {k: _walk(v, func) for k, v in value.items()}
+    return value
+
+
+class _Template:
+    """One template problem: its parameter arrays and display strings."""
+
+    def __init__(self, prob: dict, prob_num: int, n: int, rng):
+        self.num = prob_num
+        self.params = prob.get("params", {})
+        where = f"problem {prob_num}"
+        self.values = sample_params(self.params, prob.get("constraints", []), n, rng, where)
+        self._text = {}
+
+    def display(self, name: str, negate: bool = False) -> list[str] | None:
+        if name not in self.values:
+            return None
+        key = (name, negate)
+        if key not in self._text:
+            v = self.values[name]
+            if negate:
+                v = -v.astype(float)
+            spec = self.params.get(name)
+            decimals = spec.get("round") if isinstance(spec, dict) else None
+            self._text[key] = format_values(v, decimals)
+        return self._text[key]
+
+    def number(self, name: str, negate: bool, i: int):
+        v = self.values[name][i].item()
+        return -v if negate else v
+
+
+def _skeleton_problem(prob: dict, tmpl: _Template, cols: _Columns, prob_num: int) -> dict:
+    """prob with placeholders swapped for value markers (graph and answer left out)."""
+    def mark(text):
+        def replace(name, negate):
+            if tmpl.display(name) is None:
+                return None
+            return cols.marker((prob_num, name, negate),
+                               lambda: [escape(s) for s in tmpl.display(name, negate)])
+        return _substitute(text, replace)
+
+    skeleton = {k: v for k, v in prob.items()
+                if k not in ("params", "constraints", "answer", "graph")}
+    return _walk(skeleton, mark)
+
+
+def _student_graph(spec: dict, tmpl: _Template, i: int) -> dict:
+    """Graph spec of student i: lone placeholders become numbers."""
+    def fill(text):
+        m = PLACEHOLDER_RE.fullmatch(text.strip())
+        if m and m.group(2) in tmpl.values:
+            return tmpl.number(m.group(2), bool(m.group(1)), i)
+        return _substitute(text, lambda name, negate: (
+            tmpl.display(name, negate)[i] if tmpl.display(name) is not None else None))
+    return _walk(spec, fill)
+
+
+def _answers(prob: dict, tmpl: _Template | None, n: int) -> list | None:
+    """Display answer per student, or None when the problem has no "answer"."""
+    answer = prob.get("answer")
+    if answer is None:
+        return None
+    if tmpl is None or not isinstance(answer, str):
+        return [answer] * n
+    if PLACEHOLDER_RE.search(answer):
+        texts = []
+        for i in range(n):
+            texts.append(_substitute(answer, lambda name, negate: (
+                tmpl.display(name, negate)[i] if tmpl.display(name) is not None else None)))
+        return texts
+    values = _evaluate(answer, tmpl.values, f"problem {tmpl.num}, answer")
+    if not np.isfinite(values).all():
+        raise SystemExit(f"Template error in problem {tmpl.num}, answer {answer!r}: not a finite "
+                         f"number for {int((~np.isfinite(values)).sum())} of {n} students; "
+                         "add a constraint that rules those draws out")
+    return format_values(values)
+
+
+# ---------------------------------------------------------------------------
+# Merge build
+# ---------------------------------------------------------------------------
+
+def _render(spec: dict) -> bytes:
+    """render_png_bytes as bytes, which a process pool can send back."""
+    return bytes(render_png_bytes(spec))
+
+
+def _render_unique(specs: list[dict], jobs: int) -> list[bytes]:
+    """PNG of each spec, rendering each distinct spec once (in parallel with jobs > 1)."""
+    keys = [json.dumps(spec, sort_keys=True) for spec in specs]
+    unique = list(dict.fromkeys(keys))
+    with span("graph", unique=len(unique), total=len(specs)):
+        try:
+            if jobs > 1 and len(unique) > 1:
+                with ProcessPoolExecutor(max_workers=jobs) as pool:
+                    pngs = list(pool.map(_render, map(json.loads, unique),
+                                         chunksize=max(1, len(unique) // (jobs * 4))))
+            else:
+                pngs = [_render(json.loads(k)) for k in unique]
+        except ValueError as e:  # unknown type, bad custom expression, ...
+            raise SystemExit(f"Graph error: {e}")
+    by_key = dict(zip(unique, pngs))
+    return [by_key[k] for k in keys]
+
+
+def _file_name(i: int, width: int, student: str | None) -> str:
+    stem = f"{i + 1:0{width}d}"
+    if student:
+        stem += "_" + _UNSAFE_NAME_RE.sub("_", student).strip("_")
+    return stem + ".hwpx"
+
+
+def merge_build(problems_file: Path, output_dir: Path, students: list[str] | None = None,
+                count: int | None = None, seed=None, title: str | None = None,
+                creator: str | None = None, jobs: int = 1, lint: bool = True,
+                **options) -> list[Path]:
+    """Write one worksheet per student into output_dir, plus answers.csv.
+
+    options are the build overrides of build_math_hwpx.apply_overrides.
+    """
+    if not BASE_DIR.is_dir():
+        raise SystemExit(f"Base template not found: {BASE_DIR}")
+    if not problems_file.is_file():
+        raise SystemExit(f"Problems file not found: {problems_file}")
+    n = len(students) if students else count
+    if not n:
+        raise SystemExit("No students: give a roster or a count")
+    if lint:
+        _lint_equations(problems_file)
+    with span("load_problems", file=problems_file.name):
+        data, problems = load_problems(problems_file)
+        problems = list(problems)
+    apply_overrides(data, title, **options)
+    graph_defaults = _graph_defaults(data)
+    rng = np.random.default_rng(seed)
+
+    # 1. Parameters, derived values, constraints and answers for the whole class
+    cols = _Columns()
+    skeleton, graphs, answer_columns = [], [], []
+    with span("sample", students=n):
+        for prob_num, prob in enumerate(problems, 1):
+            tmpl = _Template(prob, prob_num, n, rng) if "params" in prob else None
+            skeleton.append(_skeleton_problem(prob, tmpl, cols, prob_num) if tmpl else prob)
+            if "graph" in prob:
+                spec = dict(prob["graph"])
+                for key, value in graph_defaults.items():
+                    spec.setdefault(key, value)
+                if tmpl and PLACEHOLDER_RE.search(json.dumps(spec, ensure_ascii=False)):
+                    spec["backend"] = "png"
+                    graphs.append((prob_num, [_student_graph(spec, tmpl, i) for i in range(n)]))
+                else:
+                    graphs.append((prob_num, [spec]))
+                skeleton[-1] = dict(skeleton[-1], graph=graphs[-1][1][0])
+            answers = _answers(prob, tmpl, n)
+            if answers is not None:
+                answer_columns.append((prob_num, answers))
+
+    names = students or [str(i + 1) for i in range(n)]
+    header = {}
+    for field in _HEADER_FIELDS:
+        if isinstance(data.get(field), str):
+            header[field] = _substitute(data[field], lambda name, negate: (
+                cols.marker(("header", name), lambda: [escape(s) for s in names])
+                if name == "student" else
+                cols.marker(("header", name), lambda: [str(i + 1) for i in range(n)])
+                if name == "number" else None))
+
+    # 2. Graphs: PNG specs rendered once per distinct spec
+    pictures = {}  # problem number → PNG per student (or one shared)
+    try:
+        png_graphs = [(num, specs) for num, specs in graphs if graph_backend(specs[0]) != "native"]
+    except ValueError as e:
+        raise SystemExit(f"Graph error: {e}")
+    if png_graphs:
+        flat = [spec for _, specs in png_graphs for spec in specs]
+        pngs = iter(_render_unique(flat, jobs))
+        for num, specs in png_graphs:
+            pictures[num] = [next(pngs) for _ in specs]
+    image_ids = {num: f"graph{num}" for num in pictures}
+
+    # 3. Skeleton: the paper laid out once, with value markers
+    with span("section"):
+        sdata = dict(data, **header, problems=skeleton, _image_ids=image_ids)
+        pieces = _MARK_RE.split("".join(iter_section_xml(sdata)))
+    literals, refs = pieces[0::2], [cols.columns[int(c)] for c in pieces[1::2]]
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    width = len(str(n))
+    papers = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        work = Path(tmpdir) / "build"
+        with span("template_copy"):
+            shutil.copytree(BASE_DIR, work)
+        section_path = work / "Contents" / "section0.xml"
+        hpf_path = work / "Contents" / "content.hpf"
+        if image_ids:
+            _add_images_to_manifest(hpf_path, image_ids)
+        update_metadata(hpf_path, title, creator)
+        hpf = hpf_path.read_bytes()
+        named_title = title and PLACEHOLDER_RE.search(title)
+        for xml_file in [*work.rglob("*.xml"), *work.rglob("*.hpf")]:
+            with span("validate_xml", file=xml_file.name):
+                validate_xml(xml_file)
+
+        # 4. Per student: values into the skeleton, then pack
+        parts = [None] * len(pieces)
+        parts[0::2] = literals
+        for i in range(n):
+            with span("student", index=i):
+                parts[1::2] = [col[i] for col in refs]
+                section_path.write_text("".join(parts), encoding="utf-8")
+                if named_title:
+                    hpf_path.write_bytes(hpf)
+                    update_metadata(hpf_path, _substitute(title, lambda name, negate: (
+                        names[i] if name == "student" else
+                        str(i + 1) if name == "number" else None)), creator)
+                entries = {f"BinData/graph_{num}.png": pngs[i if len(pngs) > 1 else 0]
+                           for num, pngs in pictures.items()}
+                out = output_dir / _file_name(i, width, students[i] if students else None)
+                with span("pack"):
+                    pack_hwpx(work, out, entries)
+                if i == 0:
+                    # Every paper has the skeleton's structure: check the first in full
+                    validate_xml(section_path)
+                    errors = validate_hwpx(out)
+                    if errors:
+                        print(f"WARNING: {out} has issues:", file=sys.stderr)
+                        for e in errors:
+                            print(f"  - {e}", file=sys.stderr)
+                papers.append(out)
+
+    answers_path = output_dir / "answers.csv"
+    with open(answers_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["student", *(num for num, _ in answer_columns)])
+        for i in range(n):
+            writer.writerow([names[i], *(answers[i] for _, answers in answer_columns)])
+    print(f"{n} worksheets → {output_dir}")
+    print(f"  Answers: {answers_path}")
+    return papers
+
+
+def _read_roster(path: Path) -> list[str]:
+    """Names from a .txt (one per line) or .csv (first column, header skipped if "name")."""
+    if not path.is_file():
+        raise SystemExit(f"Roster not found: {path}")
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            rows = [row[0].strip() for row in csv.reader(f) if row and row[0].strip()]
+            if rows and rows[0].lower() in ("name", "student", "이름"):
+                rows = rows[1:]
+            return rows
+        return [line.strip() for line in f if line.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Personalized worksheets from problem templates")
+    parser.add_argument("--problems", "-p", type=Path, required=True,
+                        help="JSON or JSONL file with template (and ordinary) problems")
+    who = parser.add_mutually_exclusive_group(required=True)
+    who.add_argument("--students", type=Path,
+                     help="Roster: .txt with one name per line, or .csv (first column)")
+    who.add_argument("--count", "-n", type=int, help="Number of worksheets without a roster")
+    parser.add_argument("--seed", type=int, help="Random seed (same seed, same worksheets)")
+    parser.add_argument("--output-dir", type=Path, required=True,
+                        help="Directory for the worksheets and answers.csv")
+    parser.add_argument("--title", help="Document title")
+    parser.add_argument("--creator", help="Document creator")
+    parser.add_argument("--exam-type", choices=["worksheet", "학력평가", "수능", "exam"],
+                        default="학력평가", help="Exam type (default: 학력평가)")
+    parser.add_argument("--layout", choices=["fixed", "auto"],
+                        help="Exam page layout: fixed problems_per_page (default) or auto")
+    parser.add_argument("--graph-renderer", choices=["matplotlib", "fast"],
+                        help="PNG renderer: matplotlib (default) or fast")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Processes rendering graphs (default: CPU count)")
+    parser.add_argument("--no-lint", action="store_true",
+                        help="Skip the equation script check that runs before the build")
+    args = parser.parse_args()
+
+    students = _read_roster(args.students) if args.students else None
+    merge_build(args.problems, args.output_dir, students, args.count, args.seed,
+                title=args.title, creator=args.creator, jobs=args.jobs, lint=not args.no_lint,
+                exam_type=args.exam_type, layout=args.layout, graph_renderer=args.graph_renderer)
+
+
+if __name__ == "__main__":
+    main()
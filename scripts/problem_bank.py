@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""SQLite problem bank: import problem files, select papers by query.
+
+Problems are stored as their JSON text plus indexed columns to select on:
+grade, unit, difficulty, points, has_graph, and tags (a separate table,
+indexed by tag). Column values come from the problem's own keys, falling
+back to the file header ("grade", "unit") and to import options.
+
+Queries are whitespace-separated terms, all of which must hold:
+
+    grade=고2 unit=수열|극한 points>=3 has_graph=0 tag=기출 difficulty<=3
+    limit=20 order=random seed=7
+
+- field OP value, with OP one of = != < <= > >=; "a|b" means any of a, b
+- tag=a|b: problems carrying any of the tags (tag!=x: not carrying x)
+- limit=N, order=id (import order, default) | random, seed=N for a
+  reproducible random order
+
+select() streams matching problems from a cursor, so a build can take its
+problems straight from the bank (build_math_hwpx.py --bank ... --query ...)
+without an intermediate JSON file.
+
+Provides:
+- connect: open (and create) a bank
+- import_problems / import_file: add problems (exact duplicates skipped)
+- parse_query: query text → SQL WHERE clause, parameters, ORDER/LIMIT
+- select: iterator of problem dicts for a query
+- load_query: (header, problem iterator) like problem_io.load_problems
+
+Usage:
+    python problem_bank.py import bank.db problems.json --grade 고2 --unit 수열 --tags 기출,2024
+    python problem_bank.py query bank.db "grade=고2 points>=3 limit=20 order=random seed=1" -o paper.json
+    python problem_bank.py stats bank.db
+    python build_math_hwpx.py --bank bank.db --query "grade=고2 unit=수열 limit=20" --output exam.hwpx
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS problems (
+    id         INTEGER PRIMARY KEY,
+    grade      TEXT,
+    unit       TEXT,
+    difficulty INTEGER,
+    points     INTEGER,
+    has_graph  INTEGER NOT NULL,
+    source     TEXT,
+    digest     TEXT NOT NULL UNIQUE,
+    body       TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS problem_tags (
+    problem_id INTEGER NOT NULL REFERENCES problems(id) ON DELETE CASCADE,
+    tag        TEXT NOT NULL,
+    PRIMARY KEY (tag, problem_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_problems_grade_unit ON problems (grade, unit);
+CREATE INDEX IF NOT EXISTS idx_problems_unit ON problems (unit);
+CREATE INDEX IF NOT EXISTS idx_problems_points ON problems (points);
+CREATE INDEX IF NOT EXISTS idx_problems_difficulty ON problems (difficulty);
+CREATE INDEX IF NOT EXISTS idx_problems_has_graph ON problems (has_graph);
+CREATE INDEX IF NOT EXISTS idx_problem_tags_problem ON problem_tags (problem_id);
+"""
+
+# Query fields → (column, type)
+FIELDS = {
+    "grade": ("grade", str),
+    "unit": ("unit", str),
+    "difficulty": ("difficulty", int),
+    "points": ("points", int),
+    "has_graph": ("has_graph", int),
+    "source": ("source", str),
+    "id": ("id", int),
+}
+_TERM_RE = re.compile(r"^([a-z_]+)(<=|>=|!=|=|<|>)(.+)$")
+_BATCH = 1000
+_MASK64 = (1 << 64) - 1
+
+
+def _shuffle_key(problem_id: int, seed: int) -> int:
+    """Seeded 63-bit hash of a problem id (splitmix64 finalizer) for order=random.
+
+    The seed is mixed in before the avalanche steps, so each seed gives an
+    unrelated order rather than a rotation of the same one.
+    """
+    x = (problem_id * 0x9E3779B97F4A7C15 + seed * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return (x ^ (x >> 31)) >> 1  # SQLite integers are signed 64-bit
+
+
+def connect(path: str | Path) -> sqlite3.Connection:
+    """Open the bank at *path*, creating the schema if needed."""
+    conn = sqlite3.connect(path)
+    conn.create_function("shuffle_key", 2, _shuffle_key, deterministic=True)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+# ---------------------------------------------------------------------------
+# Import
+# ---------------------------------------------------------------------------
+
+def _int_or_none(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def import_problems(conn: sqlite3.Connection, problems: Iterable[dict],
+                    defaults: dict | None = None, source: str | None = None) -> tuple[int, int]:
+    """Insert *problems*; returns (added, skipped as exact duplicates).
+
+    defaults supply grade, unit, difficulty and tags for problems that do
+    not carry them. Inserts are batched inside one transaction.
+    """
+    defaults = defaults or {}
+    added = skipped = 0
+    rows, tag_rows = [], []
+
+    def flush():
+        nonlocal added, skipped
+        for row, tags in zip(rows, tag_rows):
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO problems (grade, unit, difficulty, points, has_graph, "
+                "source, digest, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+            if cur.rowcount:
+                added += 1
+                conn.executemany("INSERT OR IGNORE INTO problem_tags VALUES (?, ?)",
+                                 [(cur.lastrowid, tag) for tag in tags])
+            else:
+                skipped += 1
+        rows.clear()
+        tag_rows.clear()
+
+    with conn:
+        for prob in problems:
+            body = json.dumps(prob, ensure_ascii=False, sort_keys=True)
+            tags = prob.get("tags", defaults.get("tags", []))
+            rows.append((
+                prob.get("grade", defaults.get("grade")),
+                prob.get("unit", defaults.get("unit")),
+                _int_or_none(prob.get("difficulty", defaults.get("difficulty"))),
+                _int_or_none(prob.get("points")),
+                int("graph" in prob),
+                source,
+                hashlib.sha1(body.encode("utf-8")).hexdigest(),
+                body,
+            ))
+            tag_rows.append([str(t) for t in tags])
+            if len(rows) >= _BATCH:
+                flush()
+        flush()
+    return added, skipped
+
+
+def import_file(conn: sqlite3.Connection, path: Path, **defaults) -> tuple[int, int]:
+    """Import a .json/.jsonl problem file; header grade/unit are defaults."""
+    from problem_io import load_problems
+
+    header, problems = load_problems(path)
+    merged = {key: header[key] for key in ("grade", "unit") if key in header}
+    merged.update({k: v for k, v in defaults.items() if v is not None})
+    return import_problems(conn, problems, merged, source=path.name)
+
+
+# ---------------------------------------------------------------------------
+# Query
+# ---------------------------------------------------------------------------
+
+def parse_query(text: str) -> tuple[str, list, str]:
+    """(WHERE clause, parameters, ORDER BY/LIMIT suffix) of a query string.
+
+    Field names are whitelisted and values are bound as parameters, so the
+    query text never reaches the SQL itself.
+    """
+    where, params = [], []
+    limit = None
+    order, seed = "id", 0
+    for term in text.replace(",", " ").split():
+        m = _TERM_RE.match(term)
+        if not m:
+            raise ValueError(f"bad query term {term!r}: expected field OP value")
+        name, op, value = m.groups()
+        if name in ("limit", "order", "seed"):
+            if op != "=":
+                raise ValueError(f"{name} only takes '='")
+            if name == "order":
+                if value not in ("id", "random"):
+                    raise ValueError("order is id or random")
+                order = value
+            else:
+                try:
+                    number = int(value)
+                except ValueError:
+                    raise ValueError(f"{name} expects an integer, got {value!r}") from None
+                if name == "limit":
+                    limit = number
+                else:
+                    seed = number
+            continue
+        if name == "tag":
+            if op not in ("=", "!="):
+                raise ValueError("tag takes '=' or '!='")
+            tags = value.split("|")
+            marks = ", ".join("?" * len(tags))
+            negate = "NOT " if op == "!=" else ""
+            where.append(f"{negate}EXISTS (SELECT 1 FROM problem_tags t WHERE "
+                         f"t.problem_id = p.id AND t.tag IN ({marks}))")
+            params += tags
+            continue
+        if name not in FIELDS:
+            raise ValueError(f"unknown query field {name!r}. "
+                             f"Available: {[*FIELDS, 'tag', 'limit', 'order', 'seed']}")
+        column, kind = FIELDS[name]
+        try:
+            values = [kind(v) for v in value.split("|")]
+        except ValueError:
+            raise ValueError(f"{name} expects an integer, got {value!r}") from None
+        if len(values) > 1:
+            if op not in ("=", "!="):
+                raise ValueError(f"'|' only works with '=' and '!=' ({term!r})")
+            marks = ", ".join("?" * len(values))
+            where.append(f"p.{column} {'NOT ' if op == '!=' else ''}IN ({marks})")
+        else:
+            where.append(f"p.{column} {op} ?")
+        params += values
+    if order == "random":
+        # Seeded shuffle: a hash of (id, seed), stable for a seed; needs a
+        # connection from connect(), which registers shuffle_key
+        suffix = " ORDER BY shuffle_key(p.id, ?), p.id"
+        params.append(seed)
+    else:
+        suffix = " ORDER BY p.id"
+    if limit is not None:
+        suffix += " LIMIT ?"
+        params.append(limit)
+    return " AND ".join(where) or "1", params, suffix
+
+
+def select(conn: sqlite3.Connection, query: str) -> Iterator[dict]:
+    """Problems matching *query*, decoded one row at a time."""
+    where, params, suffix = parse_query(query)
+    cur = conn.execute(f"SELECT p.body FROM problems p WHERE {where}{suffix}", params)
+    for (body,) in cur:
+        yield json.loads(body)
+
+
+def count(conn: sqlite3.Connection, query: str) -> int:
+    """Number of problems *query* selects (limit applied)."""
+    where, params, suffix = parse_query(query)
+    sql = f"SELECT COUNT(*) FROM (SELECT 1 FROM problems p WHERE {where}{suffix})"
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def load_query(path: Path, query: str) -> tuple[dict, Iterator[dict]]:
+    """(header, lazy problem iterator) for a query, like load_problems.
+
+    The header only pins "grade" when the query selects exactly one grade;
+    title, exam type and the rest come from the build options.
+    """
+    if not Path(path).is_file():
+        raise SystemExit(f"Problem bank not found: {path}")
+    try:
+        parse_query(query)
+    except ValueError as e:
+        raise SystemExit(f"Bad --query: {e}")
+    header = {}
+    grade = re.search(r"(?:^|[\s,])grade=([^\s,|]+)(?=$|[\s,])", query)
+    if grade:
+        header["grade"] = grade.group(1)
+    conn = connect(path)
+
+    def problems():
+        try:
+            yield from select(conn, query)
+        finally:
+            conn.close()
+
+    return header, problems()
+
+
+def stats(conn: sqlite3.Connection) -> str:
+    """Problem counts per grade and unit, and the most used tags."""
+    lines = [f"{'grade':<8} {'unit':<20} {'problems':>9} {'graphs':>7}"]
+    for grade, unit, n, graphs in conn.execute(
+            "SELECT grade, unit, COUNT(*), SUM(has_graph) FROM problems "
+            "GROUP BY grade, unit ORDER BY grade, unit"):
+        lines.append(f"{grade or '-':<8} {unit or '-':<20} {n:>9} {graphs:>7}")
+    total = conn.execute("SELECT COUNT(*) FROM problems").fetchone()[0]
+    lines.append(f"{'total':<29} {total:>9}")
+    tags = conn.execute("SELECT tag, COUNT(*) FROM problem_tags GROUP BY tag "
+                        "ORDER BY COUNT(*) DESC LIMIT 10").fetchall()
+    if tags:
+        lines.append("tags: " + ", ".join(f"{tag} ({n})" for tag, n in tags))
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite problem bank for math-hwpx")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Import JSON/JSONL problem files")
+    p_import.add_argument("bank", type=Path)
+    p_import.add_argument("files", nargs="+", type=Path)
+    p_import.add_argument("--grade", help="Grade for problems without one (default: header)")
+    p_import.add_argument("--unit", help="Unit for problems without one (default: header)")
+    p_import.add_argument("--difficulty", type=int, help="Difficulty for problems without one")
+    p_import.add_argument("--tags", help="Comma-separated tags for problems without tags")
+
+    p_query = sub.add_parser("query", help="Select problems into a problems JSON/JSONL file")
+    p_query.add_argument("bank", type=Path)
+    p_query.add_argument("query")
+    p_query.add_argument("--output", "-o", type=Path,
+                         help="Problems file to write (default: print the count)")
+
+    p_stats = sub.add_parser("stats", help="Counts per grade, unit and tag")
+    p_stats.add_argument("bank", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        conn = connect(args.bank)
+        tags = [t for t in args.tags.split(",") if t] if args.tags else None
+        for path in args.files:
+            if not path.is_file():
+                raise SystemExit(f"Problems file not found: {path}")
+            added, skipped = import_file(conn, path, grade=args.grade, unit=args.unit,
+                                         difficulty=args.difficulty, tags=tags)
+            print(f"  {path.name}: {added} added, {skipped} duplicate(s) skipped")
+        conn.close()
+    elif args.command == "query":
+        header, problems = load_query(args.bank, args.query)
+        if args.output is None:
+            conn = connect(args.bank)
+            print(f"{count(conn, args.query)} problems")
+            conn.close()
+            return
+        from synth_bank import write_bank
+
+        fmt = "jsonl" if args.output.suffix.lower() in (".jsonl", ".ndjson") else "json"
+        with open(args.output, "w", encoding="utf-8") as f:
+            n = write_bank(f, header, problems, fmt)
+        print(f"{n} problems → {args.output}")
+    else:
+        if not args.bank.is_file():
+            raise SystemExit(f"Problem bank not found: {args.bank}")
+        conn = connect(args.bank)
+        print(stats(conn))
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Incremental problem data readers for math-hwpx builds.
+
+Problem banks can be far larger than a single paper, so problems are read
+one at a time instead of loading the whole file with json.load.
+
+Provides:
+- load_problems: (header dict, problem iterator) for .json / .jsonl files
+- iter_json_problems: incremental reader for the standard problems JSON
+- iter_jsonl_problems: JSON Lines reader (header line + one problem per line)
+
+Both readers are generators that yield the header dict first and then each
+problem dict in order; load_problems primes the generator for callers.
+"""
+
+import json
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+def load_problems(path: Path) -> tuple[dict, Iterator[dict]]:
+    """Open a problems file and return its header and a lazy problem iterator.
+
+    The header holds every top-level key except "problems", wherever it
+    appears in the file (see iter_json_problems for streams that cannot
+    seek).
+    """
+    if path.suffix.lower() in JSONL_SUFFIXES:
+        stream = iter_jsonl_problems(path)
+    else:
+        stream = iter_json_problems(path)
+    header = next(stream)
+    return header, stream
+
+
+# ---------------------------------------------------------------------------
+# JSON Lines
+# ---------------------------------------------------------------------------
+
+def iter_jsonl_problems(path: Path) -> Iterator[dict]:
+    """Yield the header line, then one problem per non-empty line.
+
+    The first line is the paper header (exam_type, year, grade, ...). If it
+    carries a "problems" array, those problems are yielded before the
+    following lines.
+    """
+    with open(path, encoding="utf-8") as f:
+        header = None
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise SystemExit(f"Malformed JSONL in {path.name} line {line_no}: {e}")
+            if not isinstance(obj, dict):
+                raise SystemExit(f"Malformed JSONL in {path.name} line {line_no}: "
+                                 f"expected an object")
+            if header is None:
+                inline = obj.pop("problems", [])
+                header = obj
+                yield header
+                yield from inline
+            else:
+                yield obj
+        if header is None:
+            raise SystemExit(f"Empty JSONL file: {path}")
+
+
+# ---------------------------------------------------------------------------
+# Standard JSON (incremental)
+# ---------------------------------------------------------------------------
+
+class _Buffer:
+    """Chunked text buffer over a file handle for incremental decoding."""
+
+    def __init__(self, f, name: str):
+        self._f = f
+        self._name = name
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read another chunk; return False at end of file."""
+        if self.eof:
+            return False
+        chunk = self._f.read(_CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        self.text += chunk
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character ("" at end of file)."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        found = self.peek()
+        if found != ch:
+            self.error(f"expected {ch!r}, found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as e:
+                if self.fill():
+                    continue
+                self.error(e.msg)
+            # A value that ends exactly at the buffer end may be a truncated
+            # number ("20" of "2025"); read on until something follows it.
+            if end == len(self.text) and self.fill():
+                continue
+            self.pos = end
+            return obj
+
+    def error(self, msg: str):
+        raise SystemExit(f"Malformed JSON in {self._name}: {msg}")
+
+
+def _members(buf: _Buffer) -> Iterator[str]:
+    """Yield each key of the top-level object; the caller consumes its value."""
+    buf.expect("{")
+    first = True
+    while True:
+        ch = buf.peek()
+        if ch == "}":
+            buf.pos += 1
+            return
+        if not first:
+            if ch != ",":
+                buf.error(f"expected ',' or '}}', found {ch or 'end of file'!r}")
+            buf.pos += 1
+        first = False
+
+        key = buf.value()
+        if not isinstance(key, str):
+            buf.error("object keys must be strings")
+        buf.expect(":")
+        yield key
+
+
+def _elements(buf: _Buffer) -> Iterator:
+    """Yield each element of the array at the buffer position as it is parsed."""
+    buf.expect("[")
+    if buf.peek() == "]":
+        buf.pos += 1
+        return
+    while True:
+        yield buf.value()
+        ch = buf.peek()
+        buf.pos += 1
+        if ch == "]":
+            return
+        if ch != ",":
+            buf.error(f"expected ',' or ']' in problems, found {ch or 'end of file'!r}")
+
+
+def _scan_header(f, name: str) -> dict:
+    """Every top-level key except "problems", whose elements are skipped."""
+    buf = _Buffer(f, name)
+    header = {}
+    seen = False
+    for key in _members(buf):
+        if key != "problems":
+            header[key] = buf.value()
+            continue
+        if seen:
+            buf.error('duplicate "problems" key')
+        seen = True
+        for _ in _elements(buf):
+            pass
+    return header
+
+
+def iter_json_problems(path: Path) -> Iterator[dict]:
+    """Yield the header dict, then each element of "problems" as it is parsed.
+
+    Only one problem is held in memory at a time. Key order does not
+    matter: a seekable file is read twice, first to collect the header
+    keys on either side of "problems" (its elements are decoded and
+    dropped), then to stream the problems. On a stream that cannot seek,
+    keys after "problems" reach the header only after the last problem,
+    with a warning.
+    """
+    with open(path, encoding="utf-8") as f:
+        prescanned = f.seekable()
+        header = _scan_header(f, path.name) if prescanned else {}
+        if prescanned:
+            f.seek(0)
+        buf = _Buffer(f, path.name)
+        header_sent = False
+        late_keys = []
+        for key in _members(buf):
+            if key != "problems":
+                value = buf.value()
+                if not prescanned:
+                    header[key] = value
+                    if header_sent:
+                        late_keys.append(key)
+                continue
+            if header_sent:
+                buf.error('duplicate "problems" key')
+            yield header
+            header_sent = True
+            yield from _elements(buf)
+
+        if not header_sent:
+            yield header
+        elif late_keys:
+            print(f"WARNING: {path.name}: keys after \"problems\" were read after "
+                  f"generation started: {', '.join(late_keys)}", file=sys.stderr)
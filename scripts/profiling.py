@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Stage timing spans for builds, exported as a Chrome trace.
+
+build() marks each stage with span(name, **args). Spans cost one global
+lookup while no profile is active and no listener is registered; inside
+profile() they are recorded as
+Chrome "complete" events (ph "X") that chrome://tracing or
+https://ui.perfetto.dev open directly, and summary() folds them into a
+per-stage table. Listeners (see metrics) get every span's duration,
+profile or not.
+
+Spans nest (a graph render inside section generation); the table's
+"self" column is time not covered by nested spans on the same thread.
+
+Provides:
+- span: context manager timing one stage (no-op unless profiling)
+- traced_iter: iterate while timing each next() as a span
+- profile: context manager that activates a Profiler and yields it
+- add_listener: call fn(name, seconds, args) at the end of every span
+  (and optionally on_start(name, args) as it begins); remove_listener undoes it
+- Profiler: recorded events, write_trace() and summary()
+
+Usage:
+    from profiling import profile
+    with profile() as prof:
+        build(...)
+    prof.write_trace("trace.json")
+    print(prof.summary())
+"""
+
+import json
+import os
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+_active = None
+_listeners = []
+_start_listeners = []
+
+
+class Profiler:
+    """Collects spans from every thread of this process."""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter_ns()
+
+    def add(self, name: str, start_ns: int, end_ns: int, args: dict) -> None:
+        event = {
+            "name": name, "cat": "build", "ph": "X",
+            "ts": (start_ns - self._t0) / 1000, "dur": (end_ns - start_ns) / 1000,
+            "pid": os.getpid(), "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def write_trace(self, path: str | Path) -> None:
+        """Write the Chrome trace_event JSON (microsecond timestamps)."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f,
+                      ensure_ascii=False)
+
+    def _self_times(self) -> list[float]:
+        """Duration of each event minus its direct children (same thread)."""
+        order = sorted(range(len(self.events)),
+                       key=lambda i: (self.events[i]["tid"], self.events[i]["ts"],
+                                      -self.events[i]["dur"]))
+        self_us = [e["dur"] for e in self.events]
+        stack = []  # indices of open spans on the current thread
+        for i in order:
+            event = self.events[i]
+            while stack and (self.events[stack[-1]]["tid"] != event["tid"]
+                             or self.events[stack[-1]]["ts"] + self.events[stack[-1]]["dur"]
+                             <= event["ts"]):
+                stack.pop()
+            if stack:
+                self_us[stack[-1]] -= event["dur"]
+            stack.append(i)
+        return self_us
+
+    def summary(self) -> str:
+        """Per-stage table: calls, total, self, mean and max time in ms."""
+        rows = {}
+        for event, self_us in zip(self.events, self._self_times()):
+            row = rows.setdefault(event["name"], [0, 0.0, 0.0, 0.0])
+            row[0] += 1
+            row[1] += event["dur"]
+            row[2] += self_us
+            row[3] = max(row[3], event["dur"])
+        wall = (max((e["ts"] + e["dur"] for e in self.events), default=0.0)
+                - min((e["ts"] for e in self.events), default=0.0))
+        lines = [f"{'stage':<16} {'calls':>6} {'total (ms)':>11} {'self (ms)':>10} "
+                 f"{'mean (ms)':>10} {'max (ms)':>9}"]
+        for name, (calls, total, own, longest) in sorted(rows.items(), key=lambda r: -r[1][2]):
+            lines.append(f"{name:<16} {calls:>6} {total / 1000:>11.1f} {own / 1000:>10.1f} "
+                         f"{total / calls / 1000:>10.2f} {longest / 1000:>9.1f}")
+        lines.append(f"{'wall':<16} {'':>6} {wall / 1000:>11.1f}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def span(name: str, /, **args):
+    """Time the enclosed block as stage *name*; *args* tag the trace event."""
+    prof = _active
+    if prof is None and not _listeners:
+        yield
+        return
+    for listener in _start_listeners:
+        listener(name, args)
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        if prof is not None:
+            prof.add(name, start, end, args)
+        for listener in _listeners:
+            listener(name, (end - start) / 1e9, args)
+
+
+def traced_iter(name: str, iterable: Iterable) -> Iterator:
+    """Yield from *iterable*, timing each item's production as span *name*.
+
+    For lazy readers, where the work happens in next() rather than up
+    front. Items are tagged with their 1-based index.
+    """
+    if _active is None and not _listeners:
+        yield from iterable
+        return
+    it = iter(iterable)
+    index = 0
+    while True:
+        index += 1
+        with span(name, index=index):
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+        yield item
+
+
+def add_listener(listener, on_start=None) -> None:
+    """Register listener(name, seconds, args), called as each span ends.
+
+    on_start(name, args), if given, is called as each span begins.
+    """
+    _listeners.append(listener)
+    if on_start is not None:
+        _start_listeners.append(on_start)
+
+
+def remove_listener(listener, on_start=None) -> None:
+    _listeners.remove(listener)
+    if on_start is not None:
+        _start_listeners.remove(on_start)
+
+
+@contextmanager
+def profile():
+    """Record spans for the duration of the block; yields the Profiler."""
+    global _active
+    previous, _active = _active, Profiler()
+    try:
+        yield _active
+    finally:
+        _active = previous
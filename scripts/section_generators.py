@@ -5,8 +5,13 @@ Routes problem data to the appropriate generator:
 - generate_worksheet_section_xml: simple 2-column worksheet
 - generate_exam_section_xml: standardized Korean exam (학력평가/수능)
 - generate_section_xml: router that auto-detects format from data
+
+Each generator has an iter_* counterpart that yields the XML in chunks so
+problems can arrive from a lazy iterator (see problem_io.py) and the
+section can be written out page by page.
 """
 
+from collections.abc import Iterator
 from pathlib import Path
 
 from lxml import etree
@@ -29,6 +34,10 @@ from exam_helpers import (
 from table_layout import (
     make_problem_table,
 )
+from page_layout import (
+    fixed_pages,
+    packed_pages,
+)
 
 
 # Resolve paths relative to this script
@@ -48,8 +57,16 @@ def generate_worksheet_section_xml(data: dict) -> str:
     Args:
         data: Problem data with keys: title, subtitle (optional), problems[]
     """
+    return "".join(iter_worksheet_section_xml(data))
+
+
+def iter_worksheet_section_xml(data: dict) -> Iterator[str]:
+    """Yield worksheet section0.xml in chunks; data["problems"] may be lazy."""
+    return _assemble_section(_iter_worksheet_paragraphs(data))
+
+
+def _iter_worksheet_paragraphs(data: dict) -> Iterator[str]:
     idgen = IDGen()
-    paragraphs = []
 
     # Read the secPr block from base section0.xml template
     base_section = BASE_DIR / "Contents" / "section0.xml"
@@ -57,29 +74,31 @@ def generate_worksheet_section_xml(data: dict) -> str:
     root = tree.getroot()
     first_p = root.find(f"{{{NS['hp']}}}p")
     secpr_para = etree.tostring(first_p, encoding="unicode")
-    paragraphs.append(secpr_para)
+    yield secpr_para
 
     # Title
     title = data.get("title", "")
+    if data.get("variant"):
+        title = f"{title} ({data['variant']}형)".strip()
     if title:
-        paragraphs.append(make_text_para(idgen, title, para_pr=STYLE["PARA_TITLE"], char_pr=STYLE["CHAR_TITLE"]))
+        yield make_text_para(idgen, title, para_pr=STYLE["PARA_TITLE"], char_pr=STYLE["CHAR_TITLE"])
 
     # Subtitle
     subtitle = data.get("subtitle", "")
     if subtitle:
-        paragraphs.append(make_text_para(idgen, subtitle, para_pr=STYLE["PARA_TITLE"], char_pr=STYLE["CHAR_SUBTITLE"]))
+        yield make_text_para(idgen, subtitle, para_pr=STYLE["PARA_TITLE"], char_pr=STYLE["CHAR_SUBTITLE"])
 
     # Info line (name/date/score)
     info = data.get("info", "")
     if info:
-        paragraphs.append(make_text_para(idgen, info, para_pr=0, char_pr=STYLE["CHAR_BODY"]))
+        yield make_text_para(idgen, info, para_pr=0, char_pr=STYLE["CHAR_BODY"])
     else:
-        paragraphs.append(
+        yield (
             make_text_para(idgen, "이름:                    날짜:           점수:      /      ",
                            para_pr=0, char_pr=STYLE["CHAR_BODY"])
         )
 
-    paragraphs.append(make_empty_para(idgen))
+    yield make_empty_para(idgen)
 
     # Problems
     problems = data.get("problems", [])
@@ -87,12 +106,12 @@ def generate_worksheet_section_xml(data: dict) -> str:
         # Problem number + text
         prob_text = prob.get("text", "")
         prob_num_text = f"{i}. {prob_text}" if prob_text else f"{i}."
-        paragraphs.append(make_text_para(idgen, prob_num_text, para_pr=STYLE["PARA_BODY"], char_pr=STYLE["CHAR_PROB_NUM"]))
+        yield make_text_para(idgen, prob_num_text, para_pr=STYLE["PARA_BODY"], char_pr=STYLE["CHAR_PROB_NUM"])
 
         # Main equation (display mode)
         eq = prob.get("equation", "")
         if eq:
-            paragraphs.append(make_equation_para(idgen, eq, para_pr=STYLE["PARA_EQ"], char_pr=STYLE["CHAR_BODY"]))
+            yield make_equation_para(idgen, eq, para_pr=STYLE["PARA_EQ"], char_pr=STYLE["CHAR_BODY"])
 
         # Sub-problems
         sub_problems = prob.get("sub_problems", [])
@@ -102,17 +121,17 @@ def generate_worksheet_section_xml(data: dict) -> str:
             sub_eq = sub.get("equation", "")
 
             if sub_text and sub_eq:
-                paragraphs.append(
+                yield (
                     make_text_with_equation(idgen, f"{sub_label}{sub_text} ", sub_eq,
                                             para_pr=STYLE["PARA_CHOICE"], char_pr=STYLE["CHAR_BODY"])
                 )
             elif sub_eq:
-                paragraphs.append(
+                yield (
                     make_text_with_equation(idgen, sub_label, sub_eq,
                                             para_pr=STYLE["PARA_CHOICE"], char_pr=STYLE["CHAR_BODY"])
                 )
             elif sub_text:
-                paragraphs.append(
+                yield (
                     make_text_para(idgen, f"{sub_label}{sub_text}", para_pr=STYLE["PARA_CHOICE"], char_pr=STYLE["CHAR_BODY"])
                 )
 
@@ -124,25 +143,17 @@ def generate_worksheet_section_xml(data: dict) -> str:
                 label = choice_labels[k] if k < len(choice_labels) else f"({k+1})"
                 if choice.startswith("$") and choice.endswith("$"):
                     eq_script = choice[1:-1]
-                    paragraphs.append(
+                    yield (
                         make_text_with_equation(idgen, f"{label} ", eq_script,
                                                 para_pr=STYLE["PARA_CHOICE"], char_pr=STYLE["CHAR_CHOICE"])
                     )
                 else:
-                    paragraphs.append(
+                    yield (
                         make_text_para(idgen, f"{label} {choice}", para_pr=STYLE["PARA_CHOICE"], char_pr=STYLE["CHAR_CHOICE"])
                     )
 
         # Spacing between problems
-        paragraphs.append(make_empty_para(idgen))
-
-    # Assemble
-    body = "\n  ".join(paragraphs)
-    return f"""<?xml version='1.0' encoding='UTF-8'?>
-<hs:sec {SEC_NAMESPACES}>
-  {body}
-</hs:sec>
-"""
+        yield make_empty_para(idgen)
 
 
 # ---------------------------------------------------------------------------
@@ -159,11 +170,25 @@ def generate_exam_section_xml(data: dict) -> str:
     4. Page break between tables
     5. Footer on last page
     """
+    return "".join(iter_exam_section_xml(data))
+
+
+def iter_exam_section_xml(data: dict) -> Iterator[str]:
+    """Yield exam section0.xml in chunks, one page table per chunk.
+
+    data["problems"] may be a lazy iterator: each page table is generated as
+    soon as problems_per_page problems have arrived. With data["layout"] ==
+    "auto" pages are packed by estimated problem height instead (see
+    page_layout.py); either way overflow risks are reported on stderr.
+    """
+    return _assemble_section(_iter_exam_paragraphs(data))
+
+
+def _iter_exam_paragraphs(data: dict) -> Iterator[str]:
     idgen = IDGen()
-    paragraphs = []
 
     # --- secPr paragraph (1 column — tables handle 2-col layout) ---
-    paragraphs.append(make_secpr_para(idgen, col_count=1, same_gap=0))
+    yield make_secpr_para(idgen, col_count=1, same_gap=0)
 
     # --- Exam header (full-width) ---
     year = data.get("year", "")
@@ -181,27 +206,30 @@ def generate_exam_section_xml(data: dict) -> str:
             f'<hp:run charPrIDRef="{STYLE["CHAR_EXAM_TITLE"]}">'
             f'<hp:t>{escape(title)}</hp:t></hp:run>',
         ]
-        paragraphs.append(_make_multi_run_para(idgen, title_runs, para_pr=STYLE["PARA_EXAM_TITLE"]))
+        yield _make_multi_run_para(idgen, title_runs, para_pr=STYLE["PARA_EXAM_TITLE"])
 
     session_runs = [
         f'<hp:run charPrIDRef="{STYLE["CHAR_SESSION"]}">'
         f'<hp:t>제 {session} 교시</hp:t></hp:run>',
     ]
-    paragraphs.append(_make_multi_run_para(idgen, session_runs, para_pr=STYLE["PARA_SESSION"]))
+    yield _make_multi_run_para(idgen, session_runs, para_pr=STYLE["PARA_SESSION"])
 
-    paragraphs.append(
-        make_text_para(idgen, f"{subject_area} 영역", para_pr=STYLE["PARA_SUBJECT"], char_pr=STYLE["CHAR_SUBJECT"])
-    )
+    # Variant papers (variants.py) are marked next to the subject: "수학 영역 (A형)"
+    subject = f"{subject_area} 영역"
+    if data.get("variant"):
+        subject += f" ({data['variant']}형)"
+    yield make_text_para(idgen, subject, para_pr=STYLE["PARA_SUBJECT"], char_pr=STYLE["CHAR_SUBJECT"])
 
     # Horizontal rule
-    paragraphs.append(make_empty_para(idgen, para_pr=STYLE["PARA_HR"], char_pr=0))
+    yield make_empty_para(idgen, para_pr=STYLE["PARA_HR"], char_pr=0)
 
     # --- Problem tables (invisible tables, N problems per page) ---
     problems = data.get("problems", [])
     problems_per_page = data.get("problems_per_page", 4)
 
     # Build image_ids mapping: prob_num → manifest item ID
-    # (populated by build() when graphs exist)
+    # (populated by build() when graphs exist — possibly while problems
+    # are still being read, so look IDs up per page rather than copying)
     image_ids = data.get("_image_ids", {})
 
     # Table dimensions
@@ -211,35 +239,50 @@ def generate_exam_section_xml(data: dict) -> str:
     first_page_row_height = data.get("first_row_height", 25000)   # ~88mm (header eats space)
     normal_row_height = data.get("row_height", 36000)             # ~127mm (full page)
 
-    # Group problems: all pages get 4
-    groups = []
-    for i in range(0, len(problems), problems_per_page):
-        groups.append(problems[i:i + problems_per_page])
+    if data.get("layout", "fixed") == "auto":
+        # Content-aware: rows per page follow the estimated problem heights
+        pages = packed_pages(
+            problems,
+            first_page_height=first_page_row_height * 2,
+            page_height=normal_row_height * 2,
+            max_rows=data.get("max_rows_per_page", 4),
+            writing_space=data.get("writing_space", 6000),
+        )
+    else:
+        # Group problems: all pages get 4
+        pages = fixed_pages(problems, problems_per_page,
+                            first_page_row_height, normal_row_height)
 
     prob_num = 1
-    for g_idx, group in enumerate(groups):
+    for g_idx, (group, row_count, rh) in enumerate(pages):
         is_first = (g_idx == 0)
-        rh = first_page_row_height if is_first else normal_row_height
 
-        paragraphs.append(make_problem_table(
+        yield make_problem_table(
             idgen, group, prob_num,
             table_width=table_width,
             image_ids=image_ids,
             row_height=rh,
-            row_count=2,
+            row_count=row_count,
             page_break=(not is_first),
-        ))
+            cell_content=data.get("_cell_content"),
+        )
         prob_num += len(group)
 
     # (footer removed — no page numbers needed)
 
-    # Assemble
-    body = "\n  ".join(paragraphs)
-    return f"""<?xml version='1.0' encoding='UTF-8'?>
+
+# ---------------------------------------------------------------------------
+# Shared helpers
+# ---------------------------------------------------------------------------
+
+def _assemble_section(paragraphs: Iterator[str]) -> Iterator[str]:
+    """Wrap paragraph XMLs in the hs:sec root, yielding chunks as they come."""
+    yield f"""<?xml version='1.0' encoding='UTF-8'?>
 <hs:sec {SEC_NAMESPACES}>
-  {body}
-</hs:sec>
-"""
+  """
+    for i, para in enumerate(paragraphs):
+        yield para if i == 0 else "\n  " + para
+    yield "\n</hs:sec>\n"
 
 
 # ---------------------------------------------------------------------------
@@ -252,7 +295,12 @@ def generate_section_xml(data: dict) -> str:
     Default is exam format (학력평가). Only uses worksheet format when
     exam_type is explicitly set to "worksheet".
     """
+    return "".join(iter_section_xml(data))
+
+
+def iter_section_xml(data: dict) -> Iterator[str]:
+    """Streaming variant of generate_section_xml (yields XML chunks)."""
     exam_type = data.get("exam_type", "학력평가")
     if exam_type == "worksheet":
-        return generate_worksheet_section_xml(data)
-    return generate_exam_section_xml(data)
+        return iter_worksheet_section_xml(data)
+    return iter_exam_section_xml(data)
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""Synthetic problem banks for load testing builds.
+
+Generates problem sets of any size whose shape resembles real papers:
+Korean problem text of varying length, Hancom equation scripts of
+configurable nesting depth (fractions, roots, integrals, sums, limits,
+matrices, ...), sub-problems, five choices (some as $...$ equations) and
+graph specs spread over every graph type. Everything comes from one
+seeded random.Random, so the same options and seed give the same bank.
+
+Problems are written as they are generated, so a 100k-problem bank never
+sits in memory: JSONL is a header line plus one problem per line, JSON is
+the standard {"...header", "problems": [...]} layout that
+problem_io.iter_json_problems reads incrementally.
+
+Provides:
+- BankOptions: size and distribution knobs
+- iter_problems: generator of problem dicts
+- make_header: exam or worksheet header dict
+- write_bank: stream a bank to a file object as JSON or JSONL
+- GRAPH_SPEC_MAKERS: graph type → random spec maker (all GRAPH_TYPES)
+
+Usage:
+    # 100k-problem bank as JSON Lines
+    python synth_bank.py --problems 100000 --format jsonl --output bank.jsonl
+
+    # 10k papers of 20 problems each, one file per paper
+    python synth_bank.py --papers 10000 --problems 20 --output-dir papers/
+
+    # Heavier equations, more graphs, only function graphs, other seed
+    python synth_bank.py -n 500 --eq-depth 4 --graph-ratio 0.6 \
+        --graph-types polynomial,trig,exp_log --seed 7 -o heavy.json
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+FORMATS = ("json", "jsonl")
+
+
+@dataclass
+class BankOptions:
+    """Size and distribution of a synthetic bank (ratios are probabilities)."""
+
+    problems: int = 100
+    seed: int = 0
+    exam_type: str = "학력평가"
+    text_words: tuple[int, int] = (4, 40)      # min, max words of problem text
+    eq_depth: int = 2                          # max nesting of equation constructs
+    equation_ratio: float = 0.7
+    sub_ratio: float = 0.3
+    max_subs: int = 4
+    choice_ratio: float = 0.8
+    eq_choice_ratio: float = 0.5               # share of choice sets written as $...$
+    graph_ratio: float = 0.25
+    graph_types: list[str] = field(default_factory=lambda: list(GRAPH_SPEC_MAKERS))
+
+
+# ---------------------------------------------------------------------------
+# Text
+# ---------------------------------------------------------------------------
+
+_SUBJECTS = ["함수 f(x)", "이차방정식", "수열 {a_n}", "삼각형 ABC", "확률변수 X", "원 C",
+             "두 점 A, B", "직선 l", "다항식 P(x)", "정적분", "곡선 y=f(x)", "집합 A"]
+_CONDITIONS = ["가 다음 조건을 만족시킬 때,", "에 대하여", "의 그래프가 그림과 같을 때,",
+               "가 실수 전체의 집합에서 연속일 때,", "의 값이 최대가 되도록 할 때,",
+               "에서 모든 실수 x에 대하여 부등식이 성립할 때,"]
+_FILLERS = ["주어진", "양수", "자연수", "상수", "실수", "서로 다른", "두", "세", "모든",
+            "구간", "조건", "그래프", "접선", "넓이", "길이", "좌표", "기울기", "합"]
+_QUESTIONS = ["의 값은?", "의 최댓값은?", "의 최솟값은?", "을 구하여라.", "의 개수는?",
+              "의 넓이는?", "을 만족시키는 모든 실수의 합은?"]
+
+
+def _text(rng: random.Random, words: tuple[int, int]) -> str:
+    n = rng.randint(*words)
+    parts = [rng.choice(_SUBJECTS) + rng.choice(_CONDITIONS)]
+    parts += [rng.choice(_FILLERS) for _ in range(max(0, n - 3))]
+    parts.append(rng.choice(_SUBJECTS).split()[0] + rng.choice(_QUESTIONS))
+    return " ".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Equations (Hancom equation script)
+# ---------------------------------------------------------------------------
+
+_VARS = ["x", "y", "a", "b", "n", "k", "t", "theta", "alpha"]
+_FUNCS = ["sin", "cos", "tan", "log", "ln"]
+_RELATIONS = ["=", "<", ">", "<=", ">=", "!="]
+
+
+def _atom(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.4:
+        return rng.choice(_VARS)
+    if kind < 0.7:
+        return str(rng.randint(1, 20))
+    if kind < 0.85:
+        return f"{rng.choice(_VARS)}^{rng.randint(2, 4)}"
+    return f"{rng.choice(_VARS)}_{rng.randint(1, 9)}"
+
+
+def _expr(rng: random.Random, depth: int) -> str:
+    """A random expression; depth bounds the nesting of constructs."""
+    if depth <= 0 or rng.random() < 0.3:
+        terms = [_atom(rng) for _ in range(rng.randint(1, 3))]
+        return f" {rng.choice(['+', '-', 'times'])} ".join(terms)
+    inner = _expr(rng, depth - 1)
+    other = _expr(rng, depth - 1)
+    construct = rng.randrange(12)
+    if construct == 0:
+        return f"{{{inner}}} over {{{other}}}"
+    if construct == 1:
+        return f"sqrt {{{inner}}}"
+    if construct == 2:
+        return f"root {rng.randint(3, 5)} of {{{inner}}}"
+    if construct == 3:
+        lo, hi = sorted(rng.sample(range(-3, 6), 2))
+        return f"int _{{{lo}}} ^{{{hi}}} ({inner}) dx"
+    if construct == 4:
+        return f"sum _{{k=1}} ^{{n}} ({inner})"
+    if construct == 5:
+        return f"lim _{{x -> {rng.choice(['0', '1', 'inf'])}}} {{{inner}}}"
+    if construct == 6:
+        return f"{rng.choice(_FUNCS)} {{{inner}}}"
+    if construct == 7:
+        return f"left ( {inner} right )^{rng.randint(2, 3)}"
+    if construct == 8:
+        return f"left | {inner} right |"
+    if construct == 9:
+        return f"log _{rng.randint(2, 9)} {{{inner}}}"
+    if construct == 10:
+        return f"pmatrix {{{_atom(rng)} & {_atom(rng)} # {_atom(rng)} & {_atom(rng)}}}"
+    return f"{inner} {rng.choice(['+', '-'])} {other}"
+
+
+def _equation(rng: random.Random, depth: int) -> str:
+    lhs = _expr(rng, depth)
+    if rng.random() < 0.5:
+        return lhs
+    return f"{lhs} {rng.choice(_RELATIONS)} {_expr(rng, max(0, depth - 1))}"
+
+
+def _choices(rng: random.Random, as_equations: bool, depth: int) -> list[str]:
+    if as_equations:
+        return [f"${_expr(rng, max(0, depth - 1))}$" for _ in range(5)]
+    start = rng.randint(-5, 20)
+    step = rng.choice([1, 2, 3, 5])
+    return [str(start + step * i) for i in range(5)]
+
+
+# ---------------------------------------------------------------------------
+# Graph specs
+# ---------------------------------------------------------------------------
+
+def _nonzero(rng, lo, hi):
+    value = rng.randint(lo, hi - 1)
+    return value if value != 0 else hi
+
+
+def _vertices(rng, count):
+    """Convex polygon: points at sorted random angles on a circle."""
+    angles = sorted(rng.uniform(0, 2 * math.pi) for _ in range(count))
+    radius = rng.uniform(3, 6)
+    return [[round(radius * math.cos(a), 1), round(radius * math.sin(a), 1)] for a in angles]
+
+
+def _polynomial(rng):
+    degree = rng.randint(2, 4)
+    return {"type": "polynomial",
+            "coeffs": [_nonzero(rng, -2, 2)] + [rng.randint(-3, 3) for _ in range(degree)],
+            "xlim": [-3, 3], "ylim": [-5, 5]}
+
+
+def _quadratic(rng):
+    return {"type": "quadratic", "a": rng.choice([-2, -1, -0.5, 0.5, 1, 2]),
+            "p": rng.randint(-2, 2), "q": rng.randint(-3, 3), "xlim": [-4, 4], "ylim": [-5, 5]}
+
+
+def _trig(rng):
+    return {"type": "trig", "func": rng.choice(["sin", "cos", "tan"]),
+            "amplitude": rng.choice([0.5, 1, 1.5]), "period_coeff": rng.choice([1, 2])}
+
+
+def _exp_log(rng):
+    return {"type": "exp_log", "kind": rng.choice(["exp", "log", "both"]),
+            "base": rng.choice([0.5, 2, 3])}
+
+
+def _rational(rng):
+    a, b, d = rng.randint(1, 3), rng.randint(-2, 2), rng.randint(-2, 2)
+    if a * d == b:  # (ax+b)/(x+d) would be constant
+        b += 1
+    return {"type": "rational", "a": a, "b": b, "c": 1, "d": d}
+
+
+def _conic(rng):
+    kind = rng.choice(["ellipse", "hyperbola", "circle", "parabola"])
+    return {"type": "conic", "kind": kind, "a": rng.randint(2, 4), "b": rng.randint(1, 3)}
+
+
+def _derivative(rng):
+    return {"type": "derivative", "coeffs": [1, 0, -rng.randint(1, 4), rng.randint(-1, 1)],
+            "xlim": [-3, 3], "ylim": [-5, 5]}
+
+
+def _integral_area(rng):
+    a = rng.randint(-2, 0)
+    return {"type": "integral_area", "coeffs": [-1, 0, rng.randint(3, 5)], "a": a,
+            "b": a + rng.randint(1, 3), "xlim": [-3, 3], "ylim": [-1, 6]}
+
+
+def _normal(rng):
+    mu, sigma = rng.choice([0, 50, 100]), rng.choice([1, 5, 10])
+    return {"type": "normal", "mu": mu, "sigma": sigma,
+            "shade_from": mu - sigma, "shade_to": mu + rng.choice([1, 2]) * sigma}
+
+
+def _binomial(rng):
+    return {"type": "binomial", "n": rng.randint(5, 20), "p": rng.choice([0.2, 0.3, 0.5]),
+            "shade": [{"from": rng.randint(2, 5)}]}
+
+
+def _standardization(rng):
+    mu, sigma = rng.choice([50, 60, 70]), rng.choice([5, 10])
+    return {"type": "standardization", "mu": mu, "sigma": sigma,
+            "values": [mu - sigma, mu, mu + 2 * sigma],
+            "shade": [{"from": mu - sigma, "to": mu + 2 * sigma}]}
+
+
+def _normal_table(rng):
+    return {"type": "normal_table",
+            "z_values": sorted(rng.sample([0.5, 1.0, 1.5, 2.0, 2.5, 3.0], 4))}
+
+
+def _number_line(rng):
+    lo = rng.randint(-4, 0)
+    return {"type": "number_line", "xlim": [-5, 6],
+            "intervals": [{"from": lo, "to": lo + rng.randint(2, 5),
+                           "open_left": rng.random() < 0.5, "open_right": rng.random() < 0.5}]}
+
+
+def _custom(rng):
+    expr = rng.choice(["np.sin(x) * x", "x**3 / 8 - x", "np.exp(-x**2)", "np.abs(x) - 2",
+                       "np.sqrt(np.abs(x))"])
+    return {"type": "custom", "curves": [{"expr": expr}], "xlim": [-4, 4], "ylim": [-4, 4]}
+
+
+def _triangle(rng):
+    vertices = _vertices(rng, 3)
+    return {"type": "triangle", "vertices": vertices,
+            "labels": dict(zip("ABC", vertices)), "show_angles": [True, False, True]}
+
+
+def _circle(rng):
+    a, b = sorted(rng.sample(range(0, 360, 30), 2))
+    return {"type": "circle", "center": [0, 0], "radius": rng.randint(2, 4),
+            "points_on_circle": [{"angle_deg": a, "label": "A"}, {"angle_deg": b, "label": "B"}],
+            "chords": [["A", "B"]]}
+
+
+def _quadrilateral(rng):
+    return {"type": "quadrilateral", "vertices": _vertices(rng, 4),
+            "show_diagonals": rng.random() < 0.5}
+
+
+def _coordinate(rng):
+    points = [[rng.randint(0, 6), rng.randint(0, 6)] for _ in range(3)]
+    return {"type": "coordinate", "xlim": [-1, 7], "ylim": [-1, 7],
+            "segments": [[points[0], points[1]], [points[1], points[2]]],
+            "fill_polygon": points}
+
+
+def _solid3d(rng):
+    kind = rng.choice(["cylinder", "cone", "sphere", "pyramid", "rectangular_prism",
+                       "triangular_prism"])
+    return {"type": "solid3d", "kind": kind, "params": {}}
+
+
+# Must cover graph_generator.GRAPH_TYPES (not imported here: it needs matplotlib)
+GRAPH_SPEC_MAKERS = {
+    "polynomial": _polynomial,
+    "quadratic": _quadratic,
+    "trig": _trig,
+    "exp_log": _exp_log,
+    "rational": _rational,
+    "conic": _conic,
+    "derivative": _derivative,
+    "integral_area": _integral_area,
+    "normal": _normal,
+    "binomial": _binomial,
+    "standardization": _standardization,
+    "normal_table": _normal_table,
+    "number_line": _number_line,
+    "custom": _custom,
+    "triangle": _triangle,
+    "circle": _circle,
+    "quadrilateral": _quadrilateral,
+    "coordinate": _coordinate,
+    "solid3d": _solid3d,
+}
+
+
+# ---------------------------------------------------------------------------
+# Problems and banks
+# ---------------------------------------------------------------------------
+
+def _problem(rng: random.Random, opts: BankOptions) -> dict:
+    prob = {"text": _text(rng, opts.text_words)}
+    if rng.random() < opts.equation_ratio:
+        prob["equation"] = _equation(rng, rng.randint(0, opts.eq_depth))
+    if rng.random() < opts.sub_ratio:
+        prob["sub_problems"] = [
+            {"equation": _equation(rng, rng.randint(0, opts.eq_depth))}
+            if rng.random() < 0.7 else {"text": _text(rng, (3, 10))}
+            for _ in range(rng.randint(2, opts.max_subs))
+        ]
+    if opts.graph_types and rng.random() < opts.graph_ratio:
+        prob["graph"] = GRAPH_SPEC_MAKERS[rng.choice(opts.graph_types)](rng)
+    if opts.exam_type != "worksheet":
+        prob["points"] = rng.choice([2, 3, 3, 4])
+        if rng.random() < opts.choice_ratio:
+            prob["choices"] = _choices(rng, rng.random() < opts.eq_choice_ratio, opts.eq_depth)
+    return prob
+
+
+def iter_problems(opts: BankOptions, seed: int | str | None = None) -> Iterator[dict]:
+    """Yield opts.problems problem dicts, reproducibly for a given seed."""
+    unknown = [t for t in opts.graph_types if t not in GRAPH_SPEC_MAKERS]
+    if unknown:
+        raise ValueError(f"Unknown graph type(s): {', '.join(unknown)}. "
+                         f"Available: {list(GRAPH_SPEC_MAKERS)}")
+    rng = random.Random(opts.seed if seed is None else seed)
+    for _ in range(opts.problems):
+        yield _problem(rng, opts)
+
+
+def make_header(opts: BankOptions, title: str = "합성 문제은행") -> dict:
+    """Top-level keys of a bank in the format opts.exam_type asks for."""
+    if opts.exam_type == "worksheet":
+        return {"title": title, "subtitle": f"{opts.problems}문항 (seed {opts.seed})",
+                "exam_type": "worksheet"}
+    return {"exam_type": opts.exam_type, "year": 2025, "month": 3, "grade": "고2",
+            "session": 2, "subject_area": "수학", "question_type_label": "5지선다형"}
+
+
+def write_bank(out, header: dict, problems, fmt: str = "json") -> int:
+    """Stream *header* and *problems* to the text file *out*; returns the count."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}. Available: {list(FORMATS)}")
+    count = 0
+    if fmt == "jsonl":
+        out.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for prob in problems:
+            out.write(json.dumps(prob, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+    out.write("{\n")
+    for key, value in header.items():
+        out.write(f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n")
+    out.write('  "problems": [\n')
+    for prob in problems:
+        out.write(("" if count == 0 else ",\n") + "    " + json.dumps(prob, ensure_ascii=False))
+        count += 1
+    out.write("\n  ]\n}\n")
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic math problem banks")
+    parser.add_argument("--problems", "-n", type=int, default=100,
+                        help="Problems in the bank, or per paper with --papers (default: 100)")
+    parser.add_argument("--papers", type=int,
+                        help="Write this many papers into --output-dir instead of one bank")
+    parser.add_argument("--output", "-o", type=Path,
+                        help="Output file (default: stdout); format from the suffix "
+                             "unless --format is given")
+    parser.add_argument("--output-dir", type=Path, help="Directory for --papers")
+    parser.add_argument("--format", choices=FORMATS, help="json (default) or jsonl")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--exam-type", choices=["worksheet", "학력평가", "수능", "exam"],
+                        default="학력평가")
+    parser.add_argument("--text-words", default="4,40", metavar="MIN,MAX",
+                        help="Words of problem text (default: 4,40)")
+    parser.add_argument("--eq-depth", type=int, default=2,
+                        help="Max nesting of fractions, roots, integrals... (default: 2)")
+    parser.add_argument("--equation-ratio", type=float, default=0.7)
+    parser.add_argument("--sub-ratio", type=float, default=0.3)
+    parser.add_argument("--choice-ratio", type=float, default=0.8)
+    parser.add_argument("--eq-choice-ratio", type=float, default=0.5)
+    parser.add_argument("--graph-ratio", type=float, default=0.25)
+    parser.add_argument("--graph-types",
+                        help="Comma-separated graph types (default: all); empty for no graphs")
+    args = parser.parse_args()
+
+    try:
+        lo, hi = (int(v) for v in args.text_words.split(","))
+    except ValueError:
+        parser.error("--text-words expects MIN,MAX")
+    opts = BankOptions(
+        problems=args.problems, seed=args.seed, exam_type=args.exam_type,
+        text_words=(lo, hi), eq_depth=args.eq_depth, equation_ratio=args.equation_ratio,
+        sub_ratio=args.sub_ratio, choice_ratio=args.choice_ratio,
+        eq_choice_ratio=args.eq_choice_ratio, graph_ratio=args.graph_ratio,
+    )
+    if args.graph_types is not None:
+        opts.graph_types = [t for t in args.graph_types.split(",") if t]
+    try:
+        list(iter_problems(BankOptions(problems=0, graph_types=opts.graph_types)))
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.papers:
+        if not args.output_dir:
+            parser.error("--papers needs --output-dir")
+        fmt = args.format or "json"
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        width = len(str(args.papers))
+        for i in range(1, args.papers + 1):
+            path = args.output_dir / f"paper_{i:0{width}d}.{fmt}"
+            with open(path, "w", encoding="utf-8") as f:
+                # Each paper has its own seed, so any one of them can be regenerated alone
+                write_bank(f, make_header(opts, f"합성 시험지 {i}"),
+                           iter_problems(opts, f"{opts.seed}/{i}"), fmt)
+        print(f"{args.papers} papers × {opts.problems} problems → {args.output_dir}",
+              file=sys.stderr)
+        return
+
+    fmt = args.format or ("jsonl" if args.output and args.output.suffix.lower()
+                          in (".jsonl", ".ndjson") else "json")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            count = write_bank(f, make_header(opts), iter_problems(opts), fmt)
+        print(f"{count} problems → {args.output}", file=sys.stderr)
+    else:
+        write_bank(sys.stdout, make_header(opts), iter_problems(opts), fmt)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 
 Provides:
 - _make_problem_cell_content: paragraph XML for a single problem cell
+- make_choice_para: paragraph XML for one multiple-choice option
 - make_problem_table: full 2×N table with invisible borders
 """
 
@@ -18,6 +19,7 @@ from exam_helpers import (
     make_exam_problem_para,
     make_picture_para,
 )
+from graph_sizing import graph_backend, graph_size_hu
 
 
 def _make_problem_cell_content(idgen: IDGen, prob_num: int, prob: dict,
@@ -62,34 +64,43 @@ def _make_problem_cell_content(idgen: IDGen, prob_num: int, prob: dict,
             paras.append(make_text_para(
                 idgen, f"{sub_label}{sub_text}", para_pr=STYLE["PARA_CHOICE"], char_pr=STYLE["CHAR_BODY"]))
 
-    # Graph image (inserted before choices if present)
-    if image_id:
-        graph_spec = prob.get("graph", {})
-        # Default: ~40mm × 40mm = 11340 HU × 11340 HU
-        gw = graph_spec.get("width_hu", 11340)
-        gh = graph_spec.get("height_hu", 11340)
+    # Graph (inserted before choices if present): native drawing objects,
+    # or the rendered PNG
+    graph_spec = prob.get("graph")
+    if graph_spec and graph_backend(graph_spec) == "native":
+        from native_figures import make_native_figure_para  # needs numpy
+        paras.append(make_native_figure_para(idgen, graph_spec))
+    elif image_id:
+        graph_spec = graph_spec or {}
+        # Default: ~40mm × 40mm = 11340 HU × 11340 HU (exact renders keep
+        # the graph's aspect ratio; see graph_sizing.py)
+        gw, gh = graph_size_hu(graph_spec)
         paras.append(make_picture_para(idgen, image_id, width_hu=gw, height_hu=gh))
 
-    choices = prob.get("choices", [])
-    choice_labels = ["①", "②", "③", "④", "⑤"]
-    for k, choice in enumerate(choices):
-        label = choice_labels[k] if k < len(choice_labels) else f"({k + 1})"
-        if choice.startswith("$") and choice.endswith("$"):
-            eq_script = choice[1:-1]
-            paras.append(make_text_with_equation(
-                idgen, f"{label} ", eq_script, para_pr=STYLE["PARA_CHOICE"], char_pr=STYLE["CHAR_CHOICE"]))
-        else:
-            paras.append(make_text_para(
-                idgen, f"{label} {choice}", para_pr=STYLE["PARA_CHOICE"], char_pr=STYLE["CHAR_CHOICE"]))
+    for k, choice in enumerate(prob.get("choices", [])):
+        paras.append(make_choice_para(idgen, k, choice))
 
     return "\n".join(paras)
 
 
+def make_choice_para(idgen: IDGen, k: int, choice: str) -> str:
+    """Paragraph XML for choice *choice* at 0-based position k (① … ⑤, then (6) …)."""
+    choice_labels = ["①", "②", "③", "④", "⑤"]
+    label = choice_labels[k] if k < len(choice_labels) else f"({k + 1})"
+    if choice.startswith("$") and choice.endswith("$"):
+        eq_script = choice[1:-1]
+        return make_text_with_equation(
+            idgen, f"{label} ", eq_script, para_pr=STYLE["PARA_CHOICE"], char_pr=STYLE["CHAR_CHOICE"])
+    return make_text_para(
+        idgen, f"{label} {choice}", para_pr=STYLE["PARA_CHOICE"], char_pr=STYLE["CHAR_CHOICE"])
+
+
 def make_problem_table(idgen: IDGen, problems_in_group: list,
                         start_num: int, table_width: int = 48192,
                         row_height: int = 32000, row_count: int = 2,
                         page_break: bool = False,
-                        image_ids: dict | None = None) -> str:
+                        image_ids: dict | None = None,
+                        cell_content=None) -> str:
     """Generate an invisible-border table for exam problems.
 
     Table layout mirrors standard Korean exam 2-column format:
@@ -98,7 +109,10 @@ def make_problem_table(idgen: IDGen, problems_in_group: list,
 
     Each cell has a fixed height, guaranteeing even spacing for writing area.
     Uses correct OWPML table structure with hp:subList, hp:cellAddr, hp:cellSpan.
+    cell_content replaces _make_problem_cell_content (same signature), e.g.
+    with the cached fragments of variants.py.
     """
+    cell_content = cell_content or _make_problem_cell_content
     tbl_id = idgen.next()
     wrap_pid = idgen.next()
 
@@ -120,10 +134,9 @@ def make_problem_table(idgen: IDGen, problems_in_group: list,
                 prob = problems_in_group[prob_idx]
                 prob_num = start_num + prob_idx
                 img_id = (image_ids or {}).get(prob_num)
-                cell_content = _make_problem_cell_content(
-                    idgen, prob_num, prob, image_id=img_id)
+                cell_xml = cell_content(idgen, prob_num, prob, image_id=img_id)
             else:
-                cell_content = make_empty_para(idgen)
+                cell_xml = make_empty_para(idgen)
 
             cells_xml.append(
                 f'<hp:tc name="" header="0" hasMargin="0" protect="0" '
@@ -132,7 +145,7 @@ def make_problem_table(idgen: IDGen, problems_in_group: list,
                 f'lineWrap="BREAK" vertAlign="TOP" linkListIDRef="0" '
                 f'linkListNextIDRef="0" textWidth="0" textHeight="0" '
                 f'hasTextRef="0" hasNumRef="0">'
-                f'{cell_content}'
+                f'{cell_xml}'
                 f'</hp:subList>'
                 f'<hp:cellAddr colAddr="{col}" rowAddr="{row}"/>'
                 f'<hp:cellSpan colSpan="1" rowSpan="1"/>'
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests for the Hancom equation script linter.
+
+Every keyword of eq_keywords.KEYWORDS is linted in a script that uses it
+the way Hangul expects, and must come back without issues: a keyword
+missing from the tables shows up as an "unknown word" warning when it is
+close to another one (odot → dot, hbar → bar). A few broken scripts must
+still be reported.
+
+Usage:
+    python test_eq_lint.py
+"""
+
+import sys
+
+from eq_keywords import ACCENTS, DELIMITERS, KEYWORDS, SCRIPTS, STACKS
+from eq_lint import lint_script
+
+# How structure keywords are used; anything else goes between two letters
+USAGE = {
+    "sqrt": "sqrt {x}", "root": "root 3 of {x}", "of": "root 3 of {x}",
+    "over": "a over b", "atop": "a atop b", "from": "int from 0 to 1 x",
+    "to": "int from 0 to 1 x", "left": "left ( x right )", "right": "left ( x right )",
+}
+
+# (script, severity of the first issue expected)
+BROKEN = [
+    ("sqrt", "error"),
+    ("root 3 {x}", "error"),
+    ("{a over b", "error"),
+    (r"\frac{1}{2}", "error"),
+    ("left ( x", "error"),
+    ("x sqr 2", "warning"),
+    ("thetta", "warning"),
+]
+
+
+def usage(keyword: str) -> str:
+    if keyword in USAGE:
+        return USAGE[keyword]
+    if keyword in SCRIPTS:
+        return f"x {keyword} 2"
+    if keyword in ACCENTS:
+        return f"{keyword} {{x}}"
+    if keyword in STACKS:
+        return f"{keyword} {{a # b}}"
+    if keyword in DELIMITERS:
+        return f"left {keyword} x right {keyword}"
+    return f"a {keyword} b"
+
+
+def main() -> None:
+    print("Running equation lint tests...")
+    unclean = 0
+    for keyword in sorted(KEYWORDS):
+        script = usage(keyword)
+        issues = lint_script(script)
+        if issues:
+            unclean += 1
+            print(f"  FAIL: {script!r}: {issues[0].severity}: {issues[0].message}")
+    print(f"  {'FAIL' if unclean else 'PASS'}: {len(KEYWORDS) - unclean} of "
+          f"{len(KEYWORDS)} keywords lint cleanly")
+    failures = bool(unclean)
+    for script, severity in BROKEN:
+        issues = lint_script(script)
+        ok = bool(issues) and issues[0].severity == severity
+        failures += not ok
+        print(f"  {'PASS' if ok else 'FAIL'}: {script!r} gives "
+              + (f"{issues[0].severity}: {issues[0].message}" if issues else "no issue"))
+    total = 1 + len(BROKEN)
+    if failures:
+        print(f"\n{failures} of {total} test(s) FAILED")
+        sys.exit(1)
+    print(f"\nAll {total} tests PASSED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""Golden-image regression test for graph rendering.
+
+Renders one representative spec per graph_generator.GRAPH_TYPES entry
+(GRAPH_SPECS, which bench_graphs times too), plus the fast_raster version of each FAST_TYPES
+spec, in parallel worker processes, and compares every PNG with a stored
+golden image in references/graphs/ (INVALID_CASES, specs that must be
+rejected with a ValueError, are checked as well):
+
+- same pixel size: the images match when at most MAX_BAD_FRACTION of the
+  pixels differ by more than PIXEL_TOLERANCE gray levels (antialiasing
+  and font hinting move edges by a level or two, not by 50)
+- size off by a few pixels (a tight crop moved with a label): the 64-bit
+  difference hashes of the two images must be within MAX_HASH_DISTANCE
+
+The render time of each case is printed next to its result; --timings
+saves them as JSON and --baseline compares against a saved file, so a
+renderer speedup shows up in the same run that proves the output did not
+change. Graphs are rendered with matplotlib's own fonts only (DejaVu Sans,
+Computer Modern; MATH_HWPX_KOREAN_FONT=none for font_cache), so the golden
+images do not depend on which Korean font a machine has installed.
+
+Usage:
+    # Generate golden images first (one-time, or after an intended change):
+    python test_graphs.py --generate-refs
+
+    # Run the test, keep the timings, compare with them after a change:
+    python test_graphs.py --timings before.json
+    python test_graphs.py --baseline before.json --diff-dir /tmp/graph_diffs
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SKILL_DIR = SCRIPT_DIR.parent
+GOLDEN_DIR = SKILL_DIR / "references" / "graphs"
+
+PIXEL_TOLERANCE = 48       # gray levels a pixel may differ by
+MAX_BAD_FRACTION = 0.002   # share of pixels allowed beyond PIXEL_TOLERANCE
+SIZE_TOLERANCE = 4         # pixels of width/height difference checked by hash
+MAX_HASH_DISTANCE = 4      # bits of the 64-bit difference hash
+
+
+# Representative spec per case name: "<type>" is the golden case of a graph
+# type, "<type>/<variant>" an extra spec bench_graphs times as well. Only
+# ASCII labels, so the goldens need no Korean font (see main).
+GRAPH_SPECS = {
+    "polynomial": {"type": "polynomial", "coeffs": [1, 0, -3, 1], "xlim": [-3, 3], "ylim": [-4, 4]},
+    "quadratic": {"type": "quadratic", "a": 1, "p": 2, "q": -3, "xlim": [-1, 5], "ylim": [-4, 5]},
+    "trig": {"type": "trig", "func": "tan", "amplitude": 1},
+    "exp_log": {"type": "exp_log", "kind": "both", "base": 2},
+    "rational": {"type": "rational", "a": 2, "b": 1, "c": 1, "d": -1},
+    "conic": {"type": "conic", "kind": "ellipse", "a": 4, "b": 2},
+    "conic/hyperbola": {"type": "conic", "kind": "hyperbola", "a": 2, "b": 1.5},
+    "conic/circle": {"type": "conic", "kind": "circle", "a": 3, "h": 1, "k": 1},
+    "derivative": {"type": "derivative", "coeffs": [1, 0, -3, 0], "xlim": [-3, 3], "ylim": [-4, 4]},
+    "integral_area": {"type": "integral_area", "coeffs": [-1, 0, 4], "a": -2, "b": 2,
+                      "xlim": [-3, 3], "ylim": [-1, 5]},
+    "normal": {"type": "normal", "mu": 0, "sigma": 1, "shade_from": -1, "shade_to": 1},
+    "binomial": {"type": "binomial", "n": 10, "p": 0.3, "shade": [{"from": 4}],
+                 "normal_approx": True},
+    "standardization": {"type": "standardization", "mu": 60, "sigma": 5, "values": [55, 60, 70],
+                        "shade": [{"from": 55, "to": 70}]},
+    "normal_table": {"type": "normal_table", "z_values": [0.5, 1.0, 1.5, 2.0]},
+    "number_line": {"type": "number_line", "xlim": [-3, 5],
+                    "intervals": [{"from": -1, "to": 3, "open_right": True}]},
+    "number_line/dense": {"type": "number_line", "xlim": [-10, 10],
+                          "intervals": [{"from": -9, "to": -6, "open_left": True},
+                                        {"from": -2, "to": 1, "open_right": True},
+                                        {"from": 4, "to": 8}],
+                          "points": [{"x": x, "open": x % 2 == 0} for x in (-4, -3, 2, 3, 9)]},
+    "polynomial/points": {"type": "polynomial", "coeffs": [1, 0, -4, 0], "xlim": [-3, 3],
+                          "ylim": [-4, 4], "roots": [-2, 0, 2],
+                          "points": [{"x": x, "y": x ** 3 - 4 * x} for x in (-1.5, -1, -0.5, 0.5, 1, 1.5)]},
+    "custom": {"type": "custom", "curves": [{"expr": "np.sin(x) * x"}], "xlim": [-6, 6], "ylim": [-6, 6]},
+    "custom/points": {"type": "custom", "curves": [{"expr": "x**2 / 4"}],
+                      "points": [{"x": x, "y": x * x / 4, "open": x > 0} for x in range(-4, 5)]},
+    "triangle": {"type": "triangle", "vertices": [[0, 0], [6, 0], [2, 5]],
+                 "labels": {"A": [2, 5], "B": [0, 0], "C": [6, 0]},
+                 "show_angles": [True, True, True], "circumscribed": True},
+    "circle": {"type": "circle", "center": [0, 0], "radius": 3,
+               "points_on_circle": [{"angle_deg": 30, "label": "A"},
+                                    {"angle_deg": 150, "label": "B"}],
+               "chords": [["A", "B"]], "arc_highlight": {"from": "A", "to": "B"}},
+    "quadrilateral": {"type": "quadrilateral", "vertices": [[0, 0], [5, 0], [7, 3], [2, 3]],
+                      "show_diagonals": True},
+    "quadrilateral/marks": {"type": "quadrilateral", "vertices": [[0, 0], [5, 0], [7, 3], [2, 3]],
+                            "labels": {"A": [0, 0], "B": [5, 0], "C": [7, 3], "D": [2, 3]},
+                            "show_diagonals": True, "parallel_marks": {"AB_DC": 1, "AD_BC": 2},
+                            "equal_marks": {"AB": 2, "DC": 2, "AD": 3, "BC": 3}},
+    "coordinate": {"type": "coordinate", "xlim": [-1, 7], "ylim": [-1, 7],
+                   "segments": [[[0, 6], [2, 0]], [[2, 0], [6, 0]]],
+                   "fill_polygon": [[0, 6], [2, 0], [6, 0]]},
+    "solid3d": {"type": "solid3d", "kind": "cylinder", "params": {"radius": 2, "height": 4},
+                "labels": {"r": "2", "h": "4"}},
+    "solid3d/sphere": {"type": "solid3d", "kind": "sphere", "params": {"radius": 2}},
+    "solid3d/pyramid": {"type": "solid3d", "kind": "pyramid", "params": {}},
+}
+
+
+def graph_cases() -> list[tuple[str, dict]]:
+    """(name, spec): one per graph type, then "<type>/fast" per FAST_TYPES entry."""
+    from graph_generator import GRAPH_TYPES
+    from graph_sizing import FAST_TYPES
+
+    cases = [(name, GRAPH_SPECS.get(name)) for name in GRAPH_TYPES]
+    cases += [(f"{name}/fast", dict(GRAPH_SPECS[name], renderer="fast"))
+              for name in FAST_TYPES if name in GRAPH_SPECS]
+    return cases
+
+
+# Specs a build must reject with a ValueError ("Graph error in problem N")
+# rather than crash on or draw something meaningless
+INVALID_CASES = [
+    ("conic/circle_r0", {"type": "conic", "kind": "circle", "a": 0}),
+    ("conic/ellipse_a0", {"type": "conic", "kind": "ellipse", "a": 0, "b": 2}),
+    ("conic/hyperbola_b0", {"type": "conic", "kind": "hyperbola", "a": 2, "b": 0}),
+    ("normal_table/empty", {"type": "normal_table", "z_values": []}),
+]
+
+
+def golden_path(name: str) -> Path:
+    return GOLDEN_DIR / (name.replace("/", "_") + ".png")
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+def _warm_up() -> None:
+    """Import the renderers and load fonts once per worker, outside the timed region."""
+    from graph_worker import render_png_bytes
+
+    for renderer in ("matplotlib", "fast"):
+        render_png_bytes({"type": "polynomial", "coeffs": [1, 0], "renderer": renderer})
+
+
+def render_case(spec: dict) -> tuple[bytes, float]:
+    """(PNG bytes, seconds) of one render, as a build would do it."""
+    from graph_worker import render_png_bytes
+
+    start = time.perf_counter()
+    png = bytes(render_png_bytes(spec))
+    return png, time.perf_counter() - start
+
+
+# ---------------------------------------------------------------------------
+# Comparison
+# ---------------------------------------------------------------------------
+
+def _gray(png: bytes):
+    import numpy as np
+    from PIL import Image
+
+    return np.asarray(Image.open(io.BytesIO(png)).convert("L"), dtype=np.int16)
+
+
+def _dhash(img) -> int:
+    """64-bit difference hash: sign of horizontal gradients on a 9×8 thumbnail."""
+    import numpy as np
+    from PIL import Image
+
+    thumb = np.asarray(Image.fromarray(img.astype(np.uint8)).resize((9, 8), Image.LANCZOS),
+                       dtype=np.int16)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def compare(png: bytes, golden: bytes) -> tuple[bool, str, object]:
+    """(match, detail, difference image or None) of a render against its golden."""
+    import numpy as np
+
+    new, ref = _gray(png), _gray(golden)
+    if new.shape == ref.shape:
+        diff = np.abs(new - ref)
+        bad = float((diff > PIXEL_TOLERANCE).mean())
+        detail = f"{bad:.3%} pixels off"
+        return bad <= MAX_BAD_FRACTION, detail, (255 - np.minimum(diff * 4, 255)).astype(np.uint8)
+    size = f"{new.shape[1]}×{new.shape[0]} vs {ref.shape[1]}×{ref.shape[0]}"
+    if max(abs(a - b) for a, b in zip(new.shape, ref.shape)) > SIZE_TOLERANCE:
+        return False, f"size {size}", None
+    distance = bin(_dhash(new) ^ _dhash(ref)).count("1")
+    return distance <= MAX_HASH_DISTANCE, f"size {size}, hash distance {distance}", None
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _run_all(cases: list[tuple[str, dict]], jobs: int) -> list:
+    """render_case for every case with a spec, in parallel (None if it has none)."""
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_warm_up) as pool:
+        futures = [pool.submit(render_case, spec) if spec is not None else None
+                   for _, spec in cases]
+        return [f.result() if f is not None else None for f in futures]
+
+
+def generate_refs(cases, jobs: int) -> None:
+    """Render every case and store the results as golden images."""
+    GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+    for (name, _), result in zip(cases, _run_all(cases, jobs)):
+        if result is None:
+            print(f"  SKIP: {name} (no representative spec in GRAPH_SPECS)")
+            continue
+        path = golden_path(name)
+        path.write_bytes(result[0])
+        print(f"  REF: {path} ({len(result[0])} bytes)")
+    print(f"\nGolden images saved to {GOLDEN_DIR}")
+
+
+def run_tests(cases, jobs: int, diff_dir: Path | None = None,
+              baseline: dict | None = None) -> tuple[int, dict]:
+    """Compare every case with its golden image; return (failures, ms per case)."""
+    failures = 0
+    timings = {}
+    for (name, _), result in zip(cases, _run_all(cases, jobs)):
+        if result is None:
+            print(f"  FAIL: {name} (no representative spec in GRAPH_SPECS)")
+            failures += 1
+            continue
+        png, seconds = result
+        ms = timings[name] = round(seconds * 1000, 1)
+        timing = f"{ms:7.1f} ms"
+        if baseline and name in baseline:
+            timing += f" ({ms / baseline[name]:.2f}× baseline)"
+        path = golden_path(name)
+        if not path.is_file():
+            print(f"  FAIL: {name:<20} {timing}  golden image not found, run --generate-refs")
+            failures += 1
+            continue
+        ok, detail, diff = compare(png, path.read_bytes())
+        print(f"  {'PASS' if ok else 'FAIL'}: {name:<20} {timing}  {detail}")
+        if not ok:
+            failures += 1
+            if diff_dir is not None:
+                _save_diff(diff_dir, name, png, diff)
+    return failures, timings
+
+
+def run_invalid_cases() -> int:
+    """Check that every INVALID_CASES spec raises ValueError; return failures."""
+    from graph_worker import render_png_bytes
+
+    failures = 0
+    for name, spec in INVALID_CASES:
+        try:
+            render_png_bytes(spec)
+        except ValueError as e:
+            print(f"  PASS: {name:<20} rejected: {e}")
+            continue
+        except Exception as e:
+            print(f"  FAIL: {name:<20} {type(e).__name__}: {e}")
+        else:
+            print(f"  FAIL: {name:<20} rendered instead of raising ValueError")
+        failures += 1
+    return failures
+
+
+def _save_diff(diff_dir: Path, name: str, png: bytes, diff) -> None:
+    from PIL import Image
+
+    diff_dir.mkdir(parents=True, exist_ok=True)
+    stem = name.replace("/", "_")
+    (diff_dir / f"{stem}.png").write_bytes(png)
+    if diff is not None:
+        Image.fromarray(diff).save(diff_dir / f"{stem}.diff.png")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Golden-image regression test for graphs")
+    parser.add_argument("--generate-refs", action="store_true",
+                        help="Generate golden images instead of testing")
+    parser.add_argument("--types", help="Comma-separated case names (default: all)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--timings", type=Path, metavar="JSON",
+                        help="Save the render time of each case (ms) to this file")
+    parser.add_argument("--baseline", type=Path, metavar="JSON",
+                        help="Show render times relative to a saved --timings file")
+    parser.add_argument("--diff-dir", type=Path,
+                        help="Write the render and a difference image of each failed case here")
+    args = parser.parse_args()
+
+    # Before any worker starts: they inherit it and resolve fonts without
+    # looking for a Korean one
+    os.environ["MATH_HWPX_KOREAN_FONT"] = "none"
+    cases = graph_cases()
+    if args.types:
+        names = args.types.split(",")
+        unknown = [n for n in names if n not in dict(cases)]
+        if unknown:
+            raise SystemExit(f"Unknown case(s): {', '.join(unknown)}. "
+                             f"Available: {[name for name, _ in cases]}")
+        cases = [case for case in cases if case[0] in names]
+
+    if args.generate_refs:
+        generate_refs(cases, args.jobs)
+        return
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    print("Running graph regression tests...")
+    failures, timings = run_tests(cases, args.jobs, args.diff_dir, baseline)
+    if args.timings:
+        args.timings.write_text(json.dumps(timings, indent=2), encoding="utf-8")
+    total = len(cases)
+    if not args.types:
+        failures += run_invalid_cases()
+        total += len(INVALID_CASES)
+    print(f"\nTotal render time: {sum(timings.values()):.0f} ms over {len(timings)} graphs")
+    if failures:
+        print(f"{failures} of {total} test(s) FAILED")
+        sys.exit(1)
+    print(f"All {total} tests PASSED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Query tests for the SQLite problem bank.
+
+Imports a small generated bank into a temporary database and checks what
+problem_bank.select() returns for a few queries, in particular that
+order=random is a reproducible shuffle whose seed actually matters:
+
+- different seeds pick different problems under a limit
+- the same seed gives the same order on a new connection
+- a random order is a permutation of the filtered selection
+
+Usage:
+    python test_problem_bank.py
+"""
+
+import sys
+import tempfile
+from contextlib import closing
+from pathlib import Path
+
+from problem_bank import connect, import_problems, select
+
+BANK_SIZE = 200
+SEEDS = (0, 1, 2, 7, 1000)
+
+
+def _texts(conn, query: str) -> list[str]:
+    return [p["text"] for p in select(conn, query)]
+
+
+def check_seeds_differ(conn, bank: Path) -> str | None:
+    picks = {seed: frozenset(_texts(conn, f"order=random seed={seed} limit=8")) for seed in SEEDS}
+    same = [(a, b) for i, a in enumerate(SEEDS) for b in SEEDS[i + 1:] if picks[a] == picks[b]]
+    if same:
+        return f"seeds {same} pick the same 8 problems"
+
+
+def check_seed_reproducible(conn, bank: Path) -> str | None:
+    query = "order=random seed=7 limit=20"
+    with closing(connect(bank)) as other:
+        if _texts(conn, query) != _texts(other, query):
+            return "seed 7 gives a different order on a new connection"
+
+
+def check_permutation(conn, bank: Path) -> str | None:
+    shuffled = _texts(conn, "points=3 order=random seed=5")
+    ordered = _texts(conn, "points=3")
+    if sorted(shuffled) != sorted(ordered):
+        return "order=random changes which problems points=3 selects"
+    if shuffled == ordered:
+        return "order=random seed=5 kept import order"
+
+
+CHECKS = [check_seeds_differ, check_seed_reproducible, check_permutation]
+
+
+def main() -> None:
+    print("Running problem bank tests...")
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmpdir:
+        bank = Path(tmpdir) / "bank.db"
+        with closing(connect(bank)) as conn:
+            problems = [{"text": f"문제 {i}", "points": 2 + i % 3} for i in range(BANK_SIZE)]
+            import_problems(conn, problems, {"grade": "고2"}, "generated")
+            for check in CHECKS:
+                error = check(conn, bank)
+                print(f"  {'FAIL' if error else 'PASS'}: {check.__name__}"
+                      + (f" ({error})" if error else ""))
+                failures += bool(error)
+    if failures:
+        print(f"\n{failures} of {len(CHECKS)} test(s) FAILED")
+        sys.exit(1)
+    print(f"\nAll {len(CHECKS)} tests PASSED")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,73 @@
 #!/usr/bin/env python3
 """Regression test for math-hwpx refactoring.
 
-Builds all test JSON files and compares section0.xml output
-against pre-generated reference files to ensure byte-identical output.
+Generates section0.xml for each test case in memory (write_section into a
+string, no HWPX packing or ZIP round trip) and compares it against
+pre-generated reference files to ensure byte-identical output. Cases run
+in parallel worker processes, and each one also has a size and a time
+budget:
+
+- size: KB of section0.xml plus the graph PNGs that go into the archive;
+  a change that keeps the output but makes it much larger fails
+- time: seconds to read the fixture, render its graphs and generate the
+  section (imports are done before the clock starts). Always printed,
+  but only enforced with --time-budget: wall-clock time on a shared or
+  loaded machine says little about the code
+
+Fixtures are bundled in examples/. The original cases built from the
+authors' own problem files (not in this repository) still run when those
+files are found in the working directory or the project root, and are
+skipped otherwise.
 
 Usage:
-    # Generate reference files first (one-time):
+    # Generate reference files first (one-time, or after an intended change):
     python test_refactor.py --generate-refs
 
     # Run regression tests:
     python test_refactor.py
+    python test_refactor.py --time-budget              # also fail cases over their time budget
+    python test_refactor.py --jobs 1 --time-budget 3   # ... with budgets ×3 (slow machine)
 """
 
 import argparse
+import contextlib
+import io
+import os
 import sys
-import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from zipfile import ZipFile
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 SKILL_DIR = SCRIPT_DIR.parent
 REFS_DIR = SKILL_DIR / "references"
+EXAMPLES_DIR = SKILL_DIR / "examples"
 
-# Test cases: (json_filename, ref_xml_name, description)
+# Test cases: (fixture, data overrides, ref_xml_name, description, max seconds, max KB)
 TEST_CASES = [
+    (EXAMPLES_DIR / "sample_exam_2020_march.json", {}, "ref_example_exam_section0.xml",
+     "exam format", 0.5, 32),
+    (EXAMPLES_DIR / "sample_middle_school.json", {}, "ref_example_middle_section0.xml",
+     "exam format", 0.5, 32),
+    (EXAMPLES_DIR / "sample_high_school.json", {"exam_type": "worksheet"},
+     "ref_example_ws_section0.xml", "worksheet format", 0.5, 32),
+    (EXAMPLES_DIR / "sample_high_school.json", {"layout": "auto"},
+     "ref_example_auto_section0.xml", "exam format, auto layout", 0.5, 32),
+    (EXAMPLES_DIR / "sample_graphs.json", {}, "ref_example_graph_section0.xml",
+     "graph+exam format (png, native, exact)", 5.0, 400),
+]
+
+# Cases from problem files outside the repository: (json_filename, ref_xml_name, description)
+EXTERNAL_CASES = [
     ("고1_다항식_문제지.json", "ref_exam_section0.xml", "exam format"),
     ("중3_겨울방학_수학총정리.json", "ref_ws_section0.xml", "worksheet format"),
     ("그래프_테스트_문제.json", "ref_graph_section0.xml", "graph+exam format"),
 ]
+EXTERNAL_MAX_SECONDS = 10.0
+EXTERNAL_MAX_KB = 2048
 
 
-def find_problems_file(name: str) -> Path:
+def find_problems_file(name: str) -> Path | None:
     """Search for a test JSON file in known locations."""
     candidates = [
         Path.cwd() / name,
@@ -39,74 +76,151 @@ def find_problems_file(name: str) -> Path:
     for p in candidates:
         if p.is_file():
             return p
-    raise FileNotFoundError(f"Cannot find {name} in {[str(c) for c in candidates]}")
+    return None
 
 
-def generate_refs() -> None:
-    """Generate reference section0.xml files."""
-    from build_math_hwpx import build
+def all_cases() -> list[tuple]:
+    """Bundled cases plus the external ones whose problem file was found.
+
+    External cases that are missing come back with fixture None.
+    """
+    cases = list(TEST_CASES)
+    for json_name, ref_name, desc in EXTERNAL_CASES:
+        cases.append((find_problems_file(json_name), {}, ref_name, f"{desc}, {json_name}",
+                      EXTERNAL_MAX_SECONDS, EXTERNAL_MAX_KB))
+    return cases
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+def _warm_up() -> None:
+    """Import the build modules once per worker, outside the timed region."""
+    import build_math_hwpx  # noqa: F401
+    import graph_generator  # noqa: F401
+
+
+def generate_section(fixture: Path, overrides: dict) -> tuple[bytes, int, float]:
+    """(section0.xml bytes, graph PNG bytes, seconds) for one fixture."""
+    from build_math_hwpx import write_section
+    from problem_io import load_problems
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # per-graph progress lines
+        data, problems = load_problems(fixture)
+        data.update(overrides)
+        out = io.StringIO()
+        graph_entries = {}
+        write_section(data, problems, out, graph_entries)
+    seconds = time.perf_counter() - start
+    return (out.getvalue().encode("utf-8"), sum(len(png) for png in graph_entries.values()),
+            seconds)
+
 
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _first_difference(a: bytes, b: bytes) -> str:
+    offset = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+    context = a[max(0, offset - 40):offset + 40].decode("utf-8", "replace")
+    return f"first difference at byte {offset}: ...{context}..."
+
+
+def _run_all(cases: list[tuple], jobs: int) -> list:
+    """generate_section for every case with a fixture, in parallel."""
+    runnable = [(fixture, overrides) for fixture, overrides, *_ in cases if fixture]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_warm_up) as pool:
+        futures = [pool.submit(generate_section, fixture, overrides)
+                   for fixture, overrides in runnable]
+        results = iter([f.result() for f in futures])
+    return [next(results) if case[0] else None for case in cases]
+
+
+def generate_refs(jobs: int) -> None:
+    """Generate reference section0.xml files."""
     REFS_DIR.mkdir(exist_ok=True)
-    for json_name, ref_name, desc in TEST_CASES:
-        problems = find_problems_file(json_name)
-        with tempfile.NamedTemporaryFile(suffix=".hwpx", delete=False) as f:
-            out = Path(f.name)
-        build(problems_file=problems, header_override=None,
-              section_override=None, title=None, creator=None, output=out)
-        section = ZipFile(out).read("Contents/section0.xml")
+    cases = all_cases()
+    for case, result in zip(cases, _run_all(cases, jobs)):
+        fixture, _, ref_name, desc, *_ = case
+        if result is None:
+            print(f"  SKIP: {ref_name} (problem file not found) [{desc}]")
+            continue
+        section = result[0]
         ref_path = REFS_DIR / ref_name
         ref_path.write_bytes(section)
-        out.unlink(missing_ok=True)
         print(f"  REF: {ref_path} ({len(section)} bytes) [{desc}]")
     print(f"\nReferences saved to {REFS_DIR}")
 
 
-def run_tests() -> int:
-    """Run regression tests, return number of failures."""
-    from build_math_hwpx import build
+def run_tests(jobs: int, time_factor: float | None = None) -> tuple[int, int]:
+    """Run regression tests, return (failures, skipped).
 
-    failures = 0
-    for json_name, ref_name, desc in TEST_CASES:
+    time_factor multiplies the time budgets and turns them on; None only
+    reports the times.
+    """
+    failures = skipped = 0
+    cases = all_cases()
+    for case, result in zip(cases, _run_all(cases, jobs)):
+        fixture, _, ref_name, desc, max_seconds, max_kb = case
+        if result is None:
+            print(f"  SKIP: {ref_name} (problem file not found) [{desc}]")
+            skipped += 1
+            continue
         ref_path = REFS_DIR / ref_name
         if not ref_path.is_file():
-            print(f"  SKIP: {ref_name} (reference not found, run --generate-refs)")
+            print(f"  FAIL: {ref_name} (reference not found, run --generate-refs) [{desc}]")
             failures += 1
             continue
 
-        problems = find_problems_file(json_name)
-        with tempfile.NamedTemporaryFile(suffix=".hwpx", delete=False) as f:
-            out = Path(f.name)
-        build(problems_file=problems, header_override=None,
-              section_override=None, title=None, creator=None, output=out)
-        section = ZipFile(out).read("Contents/section0.xml")
+        section, png_bytes, seconds = result
+        size_kb = (len(section) + png_bytes) / 1024
         ref = ref_path.read_bytes()
-        out.unlink(missing_ok=True)
-
-        if section == ref:
-            print(f"  PASS: {json_name} [{desc}]")
-        else:
-            print(f"  FAIL: {json_name} [{desc}] — output differs from reference")
+        problems = []
+        if section != ref:
+            problems.append(f"output differs from reference ({_first_difference(section, ref)})")
+        if time_factor is not None and seconds > max_seconds * time_factor:
+            problems.append(f"took {seconds:.2f} s, budget {max_seconds * time_factor:g} s")
+        if size_kb > max_kb:
+            problems.append(f"{size_kb:.1f} KB, budget {max_kb} KB")
+
+        stats = f"{seconds * 1000:.0f} ms, {size_kb:.1f} KB"
+        if time_factor is None and seconds > max_seconds:
+            stats += f" (over the {max_seconds:g} s time budget, not enforced)"
+        if problems:
+            print(f"  FAIL: {fixture.name} [{desc}] {stats}")
+            for problem in problems:
+                print(f"    - {problem}")
             failures += 1
+        else:
+            print(f"  PASS: {fixture.name} [{desc}] {stats}")
 
-    return failures
+    return failures, skipped
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Regression test for math-hwpx")
     parser.add_argument("--generate-refs", action="store_true",
                         help="Generate reference files instead of testing")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--time-budget", type=float, nargs="?", const=1.0, metavar="FACTOR",
+                        help="Fail cases slower than their time budget, multiplied by "
+                             "FACTOR (default 1); without it times are only printed")
     args = parser.parse_args()
 
     if args.generate_refs:
-        generate_refs()
+        generate_refs(args.jobs)
     else:
         print("Running regression tests...")
-        failures = run_tests()
+        failures, skipped = run_tests(args.jobs, args.time_budget)
+        ran = len(all_cases()) - skipped
         if failures:
-            print(f"\n{failures} test(s) FAILED")
+            print(f"\n{failures} of {ran} test(s) FAILED ({skipped} skipped)")
             sys.exit(1)
         else:
-            print(f"\nAll {len(TEST_CASES)} tests PASSED")
+            print(f"\nAll {ran} tests PASSED ({skipped} skipped)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""Exam variants (A형, B형, ...): one paper, shuffled per seed, in one pass.
+
+Each seed gives a variant with its own problem order and choice order:
+
+- problems are shuffled within runs of the same kind, so multiple-choice
+  problems stay ahead of the short-answer ones that follow them
+- choices are shuffled per problem; with --choices auto (the default)
+  choices that are all plain numbers keep their ascending order, as on
+  printed exams (keep / shuffle force one behaviour for every problem)
+
+The work shared by all variants happens once: graphs are rendered once per
+problem of the paper, the template is copied and validated once, and the
+exam cell of each problem (everything but its number, picture ID and
+choices) and each choice paragraph at each position are generated once
+with deferred IDs (FragmentCache). A variant only lays its problems out
+again, fills in numbers and IDs, and packs its archive. Its section XML is
+the same as a full build of the shuffled paper would write.
+
+An answer mapping for all variants goes next to the papers: per variant the
+original number of each problem, the original choice number at each
+position, and the answer when problems carry an "answer" (a choice number
+or a choice's text for multiple choice, any value otherwise):
+
+    {
+      "A": {"seed":11,"order":[3,1,2,4],"choices":[[2,5,1,3,4],...],"answers":[4,2,null,"12"]},
+      "B": {...}
+    }
+
+Provides:
+- variant_plan: (problem order, choice orders) of one seed
+- variant_answers: answers of a paper in a variant's order and choice order
+- FragmentCache: problem cells generated once, numbered per variant
+- build_variants: write one .hwpx per seed plus the answer mapping
+
+Usage:
+    python variants.py --problems paper.json --seeds 11,22 --output exam.hwpx
+    # → exam_A.hwpx, exam_B.hwpx, exam_answers.json
+
+    python variants.py --problems paper.json --seeds 7,8 --labels 홀수,짝수 --choices keep --output exam.hwpx
+"""
+
+import argparse
+import json
+import random
+import re
+import shutil
+import string
+import sys
+import tempfile
+from contextlib import nullcontext
+from pathlib import Path
+
+from build_math_hwpx import (
+    BASE_DIR,
+    _graph_defaults,
+    _iter_with_graphs,
+    _lint_equations,
+    apply_overrides,
+)
+from graph_worker import GraphWorker
+from hwpx_utils import (
+    _add_images_to_manifest,
+    pack_hwpx,
+    update_metadata,
+    validate_hwpx,
+    validate_xml,
+)
+from problem_io import load_problems
+from profiling import span
+from section_generators import iter_section_xml
+from table_layout import _make_problem_cell_content, make_choice_para
+from xml_primitives import IDGen
+
+_ID_RE = re.compile("\x00(\\d+)\x00")
+_NUM = "\x01"  # problem number marker in cached cells
+_IMG = "\x02"  # picture item ID marker
+
+
+# ---------------------------------------------------------------------------
+# Shuffling
+# ---------------------------------------------------------------------------
+
+def _is_number(choice: str) -> bool:
+    try:
+        float(choice.strip("$ ").replace(",", ""))
+    except ValueError:
+        return False
+    return True
+
+
+def variant_plan(problems: list[dict], seed, choices: str = "auto") -> tuple[list[int], list]:
+    """(original index of each problem, original choice indices per problem or None).
+
+    Problems are shuffled within runs of consecutive problems that all have
+    or all lack choices. choices: "auto", "shuffle" or "keep" (see module
+    docstring).
+    """
+    rng = random.Random(seed)
+    order = []
+    start = 0
+    for i in range(1, len(problems) + 1):
+        if (i == len(problems)
+                or bool(problems[i].get("choices")) != bool(problems[start].get("choices"))):
+            run = list(range(start, i))
+            rng.shuffle(run)
+            order += run
+            start = i
+    choice_orders = []
+    for i in order:
+        options = problems[i].get("choices", [])
+        perm = list(range(len(options)))
+        if choices == "shuffle" or (choices == "auto" and not all(map(_is_number, options))):
+            rng.shuffle(perm)
+        choice_orders.append(perm if options else None)
+    return order, choice_orders
+
+
+def variant_answers(problems: list[dict], order: list[int], choice_orders: list) -> list:
+    """The "answer" of each problem in variant order, choice numbers remapped."""
+    answers = []
+    for i, perm in zip(order, choice_orders):
+        answer = problems[i].get("answer")
+        options = problems[i].get("choices", [])
+        if perm is not None and answer is not None:
+            if isinstance(answer, int) and 1 <= answer <= len(options):
+                answer = perm.index(answer - 1) + 1
+            elif answer in options:
+                answer = perm.index(options.index(answer)) + 1
+        answers.append(answer)
+    return answers
+
+
+# ---------------------------------------------------------------------------
+# Cached cell fragments
+# ---------------------------------------------------------------------------
+
+class _DeferredIDs(IDGen):
+    """Hands out numbered markers instead of IDs; see _fill."""
+
+    def __init__(self):
+        super().__init__(0)
+
+    def next(self) -> str:
+        val = self._next
+        self._next += 1
+        return f"\x00{val}\x00"
+
+    next_eq = next
+
+
+def _fragment(render) -> tuple[str, int]:
+    """(XML with ID markers, number of IDs) of render(idgen)."""
+    ids = _DeferredIDs()
+    return render(ids), ids._next
+
+
+def _fill(fragment: tuple[str, int], idgen: IDGen) -> str:
+    """Replace a fragment's markers by IDs from idgen, in allocation order."""
+    xml, count = fragment
+    ids = [idgen.next() for _ in range(count)]
+    return _ID_RE.sub(lambda m: ids[int(m.group(1))], xml)
+
+
+class FragmentCache:
+    """Exam cells of a paper generated once, completed per variant.
+
+    cell() stands in for table_layout._make_problem_cell_content (through
+    data["_cell_content"]) for problems that carry "_source", their index
+    in the paper. The problem without its choices, and each choice at each
+    position, are generated once with marker IDs, number and picture ID;
+    cell() fills those in, so the XML is what the uncached call returns.
+    """
+
+    def __init__(self):
+        self._cells = {}    # (source, prefix label, has picture) → fragment
+        self._choices = {}  # (position, choice) → fragment
+        self.hits = self.misses = 0
+
+    def cell(self, idgen: IDGen, prob_num: int, prob: dict,
+             prefix_label: str | None = None, image_id: str | None = None) -> str:
+        key = (prob["_source"], prefix_label, image_id is not None)
+        cell = self._cells.get(key)
+        if cell is None:
+            self.misses += 1
+            cell = self._cells[key] = _fragment(lambda ids: _make_problem_cell_content(
+                ids, _NUM, dict(prob, choices=[]), prefix_label,
+                image_id=_IMG if image_id is not None else None))
+        else:
+            self.hits += 1
+        paras = [_fill(cell, idgen).replace(_NUM, str(prob_num)).replace(_IMG, image_id or "")]
+        for k, choice in enumerate(prob.get("choices", [])):
+            para = self._choices.get((k, choice))
+            if para is None:
+                para = self._choices[(k, choice)] = _fragment(
+                    lambda ids: make_choice_para(ids, k, choice))
+            paras.append(_fill(para, idgen))
+        return "\n".join(paras)
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+def _write_answers(path: Path, answers: dict) -> None:
+    """One compact JSON line per variant."""
+    lines = [f"  {json.dumps(label, ensure_ascii=False)}: "
+             f"{json.dumps(entry, ensure_ascii=False, separators=(',', ':'))}"
+             for label, entry in answers.items()]
+    path.write_text("{\n" + ",\n".join(lines) + "\n}\n", encoding="utf-8")
+
+
+def build_variants(problems_file: Path, seeds: list, output: Path,
+                   labels: list[str] | None = None, choices: str = "auto",
+                   title: str | None = None, creator: str | None = None,
+                   answers_file: Path | None = None, lint: bool = True,
+                   **options) -> list[Path]:
+    """Write output_<label>.hwpx per seed and the answer mapping; returns the papers.
+
+    options are the build overrides of build_math_hwpx.apply_overrides
+    (exam_type, layout, graph_render, ...).
+    """
+    if not BASE_DIR.is_dir():
+        raise SystemExit(f"Base template not found: {BASE_DIR}")
+    if not problems_file.is_file():
+        raise SystemExit(f"Problems file not found: {problems_file}")
+    labels = labels or [string.ascii_uppercase[i] if i < 26 else str(i + 1)
+                        for i in range(len(seeds))]
+    if len(labels) != len(seeds):
+        raise SystemExit(f"{len(labels)} labels for {len(seeds)} seeds")
+    if lint:
+        _lint_equations(problems_file)
+    # A variant needs the whole paper to shuffle it
+    with span("load_problems", file=problems_file.name):
+        data, problems = load_problems(problems_file)
+        problems = list(problems)
+    apply_overrides(data, title, **options)
+
+    # 1. Graphs: once per problem of the paper, reused by every variant
+    graph_entries, image_ids = {}, {}
+    isolated = data.get("graph_timeout") or data.get("graph_memory_mb")
+    worker = (GraphWorker(data.get("graph_timeout"), data.get("graph_memory_mb"))
+              if isolated else nullcontext())
+    with worker:
+        for _ in _iter_with_graphs(problems, graph_entries, image_ids, _graph_defaults(data),
+                                   worker if isolated else None):
+            pass
+    pngs = {num - 1: graph_entries[f"BinData/graph_{num}.png"] for num in image_ids}
+
+    cache = FragmentCache()
+    answers = {}
+    papers = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # 2. Template: copied and validated once
+        work = Path(tmpdir) / "build"
+        with span("template_copy"):
+            shutil.copytree(BASE_DIR, work)
+        for xml_file in [*work.rglob("*.xml"), *work.rglob("*.hpf")]:
+            with span("validate_xml", file=xml_file.name):
+                validate_xml(xml_file)
+        section_path = work / "Contents" / "section0.xml"
+        hpf_path = work / "Contents" / "content.hpf"
+        hpf = hpf_path.read_bytes()
+
+        # 3. Per variant: order, numbering, layout, packing
+        for label, seed in zip(labels, seeds):
+            with span("variant", label=label):
+                order, choice_orders = variant_plan(problems, seed, choices)
+                paper = []
+                for i, perm in zip(order, choice_orders):
+                    prob = dict(problems[i], _source=i)
+                    if perm is not None:
+                        prob["choices"] = [problems[i]["choices"][k] for k in perm]
+                    paper.append(prob)
+                numbered = [(num, i) for num, i in enumerate(order, 1) if i in pngs]
+                variant_ids = {num: f"graph{num}" for num, _ in numbered}
+                entries = {f"BinData/graph_{num}.png": pngs[i] for num, i in numbered}
+
+                vdata = dict(data, problems=paper, variant=label,
+                             _image_ids=variant_ids, _cell_content=cache.cell)
+                with span("section"):
+                    with open(section_path, "w", encoding="utf-8") as f:
+                        for chunk in iter_section_xml(vdata):
+                            f.write(chunk)
+                hpf_path.write_bytes(hpf)
+                if variant_ids:
+                    _add_images_to_manifest(hpf_path, variant_ids)
+                update_metadata(hpf_path, f"{title} ({label}형)" if title else None, creator)
+                for xml_file in (section_path, hpf_path):
+                    with span("validate_xml", file=xml_file.name):
+                        validate_xml(xml_file)
+
+                out = output.with_name(f"{output.stem}_{label}{output.suffix}")
+                with span("pack"):
+                    pack_hwpx(work, out, entries)
+                with span("validate_hwpx"):
+                    errors = validate_hwpx(out)
+                if errors:
+                    print(f"WARNING: {out} has issues:", file=sys.stderr)
+                    for e in errors:
+                        print(f"  - {e}", file=sys.stderr)
+                else:
+                    print(f"VALID: {out}")
+                papers.append(out)
+                answers[label] = {
+                    "seed": seed,
+                    "order": [i + 1 for i in order],
+                    "choices": [[k + 1 for k in perm] if perm is not None else None
+                                for perm in choice_orders],
+                    "answers": variant_answers(problems, order, choice_orders),
+                }
+
+    answers_file = answers_file or output.with_name(f"{output.stem}_answers.json")
+    _write_answers(answers_file, answers)
+    print(f"  Answers: {answers_file}")
+    print(f"  Cells: {cache.misses} generated, {cache.hits} reused")
+    return papers
+
+
+def _parse_seed(text: str):
+    return int(text) if text.lstrip("-").isdigit() else text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build shuffled exam variants in one pass")
+    parser.add_argument("--problems", "-p", type=Path, required=True,
+                        help="JSON or JSONL file with the paper's problems")
+    parser.add_argument("--seeds", required=True,
+                        help="Comma-separated seeds, one variant each (e.g. 11,22,33)")
+    parser.add_argument("--labels",
+                        help="Comma-separated variant labels (default: A,B,C,...)")
+    parser.add_argument("--choices", choices=["auto", "shuffle", "keep"], default="auto",
+                        help="Choice order: shuffle except all-number choices (auto, default), "
+                             "always shuffle, or keep")
+    parser.add_argument("--output", "-o", type=Path, required=True,
+                        help="Output path; variants are written as <stem>_<label>.hwpx")
+    parser.add_argument("--answers", type=Path,
+                        help="Answer mapping JSON (default: <stem>_answers.json)")
+    parser.add_argument("--title", help="Document title (variant label is appended)")
+    parser.add_argument("--creator", help="Document creator")
+    parser.add_argument("--exam-type", choices=["worksheet", "학력평가", "수능", "exam"],
+                        default="학력평가", help="Exam type (default: 학력평가)")
+    parser.add_argument("--layout", choices=["fixed", "auto"],
+                        help="Exam page layout: fixed problems_per_page (default) or auto")
+    parser.add_argument("--graph-render", choices=["tight", "exact"],
+                        help="Graph rendering: tight (default) or exact")
+    parser.add_argument("--print-dpi", type=int,
+                        help="Print resolution for --graph-render exact (default: 300)")
+    parser.add_argument("--graph-backend", choices=["png", "native"],
+                        help="Graph output: png images (default) or native drawing objects")
+    parser.add_argument("--graph-renderer", choices=["matplotlib", "fast"],
+                        help="PNG renderer: matplotlib (default) or fast")
+    parser.add_argument("--no-lint", action="store_true",
+                        help="Skip the equation script check that runs before the build")
+    args = parser.parse_args()
+
+    seeds = [_parse_seed(s) for s in args.seeds.split(",") if s]
+    labels = [s for s in args.labels.split(",") if s] if args.labels else None
+    build_variants(args.problems, seeds, args.output, labels, args.choices,
+                   title=args.title, creator=args.creator, answers_file=args.answers,
+                   lint=not args.no_lint, exam_type=args.exam_type, layout=args.layout,
+                   graph_render=args.graph_render, print_dpi=args.print_dpi,
+                   graph_backend=args.graph_backend, graph_renderer=args.graph_renderer)
+
+
+if __name__ == "__main__":
+    main()
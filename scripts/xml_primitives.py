@@ -28,6 +28,7 @@ STYLE = {
     "CHAR_EXAM_NUM": 15,     # 10pt bold+italic, 시험 문제번호
     "CHAR_POINTS": 16,       # 9pt, "[2점]"
     "CHAR_PAGE_NUM": 17,     # 9pt, 페이지 번호
+    "CHAR_FIG_LABEL": 11,    # 9pt, 도형 레이블 (native 도형, = CHAR_CHOICE)
     # paraPr IDs
     "PARA_TITLE": 20,        # CENTER, 제목
     "PARA_BODY": 21,         # LEFT 150%, 문제 본문
@@ -40,6 +41,7 @@ STYLE = {
     "PARA_SECTION_LABEL": 28, # LEFT 140%, 문항유형 라벨
     "PARA_PAGE_NUM": 29,     # CENTER 130%, 페이지 번호
     "PARA_HR": 30,           # 구분선
+    "PARA_FIG_LABEL": 33,    # CENTER 100%, 도형 레이블 글상자
     # borderFill IDs
     "BORDER_INVISIBLE": 2,   # 투명 테이블
 }